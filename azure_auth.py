@@ -11,10 +11,13 @@ import hmac
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-import aiohttp
 import jwt
 from urllib.parse import urlencode, parse_qs, urlparse
 
+from http_transport import HTTPTransport
+from metrics import Metrics, NULL_CALL
+from tracing import Tracer, NULL_SPAN
+
 
 @dataclass
 class TokenResponse:
@@ -47,16 +50,50 @@ class TokenResponse:
 class AzureADClient:
     """Azure AD OAuth 2.0 Client"""
     
-    def __init__(self, tenant_id: str, client_id: str, client_secret: str, redirect_uri: str):
+    def __init__(
+        self,
+        tenant_id: str,
+        client_id: str,
+        client_secret: str,
+        redirect_uri: str,
+        transport: Optional[HTTPTransport] = None,
+        authority_host: str = 'https://login.microsoftonline.com',
+        graph_api_url: str = 'https://graph.microsoft.com/v1.0',
+        metrics: Optional[Metrics] = None,
+        tracer: Optional[Tracer] = None
+    ):
         self.tenant_id = tenant_id
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
         
-        self.authority_url = f'https://login.microsoftonline.com/{tenant_id}'
+        self.authority_url = f"{authority_host.rstrip('/')}/{tenant_id}"
         self.token_endpoint = f'{self.authority_url}/oauth2/v2.0/token'
         self.authorize_endpoint = f'{self.authority_url}/oauth2/v2.0/authorize'
-        self.graph_api_url = 'https://graph.microsoft.com/v1.0'
+        self.graph_api_url = graph_api_url.rstrip('/')
+        self.transport = transport or HTTPTransport()
+        self.metrics = metrics
+        self.tracer = tracer
+    
+    def _upstream(self, service: str, method: str, endpoint: str):
+        """Timing context for one token or Graph call"""
+        if self.metrics is None:
+            return NULL_CALL
+        return self.metrics.upstream(service, method, endpoint)
+    
+    def _span(self, name: str, **attributes):
+        """Child span of the current trace (a no-op without a tracer)"""
+        if self.tracer is None:
+            return NULL_SPAN
+        return self.tracer.span(name, **attributes)
+    
+    async def open(self):
+        """Open the pooled HTTP transport"""
+        await self.transport.open()
+    
+    async def close(self):
+        """Close the pooled HTTP transport"""
+        await self.transport.close()
     
     def generate_auth_url(self, scopes: list = None, state: str = None, nonce: str = None) -> tuple:
         """
@@ -87,49 +124,57 @@ class AzureADClient:
     
     async def get_token_from_code(self, code: str) -> TokenResponse:
         """Exchange authorization code for tokens"""
-        async with aiohttp.ClientSession() as session:
-            data = {
-                'client_id': self.client_id,
-                'scope': 'https://graph.microsoft.com/.default offline_access',
-                'code': code,
-                'redirect_uri': self.redirect_uri,
-                'grant_type': 'authorization_code',
-                'client_secret': self.client_secret
-            }
+        session = await self.transport.get_session()
+        data = {
+            'client_id': self.client_id,
+            'scope': 'https://graph.microsoft.com/.default offline_access',
+            'code': code,
+            'redirect_uri': self.redirect_uri,
+            'grant_type': 'authorization_code',
+            'client_secret': self.client_secret
+        }
+        
+        call = self._upstream('azure_ad', 'POST', '/oauth2/v2.0/token')
+        span = self._span('azure_ad.token', grant_type='authorization_code')
+        async with call, span, session.post(self.token_endpoint, data=data) as resp:
+            call.status = resp.status
+            span.set('status', resp.status)
+            if resp.status != 200:
+                raise Exception(f"Token exchange failed: {await resp.text()}")
             
-            async with session.post(self.token_endpoint, data=data) as resp:
-                if resp.status != 200:
-                    raise Exception(f"Token exchange failed: {await resp.text()}")
-                
-                token_data = await resp.json()
-                return TokenResponse(
-                    access_token=token_data['access_token'],
-                    refresh_token=token_data.get('refresh_token'),
-                    expires_in=int(token_data.get('expires_in', 3600)),
-                    token_type=token_data.get('token_type', 'Bearer')
-                )
+            token_data = await resp.json()
+            return TokenResponse(
+                access_token=token_data['access_token'],
+                refresh_token=token_data.get('refresh_token'),
+                expires_in=int(token_data.get('expires_in', 3600)),
+                token_type=token_data.get('token_type', 'Bearer')
+            )
     
     async def refresh_token(self, refresh_token: str) -> TokenResponse:
         """Refresh access token using refresh token"""
-        async with aiohttp.ClientSession() as session:
-            data = {
-                'client_id': self.client_id,
-                'client_secret': self.client_secret,
-                'refresh_token': refresh_token,
-                'grant_type': 'refresh_token',
-                'scope': 'https://graph.microsoft.com/.default offline_access'
-            }
+        session = await self.transport.get_session()
+        data = {
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+            'refresh_token': refresh_token,
+            'grant_type': 'refresh_token',
+            'scope': 'https://graph.microsoft.com/.default offline_access'
+        }
+        
+        call = self._upstream('azure_ad', 'POST', '/oauth2/v2.0/token')
+        span = self._span('azure_ad.token', grant_type='refresh_token')
+        async with call, span, session.post(self.token_endpoint, data=data) as resp:
+            call.status = resp.status
+            span.set('status', resp.status)
+            if resp.status != 200:
+                raise Exception(f"Token refresh failed: {await resp.text()}")
             
-            async with session.post(self.token_endpoint, data=data) as resp:
-                if resp.status != 200:
-                    raise Exception(f"Token refresh failed: {await resp.text()}")
-                
-                token_data = await resp.json()
-                return TokenResponse(
-                    access_token=token_data['access_token'],
-                    refresh_token=token_data.get('refresh_token', refresh_token),
-                    expires_in=int(token_data.get('expires_in', 3600))
-                )
+            token_data = await resp.json()
+            return TokenResponse(
+                access_token=token_data['access_token'],
+                refresh_token=token_data.get('refresh_token', refresh_token),
+                expires_in=int(token_data.get('expires_in', 3600))
+            )
     
     def decode_id_token(self, id_token: str, verify: bool = False) -> Dict[str, Any]:
         """
@@ -149,39 +194,51 @@ class AzureADClient:
         """Get current user information from Microsoft Graph"""
         headers = {'Authorization': f'Bearer {access_token}'}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{self.graph_api_url}/me', headers=headers) as resp:
-                if resp.status != 200:
-                    raise Exception(f"Failed to get user info: {await resp.text()}")
-                return await resp.json()
+        session = await self.transport.get_session()
+        call = self._upstream('graph', 'GET', '/me')
+        span = self._span('graph.request', endpoint='/me')
+        async with call, span, session.get(f'{self.graph_api_url}/me', headers=headers) as resp:
+            call.status = resp.status
+            span.set('status', resp.status)
+            if resp.status != 200:
+                raise Exception(f"Failed to get user info: {await resp.text()}")
+            return await resp.json()
     
     async def get_user_calendar(self, access_token: str) -> list:
         """Get user's calendar events"""
         headers = {'Authorization': f'Bearer {access_token}'}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f'{self.graph_api_url}/me/calendarview?startDateTime={datetime.utcnow().isoformat()}Z&endDateTime={(datetime.utcnow() + timedelta(days=7)).isoformat()}Z',
-                headers=headers
-            ) as resp:
-                if resp.status != 200:
-                    raise Exception(f"Failed to get calendar: {await resp.text()}")
-                data = await resp.json()
-                return data.get('value', [])
+        session = await self.transport.get_session()
+        call = self._upstream('graph', 'GET', '/me/calendarview')
+        span = self._span('graph.request', endpoint='/me/calendarview')
+        async with call, span, session.get(
+            f'{self.graph_api_url}/me/calendarview?startDateTime={datetime.utcnow().isoformat()}Z&endDateTime={(datetime.utcnow() + timedelta(days=7)).isoformat()}Z',
+            headers=headers
+        ) as resp:
+            call.status = resp.status
+            span.set('status', resp.status)
+            if resp.status != 200:
+                raise Exception(f"Failed to get calendar: {await resp.text()}")
+            data = await resp.json()
+            return data.get('value', [])
     
     async def get_user_mail(self, access_token: str, top: int = 10) -> list:
         """Get user's recent emails"""
         headers = {'Authorization': f'Bearer {access_token}'}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f'{self.graph_api_url}/me/messages?$top={top}',
-                headers=headers
-            ) as resp:
-                if resp.status != 200:
-                    raise Exception(f"Failed to get mail: {await resp.text()}")
-                data = await resp.json()
-                return data.get('value', [])
+        session = await self.transport.get_session()
+        call = self._upstream('graph', 'GET', '/me/messages')
+        span = self._span('graph.request', endpoint='/me/messages')
+        async with call, span, session.get(
+            f'{self.graph_api_url}/me/messages?$top={top}',
+            headers=headers
+        ) as resp:
+            call.status = resp.status
+            span.set('status', resp.status)
+            if resp.status != 200:
+                raise Exception(f"Failed to get mail: {await resp.text()}")
+            data = await resp.json()
+            return data.get('value', [])
 
 
 class AzureADLoginManager:
@@ -0,0 +1,596 @@
+"""
+Backtesting
+Replays historical candles (or trades rolled up into candles) through a
+strategy. Signal strategies run on a vectorized path over whole
+(products x bars) arrays; order-level strategies run bar by bar against a
+simulated broker that speaks the live OrderRequest/CoinbaseOrder models,
+with fees and slippage.
+"""
+
+import itertools
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Any
+
+import numpy as np
+
+from candles import START, OPEN, HIGH, LOW, CLOSE, VOLUME
+from coinbase_client import CoinbaseOrder, OrderRequest, OrderSide, OrderType
+from indicators import sma
+from portfolio import EPSILON, ProductBook
+from product_rules import OrderValidationError, ProductRulesIndex
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+def bars_from_trades(
+    timestamps: np.ndarray,
+    prices: np.ndarray,
+    sizes: np.ndarray,
+    period: int
+) -> np.ndarray:
+    """
+    Roll time-ordered trades up into OHLCV bars
+    Returns: (n, 6) array in the CandleAggregator column layout (empty
+    periods are skipped, not filled)
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if not len(timestamps):
+        return np.empty((0, 6))
+    prices = np.asarray(prices, dtype=np.float64)
+    sizes = np.asarray(sizes, dtype=np.float64)
+    
+    starts = timestamps - timestamps % period
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    last = np.r_[first[1:] - 1, len(prices) - 1]
+    
+    bars = np.empty((len(first), 6))
+    bars[:, START] = starts[first]
+    bars[:, OPEN] = prices[first]
+    bars[:, HIGH] = np.maximum.reduceat(prices, first)
+    bars[:, LOW] = np.minimum.reduceat(prices, first)
+    bars[:, CLOSE] = prices[last]
+    bars[:, VOLUME] = np.add.reduceat(sizes, first)
+    return bars
+
+
+# ============================================================================
+# Strategy interfaces
+# ============================================================================
+
+class SignalStrategy:
+    """
+    Vectorized strategy: a target exposure per product and bar
+    signals() sees the full (products, bars, 6) array and must only use data
+    up to each bar's close; the target is traded at the next bar's open.
+    """
+    
+    def signals(self, bars: np.ndarray) -> np.ndarray:
+        """(products, bars) target exposure in [0, 1] (spot, long only)"""
+        raise NotImplementedError
+    
+    def params(self) -> Dict[str, Any]:
+        return {}
+
+
+class Strategy:
+    """Order-level strategy driven bar by bar through a SimulatedBroker"""
+    
+    def on_start(self, broker: 'SimulatedBroker', bars: np.ndarray, product_ids: List[str]):
+        pass
+    
+    def on_fill(self, broker: 'SimulatedBroker', fill: dict):
+        pass
+    
+    def on_bar(self, broker: 'SimulatedBroker', index: int, bars: np.ndarray):
+        """Called after each bar closes with that bar for every product ((products, 6))"""
+        pass
+
+
+class MovingAverageCross(SignalStrategy):
+    """Long while the fast SMA of closes is above the slow one"""
+    
+    def __init__(self, fast: int = 10, slow: int = 30):
+        self.fast = fast
+        self.slow = slow
+    
+    def signals(self, bars: np.ndarray) -> np.ndarray:
+        close = bars[..., CLOSE]
+        with np.errstate(invalid='ignore'):
+            return (sma(close, self.fast) > sma(close, self.slow)).astype(np.float64)
+    
+    def params(self) -> Dict[str, Any]:
+        return {'fast': self.fast, 'slow': self.slow}
+
+
+class SignalAdapter(Strategy):
+    """
+    Runs a SignalStrategy (0/1 targets) through the broker with market orders
+    Each product trades its own equal share of the starting cash, matching
+    the vectorized path, so the two can be checked against each other.
+    """
+    
+    def __init__(self, strategy: SignalStrategy):
+        self.strategy = strategy
+        self.targets: Optional[np.ndarray] = None
+        self.sleeves: Dict[str, float] = {}
+        self.product_ids: List[str] = []
+    
+    def on_start(self, broker, bars, product_ids):
+        self.targets = np.nan_to_num(self.strategy.signals(bars)) > 0.5
+        self.product_ids = product_ids
+        self.sleeves = {product_id: broker.cash / len(product_ids) for product_id in product_ids}
+    
+    def on_fill(self, broker, fill):
+        value = fill['price'] * fill['size']
+        if fill['side'] == 'BUY':
+            self.sleeves[fill['product_id']] -= value + fill['commission']
+        else:
+            self.sleeves[fill['product_id']] += value - fill['commission']
+    
+    def on_bar(self, broker, index, bars):
+        for row, product_id in enumerate(self.product_ids):
+            held = broker.position(product_id) > EPSILON
+            if self.targets[row, index] and not held and self.sleeves[product_id] > 0:
+                broker.place_order(OrderRequest(
+                    product_id=product_id,
+                    side=OrderSide.BUY,
+                    order_type=OrderType.MARKET,
+                    quote_size=repr(self.sleeves[product_id] / (1 + broker.fee_rate))
+                ))
+            elif not self.targets[row, index] and held:
+                broker.place_order(OrderRequest(
+                    product_id=product_id,
+                    side=OrderSide.SELL,
+                    order_type=OrderType.MARKET,
+                    base_size=repr(broker.position(product_id))
+                ))
+
+
+# ============================================================================
+# Results
+# ============================================================================
+
+@dataclass
+class BacktestResult:
+    """Equity curve and statistics of one run"""
+    equity: np.ndarray  # Total equity at each bar close
+    period: float  # Bar length in seconds
+    trades: int
+    fees: float
+    exposure: float  # Share of product-bars holding a position
+    product_returns: Dict[str, float] = field(default_factory=dict)
+    orders: List[CoinbaseOrder] = field(default_factory=list)
+    fills: List[dict] = field(default_factory=list)
+    
+    @property
+    def total_return(self) -> float:
+        return float(self.equity[-1] / self.equity[0] - 1) if len(self.equity) else 0.0
+    
+    @property
+    def max_drawdown(self) -> float:
+        if not len(self.equity):
+            return 0.0
+        return float(np.max(1 - self.equity / np.maximum.accumulate(self.equity)))
+    
+    @property
+    def sharpe(self) -> float:
+        """Annualized Sharpe ratio of bar returns (zero risk-free rate)"""
+        returns = np.diff(self.equity) / self.equity[:-1]
+        if len(returns) < 2 or not returns.std():
+            return 0.0
+        return float(returns.mean() / returns.std() * np.sqrt(SECONDS_PER_YEAR / self.period))
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'bars': len(self.equity),
+            'final_equity': float(self.equity[-1]) if len(self.equity) else 0.0,
+            'total_return': self.total_return,
+            'max_drawdown': self.max_drawdown,
+            'sharpe': self.sharpe,
+            'trades': self.trades,
+            'fees': self.fees,
+            'exposure': self.exposure,
+            'product_returns': self.product_returns
+        }
+
+
+def _as_panel(bars: np.ndarray, product_ids: Optional[Sequence[str]]) -> tuple:
+    """(bars, 6) or (products, bars, 6) -> 3-D bars plus product ids"""
+    bars = np.asarray(bars, dtype=np.float64)
+    if bars.ndim == 2:
+        bars = bars[np.newaxis]
+    if product_ids is None:
+        product_ids = [f"product-{row}" for row in range(bars.shape[0])]
+    if len(product_ids) != bars.shape[0]:
+        raise ValueError("One product id is needed per bar series")
+    return bars, list(product_ids)
+
+
+def _period(bars: np.ndarray) -> float:
+    """Bar length in seconds from the start column (60 if unknown)"""
+    if bars.shape[1] < 2:
+        return 60.0
+    step = np.median(np.diff(bars[0, :, START]))
+    return float(step) if step > 0 else 60.0
+
+
+# ============================================================================
+# Vectorized path
+# ============================================================================
+
+def run_vectorized(
+    strategy: SignalStrategy,
+    bars: np.ndarray,
+    product_ids: Optional[Sequence[str]] = None,
+    cash: float = 10000.0,
+    fee_rate: float = 0.006,
+    slippage_bps: float = 5.0
+) -> BacktestResult:
+    """
+    Backtest a signal strategy over every product at once
+    Each product gets an equal share of `cash`; exposure is rebalanced to the
+    target at each bar's open, paying fee_rate and slippage on the traded
+    fraction. For 0/1 targets this matches the broker's market-order fills.
+    """
+    bars, product_ids = _as_panel(bars, product_ids)
+    count, length = bars.shape[:2]
+    if not length:
+        return BacktestResult(np.empty(0), _period(bars), 0, 0.0, 0.0)
+    
+    target = np.clip(np.nan_to_num(strategy.signals(bars)), 0.0, 1.0)
+    weight = np.zeros((count, length))
+    weight[:, 1:] = target[:, :-1]  # Decided at the close, traded at the next open
+    previous = np.zeros((count, length))
+    previous[:, 1:] = weight[:, :-1]
+    
+    open_, close = bars[..., OPEN], bars[..., CLOSE]
+    prior_close = np.concatenate((open_[:, :1], close[:, :-1]), axis=1)
+    slippage = slippage_bps / 10000
+    change = weight - previous
+    buy_cost = 1 - 1 / ((1 + fee_rate) * (1 + slippage))
+    sell_cost = 1 - (1 - fee_rate) * (1 - slippage)
+    cost = np.where(change > 0, change * buy_cost, -change * sell_cost)
+    
+    # Gap from the previous close at the old weight, then the bar at the new one
+    growth = (1 + previous * (open_ / prior_close - 1)) * (1 - cost) * (1 + weight * (close / open_ - 1))
+    sleeve = cash / count
+    equity = sleeve * np.cumprod(growth, axis=1)
+    
+    # Fees alone (slippage is a price effect), as a share of equity at the open
+    at_open = sleeve * np.concatenate((np.ones((count, 1)), equity[:, :-1] / sleeve), axis=1)
+    at_open *= 1 + previous * (open_ / prior_close - 1)
+    fee_share = np.where(change > 0, change * fee_rate / (1 + fee_rate), -change * (1 - slippage) * fee_rate)
+    
+    return BacktestResult(
+        equity=equity.sum(axis=0),
+        period=_period(bars),
+        trades=int(np.count_nonzero(change)),
+        fees=float((at_open * fee_share).sum()),
+        exposure=float(np.mean(weight > 0)),
+        product_returns={
+            product_id: float(equity[row, -1] / sleeve - 1) for row, product_id in enumerate(product_ids)
+        }
+    )
+
+
+# ============================================================================
+# Event-driven path
+# ============================================================================
+
+class SimulatedBroker:
+    """
+    Spot broker filling OrderRequests against bars
+    Orders placed during a bar are filled from the next bar on: market orders
+    at the open with slippage, limits when the range crosses the price
+    (maker fee unless marketable at the open), stop-limits once triggered.
+    """
+    
+    def __init__(
+        self,
+        cash: float = 10000.0,
+        fee_rate: float = 0.006,
+        maker_fee_rate: float = 0.004,
+        slippage_bps: float = 5.0,
+        rules: Optional[ProductRulesIndex] = None
+    ):
+        self.cash = cash
+        self.fee_rate = fee_rate
+        self.maker_fee_rate = maker_fee_rate
+        self.slippage = slippage_bps / 10000
+        self.rules = rules
+        self.books: Dict[str, ProductBook] = {}
+        self.marks: Dict[str, float] = {}
+        self.orders: List[CoinbaseOrder] = []
+        self.fills: List[dict] = []
+        self.fees = 0.0
+        self.time = 0.0
+        self._open: List[tuple] = []  # (order, request, triggered) still working
+    
+    def position(self, product_id: str) -> float:
+        book = self.books.get(product_id)
+        return book.position if book is not None else 0.0
+    
+    def equity(self) -> float:
+        return self.cash + sum(book.position * self.marks.get(pid, 0.0) for pid, book in self.books.items())
+    
+    def place_order(self, request: OrderRequest) -> CoinbaseOrder:
+        """Accept an order for the next bar (raises OrderValidationError like the live client)"""
+        fields = {
+            'base_size': request.base_size,
+            'quote_size': request.quote_size,
+            'limit_price': request.limit_price,
+            'stop_price': request.stop_price
+        }
+        rules = self.rules.get(request.product_id) if self.rules is not None else None
+        if rules is not None:
+            fields = rules.check(request.side.value, **fields)
+        request = OrderRequest(request.product_id, request.side, request.order_type, **fields)
+        if not request.base_size and not request.quote_size:
+            raise OrderValidationError(f"{request.product_id}: order has no size")
+        
+        if request.order_type == OrderType.MARKET:
+            size = {'base_size': request.base_size} if request.base_size else {'quote_size': request.quote_size}
+            configuration = {'market_market_ioc': size}
+        elif request.order_type == OrderType.LIMIT:
+            configuration = {'limit_limit_gtc': {
+                'base_size': request.base_size, 'limit_price': request.limit_price
+            }}
+        else:
+            configuration = {'stop_limit_stop_limit_gtc': {
+                'base_size': request.base_size,
+                'limit_price': request.limit_price,
+                'stop_price': request.stop_price
+            }}
+        
+        order = CoinbaseOrder(
+            order_id=str(uuid.uuid4()),
+            product_id=request.product_id,
+            user_id='backtest',
+            order_configuration=configuration,
+            side=request.side.value,
+            type=request.order_type.value,
+            time_in_force='IMMEDIATE_OR_CANCEL' if request.order_type == OrderType.MARKET else 'GOOD_UNTIL_CANCELLED',
+            post_only=False,
+            creation_time=_timestamp(self.time),
+            completion_time=None,
+            order_type=request.order_type.value,
+            filled_size='0',
+            average_filled_price='0',
+            fee='0',
+            number_of_fills=0,
+            filled_value='0',
+            pending_cancel_reason=None,
+            reject_reason=None,
+            settled=False,
+            status='OPEN',
+            client_order_id=str(uuid.uuid4())
+        )
+        self.orders.append(order)
+        self._open.append((order, request, False))
+        return order
+    
+    def cancel_order(self, order_id: str) -> bool:
+        for item in self._open:
+            if item[0].order_id == order_id:
+                self._open.remove(item)
+                item[0].status = 'CANCELLED'
+                item[0].completion_time = _timestamp(self.time)
+                return True
+        return False
+    
+    def process_bar(self, product_id: str, bar: np.ndarray) -> List[dict]:
+        """Fill this product's working orders against one bar; returns the new fills"""
+        self.time = float(bar[START])
+        new_fills = []
+        still_open = []
+        for order, request, triggered in self._open:
+            if order.product_id != product_id:
+                still_open.append((order, request, triggered))
+                continue
+            outcome = self._match(request, bar, triggered)
+            if outcome is None:
+                still_open.append((order, request, triggered))
+            elif outcome == 'triggered':
+                still_open.append((order, request, True))
+            else:
+                price, maker = outcome
+                fill = self._fill(order, request, price, maker)
+                if fill is not None:
+                    new_fills.append(fill)
+        self._open = still_open
+        self.marks[product_id] = float(bar[CLOSE])
+        return new_fills
+    
+    def _match(self, request: OrderRequest, bar: np.ndarray, triggered: bool):
+        """(price, maker) if the order fills in this bar, 'triggered' or None"""
+        buy = request.side == OrderSide.BUY
+        open_, high, low = bar[OPEN], bar[HIGH], bar[LOW]
+        
+        if request.order_type == OrderType.MARKET:
+            return (open_ * (1 + self.slippage) if buy else open_ * (1 - self.slippage)), False
+        
+        limit = float(request.limit_price)
+        if request.order_type == OrderType.STOP and not triggered:
+            stop = float(request.stop_price)
+            if buy and high >= stop:
+                trigger = max(open_, stop)
+                if trigger <= limit:
+                    return min(trigger * (1 + self.slippage), limit), False
+                return 'triggered'
+            if not buy and low <= stop:
+                trigger = min(open_, stop)
+                if trigger >= limit:
+                    return max(trigger * (1 - self.slippage), limit), False
+                return 'triggered'
+            return None
+        
+        # Resting limit (or a triggered stop-limit)
+        if buy and low <= limit:
+            return (open_, False) if open_ <= limit else (limit, True)
+        if not buy and high >= limit:
+            return (open_, False) if open_ >= limit else (limit, True)
+        return None
+    
+    def _fill(self, order: CoinbaseOrder, request: OrderRequest, price: float, maker: bool) -> Optional[dict]:
+        buy = request.side == OrderSide.BUY
+        price = float(price)
+        if request.base_size:
+            size = float(request.base_size)
+        else:
+            size = float(request.quote_size) / price
+        value = size * price
+        commission = value * (self.maker_fee_rate if maker else self.fee_rate)
+        book = self.books.get(request.product_id)
+        if book is None:
+            book = self.books[request.product_id] = ProductBook(request.product_id)
+        
+        if (buy and value + commission > self.cash * (1 + 1e-12)) or (not buy and size > book.position + EPSILON):
+            order.status = 'FAILED'
+            order.reject_reason = 'INSUFFICIENT_FUND'
+            order.completion_time = _timestamp(self.time)
+            return None
+        
+        size = min(size, book.position) if not buy else size
+        value = size * price
+        self.cash += -(value + commission) if buy else value - commission
+        self.fees += commission
+        book.apply(request.side.value, price, size, commission, self.time)
+        
+        order.status = 'FILLED'
+        order.filled_size = repr(size)
+        order.average_filled_price = repr(price)
+        order.filled_value = repr(value)
+        order.fee = repr(commission)
+        order.number_of_fills = 1
+        order.completion_time = _timestamp(self.time)
+        order.settled = True
+        
+        # Same shape as an exchange fill, so the history/portfolio code can read it
+        fill = {
+            'entry_id': f"{order.order_id}:1",
+            'trade_id': str(len(self.fills) + 1),
+            'order_id': order.order_id,
+            'product_id': request.product_id,
+            'side': request.side.value,
+            'price': price,
+            'size': size,
+            'commission': commission,
+            'size_in_quote': False,
+            'liquidity_indicator': 'MAKER' if maker else 'TAKER',
+            'trade_time': order.completion_time
+        }
+        self.fills.append(fill)
+        return fill
+
+
+def _timestamp(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def run_events(
+    strategy: Strategy,
+    bars: np.ndarray,
+    product_ids: Optional[Sequence[str]] = None,
+    broker: Optional[SimulatedBroker] = None
+) -> BacktestResult:
+    """Backtest an order-level strategy bar by bar (all products share one broker)"""
+    bars, product_ids = _as_panel(bars, product_ids)
+    broker = broker or SimulatedBroker()
+    starting_cash = broker.cash
+    length = bars.shape[1]
+    equity = np.empty(length)
+    exposed = 0
+    
+    strategy.on_start(broker, bars, product_ids)
+    for index in range(length):
+        step = bars[:, index]
+        for row, product_id in enumerate(product_ids):
+            if np.isnan(step[row, CLOSE]):
+                continue  # No bar for this product at this time
+            for fill in broker.process_bar(product_id, step[row]):
+                strategy.on_fill(broker, fill)
+        equity[index] = broker.equity()
+        exposed += sum(book.position > EPSILON for book in broker.books.values())
+        strategy.on_bar(broker, index, step)
+    
+    sleeve = starting_cash / len(product_ids)
+    return BacktestResult(
+        equity=equity,
+        period=_period(bars),
+        trades=len(broker.fills),
+        fees=broker.fees,
+        exposure=exposed / (length * len(product_ids)) if length else 0.0,
+        product_returns={
+            product_id: (
+                (broker.books[product_id].realized_fifo - broker.books[product_id].fees)
+                + broker.position(product_id) * broker.marks.get(product_id, 0.0)
+                - broker.books[product_id].fifo_cost
+            ) / sleeve
+            if product_id in broker.books else 0.0
+            for product_id in product_ids
+        },
+        orders=broker.orders,
+        fills=broker.fills
+    )
+
+
+# ============================================================================
+# Parameter sweeps
+# ============================================================================
+
+# Per-process state for sweep workers (set once by the pool initializer)
+_sweep_state: Dict[str, Any] = {}
+
+
+def _init_sweep(strategy_class: type, bars: np.ndarray, product_ids: Optional[list], costs: dict):
+    _sweep_state.update(strategy_class=strategy_class, bars=bars, product_ids=product_ids, costs=costs)
+
+
+def _sweep_one(params: Dict[str, Any]) -> Dict[str, Any]:
+    state = _sweep_state
+    result = run_vectorized(
+        state['strategy_class'](**params), state['bars'], state['product_ids'], **state['costs']
+    )
+    summary = result.summary()
+    summary.pop('product_returns')
+    return {'params': params, **summary}
+
+
+def sweep(
+    strategy_class: type,
+    grid: Dict[str, Iterable[Any]],
+    bars: np.ndarray,
+    product_ids: Optional[Sequence[str]] = None,
+    processes: Optional[int] = None,
+    **costs
+) -> List[Dict[str, Any]]:
+    """
+    Vectorized backtest of every parameter combination in `grid`
+    Combinations are spread over `processes` worker processes (default: all
+    cores); the bars are sent to each worker once, not once per combination.
+    Returns one summary per combination, best total return first.
+    """
+    names = list(grid)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    processes = processes or os.cpu_count() or 1
+    bars = np.asarray(bars, dtype=np.float64)
+    ids = list(product_ids) if product_ids is not None else None
+    
+    if processes == 1 or len(combinations) == 1:
+        _init_sweep(strategy_class, bars, ids, costs)
+        results = [_sweep_one(params) for params in combinations]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_sweep,
+            initargs=(strategy_class, bars, ids, costs)
+        ) as executor:
+            chunksize = max(1, len(combinations) // (processes * 4))
+            results = list(executor.map(_sweep_one, combinations, chunksize=chunksize))
+    
+    results.sort(key=lambda result: result['total_return'], reverse=True)
+    return results
@@ -0,0 +1,4 @@
+"""
+Benchmark Suite
+Run from the repository root, e.g. `python -m benchmarks.graph_pool`.
+"""
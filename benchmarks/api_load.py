@@ -0,0 +1,316 @@
+"""
+API Load Benchmark
+Runs main.py's app under uvicorn (separate process) against the simulated
+exchange and the Graph stand-in, drives a weighted request mix at a fixed
+concurrency and reports throughput and p50/p95/p99/p99.9 latency per
+endpoint. Results are saved as JSON; with --baseline the run is compared
+to an earlier result and exits non-zero on regressions beyond --threshold.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+import numpy as np
+
+from benchmarks.stand_ins import GraphStandIn
+from simulated_exchange import SimulatedExchange
+
+
+def _limit_order(rng: random.Random) -> str:
+    side = rng.choice(('BUY', 'SELL'))
+    price = f"{50000 + rng.randint(-20, 20) / 100:.2f}"
+    return f'/trading/orders/limit?product_id=BTC-USD&side={side}&base_size=0.001&limit_price={price}'
+
+
+def _market_order(rng: random.Random) -> str:
+    side = rng.choice(('BUY', 'SELL'))
+    return f'/trading/orders/market?product_id=BTC-USD&side={side}&quote_size=100'
+
+
+# name -> (method, path or path builder, default weight)
+ENDPOINTS: Dict[str, tuple] = {
+    'health': ('GET', '/health', 5),
+    'ticker': ('GET', '/trading/ticker/BTC-USD', 20),
+    'tickers': ('GET', '/trading/tickers?ids=BTC-USD,ETH-USD,SOL-USD', 10),
+    'products': ('GET', '/trading/products', 5),
+    'product_rules': ('GET', '/trading/products/BTC-USD/rules', 5),
+    'book': ('GET', '/trading/book/BTC-USD?depth=10', 10),
+    'candles': ('GET', '/trading/candles/BTC-USD?granularity=1m&limit=100', 5),
+    'accounts': ('GET', '/trading/accounts', 5),
+    'orders': ('GET', '/trading/orders?product_id=BTC-USD', 5),
+    'place_limit': ('POST', _limit_order, 10),
+    'place_market': ('POST', _market_order, 5),
+    'fills': ('GET', '/trading/fills?limit=50', 5),
+    'history_fills': ('GET', '/trading/history/fills?limit=100', 3),
+    'portfolio': ('GET', '/trading/portfolio', 2),
+    'graph_user': ('GET', '/auth/user?authorization=Bearer%20bench-access-token', 5)
+}
+
+# Compared against a baseline (p99.9 is too noisy to gate on)
+GATED_METRICS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, int]:
+    """'ticker=50,book=10' -> weights (named endpoints only; default weights if empty)"""
+    if not spec:
+        return {name: weight for name, (_, _, weight) in ENDPOINTS.items()}
+    mix = {}
+    for item in spec.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' (known: {', '.join(ENDPOINTS)})")
+        mix[name] = int(weight or ENDPOINTS[name][2])
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def summarize(samples: List[float], errors: int, seconds: float) -> dict:
+    """Throughput and latency percentiles (milliseconds)"""
+    if not samples:
+        return {'requests': 0, 'errors': errors}
+    latencies = np.asarray(samples) * 1e3
+    p50, p95, p99, p999 = np.percentile(latencies, (50, 95, 99, 99.9))
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'requests_per_second': round(len(samples) / seconds, 1),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'p99_9_ms': round(float(p999), 3),
+        'max_ms': round(float(latencies.max()), 3)
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Regressions of current vs. baseline beyond `threshold` (0.2 = 20%)"""
+    regressions = []
+    for name, result in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before or not before.get('requests') or not result.get('requests'):
+            continue
+        for metric in GATED_METRICS:
+            if result[metric] > before[metric] * (1 + threshold):
+                regressions.append(f"{name} {metric}: {before[metric]} -> {result[metric]}")
+        if result['requests_per_second'] < before['requests_per_second'] * (1 - threshold):
+            regressions.append(
+                f"{name} requests_per_second: {before['requests_per_second']} -> {result['requests_per_second']}"
+            )
+    return regressions
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise Exception(f"App exited during startup (code {process.returncode})")
+            try:
+                async with session.get(f'{url}/health') as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+    raise Exception(f"App not ready after {timeout}s")
+
+
+async def drive(
+    url: str,
+    mix: Dict[str, int],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int
+) -> dict:
+    """Closed-loop load: `concurrency` workers each issue one request at a time"""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    failures: Dict[str, str] = {}
+    recording = False
+    
+    async def worker(session: aiohttp.ClientSession, rng: random.Random, stop_at: float):
+        while time.perf_counter() < stop_at:
+            name = rng.choices(names, weights)[0]
+            method, path, _ = ENDPOINTS[name]
+            if callable(path):
+                path = path(rng)
+            start = time.perf_counter()
+            try:
+                async with session.request(method, f'{url}{path}') as resp:
+                    await resp.read()
+                    ok = resp.status < 400
+                    if not ok:
+                        failures.setdefault(name, f"{resp.status}: {(await resp.text())[:200]}")
+            except aiohttp.ClientError as e:
+                ok = False
+                failures.setdefault(name, f"{type(e).__name__}: {e}")
+            elapsed = time.perf_counter() - start
+            if recording:
+                samples[name].append(elapsed)
+                if not ok:
+                    errors[name] += 1
+    
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        rngs = [random.Random(seed + i) for i in range(concurrency)]
+        if warmup > 0:
+            stop_at = time.perf_counter() + warmup
+            await asyncio.gather(*(worker(session, rng, stop_at) for rng in rngs))
+        recording = True
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session, rng, start + duration) for rng in rngs))
+        seconds = time.perf_counter() - start
+    
+    endpoints = {name: summarize(samples[name], errors[name], seconds) for name in names}
+    every = [sample for name in names for sample in samples[name]]
+    return {
+        'endpoints': endpoints,
+        'total': summarize(every, sum(errors.values()), seconds),
+        'first_failures': failures
+    }
+
+
+async def run_async(
+    mix: Dict[str, int],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    upstream_latency: float,
+    seed: int
+) -> dict:
+    directory = tempfile.mkdtemp(prefix='api-load-')
+    async with SimulatedExchange(latency=upstream_latency, seed=seed) as exchange, GraphStandIn() as graph:
+        port = _free_port()
+        env = {
+            **os.environ,
+            'COINBASE_API_KEY': 'bench-key',
+            'COINBASE_API_SECRET': 'YmVuY2gtc2VjcmV0',
+            'COINBASE_API_PASSPHRASE': 'bench-passphrase',
+            'COINBASE_SANDBOX_MODE': 'false',
+            'COINBASE_BASE_URL': exchange.url,
+            'COINBASE_WS_URL': exchange.ws_url,
+            'COINBASE_WS_PRODUCTS': 'BTC-USD,ETH-USD',
+            'COINBASE_WS_LEVEL2': 'true',
+            'COINBASE_WS_TRADES': 'true',
+            'COINBASE_WS_USER_CHANNEL': 'true',
+            # The client-side limiter would otherwise be what is measured
+            'COINBASE_PUBLIC_RATE_LIMIT': '1000000',
+            'COINBASE_PRIVATE_RATE_LIMIT': '1000000',
+            'COINBASE_HISTORY_DB_URL': f"sqlite:///{os.path.join(directory, 'history.db')}",
+            'COINBASE_RECORD_DIR': '',
+            'AZURE_LOGIN_TENANT_ID': 'bench-tenant',
+            'AZURE_LOGIN_CLIENT_ID': 'bench-client',
+            'AZURE_LOGIN_CLIENT_SECRET': 'bench-secret',
+            'AZURE_LOGIN_REDIRECT_URI': f'http://127.0.0.1:{port}/auth/callback',
+            'AZURE_LOGIN_AUTHORITY_HOST': graph.url,
+            'AZURE_GRAPH_API_URL': graph.graph_api_url
+        }
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+             '--log-level', 'warning', '--no-access-log'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env=env,
+            stdout=subprocess.DEVNULL
+        )
+        try:
+            url = f'http://127.0.0.1:{port}'
+            await _wait_ready(url, process)
+            result = await drive(url, mix, concurrency, duration, warmup, seed)
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        exchange_stats = exchange.stats()
+    
+    return {
+        'config': {
+            'mix': mix,
+            'concurrency': concurrency,
+            'duration_seconds': duration,
+            'warmup_seconds': warmup,
+            'upstream_latency_seconds': upstream_latency,
+            'seed': seed
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        **result,
+        'exchange': exchange_stats
+    }
+
+
+def run(
+    mix: Dict[str, int],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    upstream_latency: float,
+    seed: int
+) -> dict:
+    return asyncio.run(run_async(mix, concurrency, duration, warmup, upstream_latency, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mix', help=f"weights, e.g. 'ticker=50,book=10' (endpoints: {', '.join(ENDPOINTS)})")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3.0, help='unmeasured seconds first')
+    parser.add_argument('--upstream-latency', type=float, default=0.0, help='seconds added by the exchange')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default='benchmarks/results/api_load.json', help='where to save results')
+    parser.add_argument('--baseline', help='earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed regression (0.2 = 20%%)')
+    args = parser.parse_args()
+    
+    result = run(
+        parse_mix(args.mix), args.concurrency, args.duration, args.warmup, args.upstream_latency, args.seed
+    )
+    
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        result['regressions'] = regressions
+    
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    
+    print(json.dumps(result, indent=2))
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
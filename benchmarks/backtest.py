@@ -0,0 +1,77 @@
+"""
+Backtest Benchmark
+Bars per second through the vectorized signal path, the event-driven broker
+path (same strategy, so the equity curves must agree) and a parameter sweep
+run in one process vs. across all cores.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from backtest import MovingAverageCross, SignalAdapter, run_events, run_vectorized, sweep
+from benchmarks.indicators import generate
+
+
+def run(products: int, bars: int, event_bars: int, grid_size: int, seed: int) -> dict:
+    data = generate(products, bars, seed)
+    strategy = MovingAverageCross(10, 30)
+    
+    start = time.perf_counter()
+    run_vectorized(strategy, data)
+    vectorized = time.perf_counter() - start
+    
+    # Event path on a slice: it is bar-by-bar Python
+    sample = data[:1, :event_bars]
+    start = time.perf_counter()
+    events = run_events(SignalAdapter(strategy), sample)
+    event_driven = time.perf_counter() - start
+    drift = float(np.max(np.abs(events.equity - run_vectorized(strategy, sample).equity)))
+    
+    grid = {
+        'fast': list(range(5, 5 + grid_size)),
+        'slow': list(range(30, 30 + 5 * grid_size, 5))
+    }
+    combinations = grid_size * grid_size
+    start = time.perf_counter()
+    sweep(MovingAverageCross, grid, data, processes=1)
+    serial = time.perf_counter() - start
+    
+    cores = os.cpu_count() or 1
+    start = time.perf_counter()
+    best = sweep(MovingAverageCross, grid, data, processes=cores)[0]
+    parallel = time.perf_counter() - start
+    
+    total = products * bars
+    return {
+        'products': products,
+        'bars_per_product': bars,
+        'vectorized_bars_per_second': round(total / vectorized),
+        'event_driven_bars_per_second': round(sample.shape[1] / event_driven),
+        'event_vs_vectorized_max_equity_difference': drift,
+        'sweep_combinations': combinations,
+        'sweep_serial_seconds': round(serial, 2),
+        'sweep_parallel_seconds': round(parallel, 2),
+        'sweep_processes': cores,
+        'sweep_bars_per_second': round(total * combinations / parallel),
+        'best_params': best['params']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--products', type=int, default=100)
+    parser.add_argument('--bars', type=int, default=10000, help='bars per product')
+    parser.add_argument('--event-bars', type=int, default=10000, help='bars for the event-driven run')
+    parser.add_argument('--grid', type=int, default=4, help='values per parameter')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.products, args.bars, args.event_bars, args.grid, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
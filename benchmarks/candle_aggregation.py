@@ -0,0 +1,104 @@
+"""
+Candle Aggregation Benchmark
+Feeds millions of synthetic trades across thousands of products through
+CandleAggregator and reports ticks per second, query latency and memory.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from candles import CandleAggregator
+
+
+def generate(products: int, ticks: int, seed: int) -> tuple:
+    """Random-walk trades, ~1000 per second of market time, in time order"""
+    rng = random.Random(seed)
+    product_ids = [f'P{i}-USD' for i in range(products)]
+    prices = [rng.uniform(1, 1000) for _ in range(products)]
+    
+    start_second = 1700000000
+    trades = []
+    for i in range(ticks):
+        p = rng.randrange(products)
+        prices[p] *= 1 + rng.gauss(0, 0.0005)
+        trades.append((product_ids[p], start_second + i // 1000, prices[p], rng.uniform(0.001, 2)))
+    return product_ids, trades
+
+
+def to_messages(trades: list, per_message: int) -> list:
+    """Group trades into decoded `market_trades` messages"""
+    messages = []
+    for i in range(0, len(trades), per_message):
+        messages.append({
+            'channel': 'market_trades',
+            'events': [{
+                'type': 'update',
+                'trades': [
+                    {
+                        'product_id': product_id,
+                        'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second)) + '.123456Z',
+                        'price': f'{price:.6f}',
+                        'size': f'{size:.8f}'
+                    }
+                    for product_id, second, price, size in trades[i:i + per_message]
+                ]
+            }]
+        })
+    return messages
+
+
+def run(products: int, ticks: int, capacity: int, per_message: int, seed: int) -> dict:
+    product_ids, trades = generate(products, ticks, seed)
+    
+    # Aggregation core: all four granularities per tick
+    aggregator = CandleAggregator(capacity=capacity)
+    add_trade = aggregator.add_trade
+    start = time.perf_counter()
+    for product_id, second, price, size in trades:
+        add_trade(product_id, second, price, size)
+    core = time.perf_counter() - start
+    
+    # Message handling: timestamp and number parsing included (JSON decode excluded)
+    messages = to_messages(trades, per_message)
+    aggregator = CandleAggregator(capacity=capacity)
+    start = time.perf_counter()
+    for message in messages:
+        aggregator.on_trades(message)
+    handler = time.perf_counter() - start
+    
+    queries = 10000
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(queries):
+        aggregator.candles(product_ids[rng.randrange(products)], '1s', 100)
+    query = (time.perf_counter() - start) / queries
+    
+    stats = aggregator.stats()
+    return {
+        'products': products,
+        'ticks': ticks,
+        'capacity': capacity,
+        'ticks_per_second_core': round(ticks / core),
+        'ticks_per_second_on_trades': round(ticks / handler),
+        'candles_query_100_us': round(query * 1e6, 2),
+        'late_ticks': stats['late_ticks'],
+        'ring_memory_mb': round(stats['memory_bytes'] / 2 ** 20, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--ticks', type=int, default=2000000)
+    parser.add_argument('--capacity', type=int, default=120, help='bars kept per granularity')
+    parser.add_argument('--per-message', type=int, default=50, help='trades per market_trades message')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.products, args.ticks, args.capacity, args.per_message, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
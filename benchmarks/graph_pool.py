@@ -0,0 +1,89 @@
+"""
+Graph Connection Pool Benchmark
+Per-request latency of AzureADClient Graph calls with a fresh session per
+call (previous behaviour) versus the shared pooled transport.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import aiohttp
+
+from azure_auth import AzureADClient
+from benchmarks.stand_ins import GraphStandIn
+
+
+def summarize(samples: list) -> dict:
+    """Latency summary in microseconds"""
+    samples = sorted(samples)
+    return {
+        'requests': len(samples),
+        'mean_us': round(statistics.fmean(samples) * 1e6, 1),
+        'p50_us': round(samples[len(samples) // 2] * 1e6, 1),
+        'p99_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 1)
+    }
+
+
+async def unpooled_get_user_info(graph_api_url: str, access_token: str) -> dict:
+    """Previous implementation: one ClientSession per call"""
+    headers = {'Authorization': f'Bearer {access_token}'}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f'{graph_api_url}/me', headers=headers) as resp:
+            return await resp.json()
+
+
+async def run(requests: int, concurrency: int) -> dict:
+    async with GraphStandIn() as graph:
+        client = AzureADClient(
+            tenant_id='bench-tenant',
+            client_id='bench-client',
+            client_secret='bench-secret',
+            redirect_uri='http://localhost:8000/auth/callback'
+        )
+        client.graph_api_url = graph.graph_api_url
+        client.token_endpoint = graph.token_endpoint('bench-tenant')
+        
+        async def measure(call) -> list:
+            samples = []
+            semaphore = asyncio.Semaphore(concurrency)
+            
+            async def one():
+                async with semaphore:
+                    start = time.perf_counter()
+                    await call()
+                    samples.append(time.perf_counter() - start)
+            
+            await asyncio.gather(*(one() for _ in range(requests)))
+            return samples
+        
+        before = await measure(lambda: unpooled_get_user_info(graph.graph_api_url, 'token'))
+        
+        await client.open()
+        try:
+            await client.get_user_info('token')  # warm the pool
+            after = await measure(lambda: client.get_user_info('token'))
+            pool = client.transport.stats()
+        finally:
+            await client.close()
+    
+    return {
+        'before_session_per_call': summarize(before),
+        'after_pooled_transport': summarize(after),
+        'pool': pool
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=1)
+    args = parser.parse_args()
+    
+    print(json.dumps(asyncio.run(run(args.requests, args.concurrency)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Indicator Engine Benchmark
+Cost of bringing every product's indicators up to date after a new bar:
+incremental O(1) updates vs. recomputing full history per product vs. one
+vectorized recompute across all products.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from indicators import IndicatorSet, compute_batch
+
+
+def generate(products: int, bars: int, seed: int) -> np.ndarray:
+    """(products, bars, 6) random-walk OHLCV bars, one minute apart"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, (products, bars)), axis=1))
+    open_ = np.concatenate((close[:, :1], close[:, :-1]), axis=1)
+    spread = np.abs(rng.normal(0, 0.001, (products, bars))) * close
+    out = np.empty((products, bars, 6))
+    out[:, :, 0] = 1700000000 + 60 * np.arange(bars)
+    out[:, :, 1] = open_
+    out[:, :, 2] = np.maximum(open_, close) + spread
+    out[:, :, 3] = np.minimum(open_, close) - spread
+    out[:, :, 4] = close
+    out[:, :, 5] = rng.uniform(0.1, 10, (products, bars))
+    return out
+
+
+def run(products: int, bars: int, seed: int) -> dict:
+    data = generate(products, bars, seed)
+    history, last = data[:, :-1], data[:, -1]
+    
+    # Warm incremental state with the history (not timed)
+    sets = [IndicatorSet() for _ in range(products)]
+    for indicators, rows in zip(sets, history.tolist()):
+        for bar in rows:
+            indicators.update(tuple(bar))
+    
+    # Incremental: one O(1) update per product
+    last_bars = [tuple(bar) for bar in last.tolist()]
+    start = time.perf_counter()
+    for indicators, bar in zip(sets, last_bars):
+        indicators.update(bar)
+        indicators.snapshot()
+    incremental = time.perf_counter() - start
+    
+    # Full recompute of each product's history, one product at a time
+    start = time.perf_counter()
+    for row in range(products):
+        compute_batch(data[row:row + 1])
+    per_product = time.perf_counter() - start
+    
+    # One vectorized recompute across all products
+    start = time.perf_counter()
+    computed = compute_batch(data)
+    vectorized = time.perf_counter() - start
+    
+    # Incremental and batch agree on the latest values
+    drift = max(
+        abs(indicators.ema.value - computed['ema'][row, -1])
+        + abs(indicators.rsi.value - computed['rsi'][row, -1])
+        + abs(indicators.vwap.value - computed['vwap'][row, -1])
+        for row, indicators in enumerate(sets)
+    )
+    
+    return {
+        'products': products,
+        'bars_of_history': bars,
+        'incremental_ms': round(incremental * 1000, 3),
+        'incremental_us_per_product': round(incremental / products * 1e6, 2),
+        'full_recompute_per_product_ms': round(per_product * 1000, 1),
+        'vectorized_recompute_all_ms': round(vectorized * 1000, 1),
+        'incremental_speedup_vs_per_product': round(per_product / incremental, 1),
+        'incremental_speedup_vs_vectorized': round(vectorized / incremental, 1),
+        'max_abs_difference': float(drift)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--bars', type=int, default=1000, help='bars of history per product')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.products, args.bars, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Metrics Overhead Benchmark
+Cost of recording on the hot path: one route observation, one upstream
+call context, and the ASGI middleware around a trivial FastAPI route
+(driven in-process, no sockets), plus the time to render /metrics.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+
+from metrics import Metrics, MetricsMiddleware
+
+
+def _app(metrics: Metrics = None) -> FastAPI:
+    app = FastAPI()
+    
+    @app.get('/items/{item_id}')
+    async def item(item_id: str):
+        return {'id': item_id}
+    
+    if metrics is not None:
+        app.add_middleware(MetricsMiddleware, metrics=metrics)
+    return app
+
+
+async def _drive(app: FastAPI, requests: int) -> float:
+    """Seconds per request through the ASGI app"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': '/items/abc', 'raw_path': b'/items/abc', 'root_path': '',
+        'query_string': b'', 'headers': [], 'client': ('127.0.0.1', 1), 'server': ('127.0.0.1', 80)
+    }
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    
+    async def send(message):
+        pass
+    
+    for _ in range(200):  # Warm up
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+async def _upstream(metrics: Metrics, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        async with metrics.upstream('coinbase', 'GET', '/api/v1/products/{id}/ticker') as call:
+            call.status = 200
+    return (time.perf_counter() - start) / calls
+
+
+def run(observations: int, requests: int, routes: int) -> dict:
+    metrics = Metrics()
+    start = time.perf_counter()
+    for i in range(observations):
+        metrics.observe_request('GET', '/trading/ticker/{product_id}', 200, (i % 1000) * 1e-5)
+    observe = (time.perf_counter() - start) / observations
+    
+    upstream = asyncio.run(_upstream(metrics, observations))
+    
+    bare = asyncio.run(_drive(_app(), requests))
+    measured = asyncio.run(_drive(_app(Metrics()), requests))
+    
+    # A realistically sized registry to render
+    for route in range(routes):
+        for status in (200, 400, 500):
+            metrics.observe_request('GET', f'/route/{route}', status, 0.01)
+        metrics.observe_upstream('coinbase', 'GET', f'/api/v1/endpoint/{route}', 200, 0.01)
+    start = time.perf_counter()
+    text = metrics.render()
+    render = time.perf_counter() - start
+    
+    return {
+        'observe_request_us': round(observe * 1e6, 3),
+        'upstream_call_context_us': round(upstream * 1e6, 3),
+        'asgi_request_without_metrics_us': round(bare * 1e6, 2),
+        'asgi_request_with_metrics_us': round(measured * 1e6, 2),
+        'middleware_overhead_us': round((measured - bare) * 1e6, 2),
+        'render_series': text.count('\n'),
+        'render_ms': round(render * 1e3, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--observations', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=20000, help='requests through the ASGI app')
+    parser.add_argument('--routes', type=int, default=50, help='routes in the rendered registry')
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.observations, args.requests, args.routes), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Order Book Replay Benchmark
+Records a synthetic level2 stream (snapshot + random-walk updates) to an
+NDJSON file, then replays it through OrderBookManager and reports updates
+per second, plus the raw BookSide update rate and depth-query latency.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from coinbase_client import json_loads
+from order_book import OrderBookManager
+
+
+def record(path: str, product_id: str, levels: int, updates: int, batch: int, seed: int):
+    """Write a snapshot message followed by update messages of `batch` levels"""
+    rng = random.Random(seed)
+    tick = 0.01
+    mid = 30000.0
+    
+    with open(path, 'w') as f:
+        snapshot = [
+            {'side': 'bid', 'price_level': f'{mid - tick * (i + 1):.2f}', 'new_quantity': f'{rng.uniform(0.01, 5):.8f}'}
+            for i in range(levels)
+        ] + [
+            {'side': 'offer', 'price_level': f'{mid + tick * (i + 1):.2f}', 'new_quantity': f'{rng.uniform(0.01, 5):.8f}'}
+            for i in range(levels)
+        ]
+        f.write(json.dumps({
+            'channel': 'l2_data',
+            'events': [{'type': 'snapshot', 'product_id': product_id, 'updates': snapshot}]
+        }) + '\n')
+        
+        written = 0
+        while written < updates:
+            mid += rng.choice((-tick, 0.0, tick))
+            batch_updates = []
+            for _ in range(min(batch, updates - written)):
+                side = rng.choice(('bid', 'offer'))
+                offset = int(rng.expovariate(0.05)) + 1
+                price = mid - offset * tick if side == 'bid' else mid + offset * tick
+                size = 0.0 if rng.random() < 0.3 else rng.uniform(0.01, 5)
+                batch_updates.append({
+                    'side': side,
+                    'price_level': f'{price:.2f}',
+                    'new_quantity': f'{size:.8f}'
+                })
+            written += len(batch_updates)
+            f.write(json.dumps({
+                'channel': 'l2_data',
+                'events': [{'type': 'update', 'product_id': product_id, 'updates': batch_updates}]
+            }) + '\n')
+
+
+def replay(path: str) -> dict:
+    """Replay recorded messages; report end-to-end and book-only rates"""
+    with open(path, 'rb') as f:
+        raw_messages = f.read().splitlines()
+    
+    # End to end: JSON decode + dispatch + book maintenance
+    manager = OrderBookManager()
+    start = time.perf_counter()
+    for raw in raw_messages:
+        manager.on_message(json_loads(raw))
+    with_decode = time.perf_counter() - start
+    
+    # Book maintenance only (messages decoded up front)
+    messages = [json_loads(raw) for raw in raw_messages]
+    manager = OrderBookManager()
+    start = time.perf_counter()
+    for message in messages:
+        manager.on_message(message)
+    book_only = time.perf_counter() - start
+    
+    updates = sum(len(event['updates']) for message in messages[1:] for event in message['events'])
+    book = next(iter(manager.books.values()))
+    
+    start = time.perf_counter()
+    queries = 10000
+    for _ in range(queries):
+        book.depth(10)
+    depth_query = (time.perf_counter() - start) / queries
+    
+    return {
+        'messages': len(messages),
+        'updates': updates,
+        'levels_after_replay': {'bids': len(book.bids), 'asks': len(book.asks)},
+        'updates_per_second_with_json_decode': round(updates / with_decode),
+        'updates_per_second_book_only': round(updates / book_only),
+        'depth_10_query_us': round(depth_query * 1e6, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--levels', type=int, default=5000, help='levels per side in the snapshot')
+    parser.add_argument('--updates', type=int, default=1000000)
+    parser.add_argument('--batch', type=int, default=20, help='level updates per message')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--file', help='keep the recording at this path')
+    args = parser.parse_args()
+    
+    path = args.file or os.path.join(tempfile.gettempdir(), 'l2_replay.ndjson')
+    record(path, 'BTC-USD', args.levels, args.updates, args.batch, args.seed)
+    try:
+        print(json.dumps(replay(path), indent=2))
+    finally:
+        if not args.file:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Response Parsing Microbenchmark
+Time and memory per object for parsing 10k orders and 1k products with
+plain dataclasses (previous models), slotted dataclasses and lazy models.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from dataclasses import fields, make_dataclass
+
+import coinbase_client
+from coinbase_client import CoinbaseClient, CoinbaseOrder, CoinbaseProduct, json_loads
+
+
+def order_payload(i: int) -> dict:
+    return {
+        'order_id': f'order-{i:08d}',
+        'product_id': 'BTC-USD',
+        'user_id': 'user-1',
+        'order_configuration': {'limit_limit_gtc': {'base_size': '0.01', 'limit_price': '30000.00'}},
+        'side': 'BUY' if i % 2 else 'SELL',
+        'type': 'LIMIT',
+        'time_in_force': 'GOOD_UNTIL_CANCELLED',
+        'post_only': False,
+        'creation_time': '2024-01-01T00:00:00Z',
+        'completion_time': None,
+        'order_type': 'LIMIT',
+        'filled_size': '0.005',
+        'average_filled_price': '30000.00',
+        'fee': '0.1',
+        'number_of_fills': 1,
+        'filled_value': '150.0',
+        'pending_cancel_reason': None,
+        'reject_reason': None,
+        'settled': False,
+        'status': 'OPEN'
+    }
+
+
+def product_payload(i: int) -> dict:
+    return {
+        'id': f'P{i}-USD',
+        'base_currency': f'P{i}',
+        'quote_currency': 'USD',
+        'base_display_symbol': f'P{i}',
+        'quote_display_symbol': 'USD',
+        'base_increment': '0.00000001',
+        'quote_increment': '0.01',
+        'display_name': f'P{i}/USD',
+        'status': 'online',
+        'price': '1.00',
+        'price_percentage_change_24h': '0.5',
+        'volume_24h': '1000',
+        'volume_percentage_change_24h': '1.0',
+        'base_max_size': '1000',
+        'base_min_size': '0.0001',
+        'quote_max_size': '1000000',
+        'quote_min_size': '1'
+    }
+
+
+# Models as they were before __slots__
+PlainOrder = make_dataclass('PlainOrder', [(f.name, f.type) for f in fields(CoinbaseOrder)])
+PlainProduct = make_dataclass('PlainProduct', [(f.name, f.type) for f in fields(CoinbaseProduct)])
+
+# Fields main.py reads from each object
+ORDER_FIELDS = ('order_id', 'product_id', 'side', 'status', 'filled_size', 'average_filled_price')
+PRODUCT_FIELDS = ('id', 'display_name', 'price', 'volume_24h', 'status')
+
+
+def best_of(repeat: int, fn) -> float:
+    """Best wall time of `repeat` runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(label: str, payloads: list, parse, accessed: tuple, repeat: int) -> dict:
+    """Parse every payload and read the fields main.py uses"""
+    def parse_and_read():
+        for obj in [parse(payload) for payload in payloads]:
+            for name in accessed:
+                getattr(obj, name)
+    
+    elapsed = best_of(repeat, parse_and_read)
+    
+    tracemalloc.start()
+    retained = [parse(payload) for payload in payloads]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del retained
+    
+    return {
+        'model': label,
+        'objects': len(payloads),
+        'ns_per_object': round(elapsed / len(payloads) * 1e9, 1),
+        'bytes_per_object': round(size / len(payloads), 1)
+    }
+
+
+def run(orders: int, products: int, repeat: int) -> dict:
+    eager = CoinbaseClient('key', 'secret', 'passphrase')
+    lazy = CoinbaseClient('key', 'secret', 'passphrase', lazy_models=True)
+    
+    order_payloads = [order_payload(i) for i in range(orders)]
+    product_payloads = [product_payload(i) for i in range(products)]
+    
+    def plain_order(data: dict):
+        return PlainOrder(*(data.get(name) for name in PlainOrder.__dataclass_fields__))
+    
+    def plain_product(data: dict):
+        return PlainProduct(*(data[name] for name in PlainProduct.__dataclass_fields__))
+    
+    results = {
+        'orders': [
+            measure('dataclass', order_payloads, plain_order, ORDER_FIELDS, repeat),
+            measure('slotted dataclass', order_payloads, eager._parse_order_data, ORDER_FIELDS, repeat),
+            measure('lazy', order_payloads, lazy._parse_order_data, ORDER_FIELDS, repeat)
+        ],
+        'products': [
+            measure('dataclass', product_payloads, plain_product, PRODUCT_FIELDS, repeat),
+            measure('slotted dataclass', product_payloads, eager._parse_product_data, PRODUCT_FIELDS, repeat),
+            measure('lazy', product_payloads, lazy._parse_product_data, PRODUCT_FIELDS, repeat)
+        ],
+        'note': 'bytes_per_object counts the model only; lazy models keep the decoded dict alive'
+    }
+    
+    # JSON decode of the batch response body
+    body = json.dumps({'orders': order_payloads}).encode()
+    decoder = 'orjson' if coinbase_client.ORJSON_AVAILABLE else 'json (orjson not installed)'
+    results['json_decode_ms'] = {
+        'bytes': len(body),
+        'json': round(best_of(repeat, lambda: json.loads(body)) * 1000, 3),
+        decoder: round(best_of(repeat, lambda: json_loads(body)) * 1000, 3)
+    }
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.orders, args.products, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Portfolio Benchmark
+Cost of rebuilding positions and P&L from a large fill history (vectorized
+replay vs. applying fills one at a time), of applying one new fill, and of a
+full snapshot at new marks.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from portfolio import FILL_DTYPE, Portfolio, ProductBook
+
+
+class _Store:
+    """Just enough of HistoryStore for Portfolio"""
+    
+    def add_fill_listener(self, listener):
+        pass
+
+
+def generate(products: int, fills: int, seed: int) -> list:
+    """(FILL_COLUMNS) rows in time order; sells never exceed the position"""
+    rng = np.random.default_rng(seed)
+    product = rng.integers(0, products, fills)
+    price = 100 * np.exp(rng.normal(0, 0.01, fills))
+    size = rng.uniform(0.01, 2, fills)
+    sell = rng.random(fills) < 0.45
+    
+    position = np.zeros(products)
+    rows = []
+    for i in range(fills):
+        p = product[i]
+        side = 'BUY'
+        quantity = float(size[i])
+        if sell[i] and position[p] > 0:
+            side = 'SELL'
+            quantity = min(quantity, float(position[p]))
+        position[p] += quantity if side == 'BUY' else -quantity
+        rows.append((f"P{p}-USD", side, float(price[i]), quantity, 'false', 0.001 * quantity, 1.7e9 + i))
+    return rows
+
+
+def run(products: int, fills: int, seed: int) -> dict:
+    rows = generate(products, fills, seed)
+    
+    # Vectorized rebuild: rows -> record array, then the array replay
+    portfolio = Portfolio(_Store())
+    start = time.perf_counter()
+    fills_array = np.array(rows, dtype=FILL_DTYPE)
+    converted = time.perf_counter()
+    portfolio.rebuild_from_array(fills_array)
+    vectorized = time.perf_counter() - start
+    replayed = time.perf_counter() - converted
+    
+    # Applying every fill one at a time
+    books = {}
+    start = time.perf_counter()
+    for product_id, side, price, size, _, commission, trade_ts in rows:
+        book = books.get(product_id)
+        if book is None:
+            book = books[product_id] = ProductBook(product_id)
+        book.apply(side, price, size, commission, trade_ts)
+    per_fill = time.perf_counter() - start
+    
+    drift = max(
+        abs(book.realized_fifo - portfolio.books[pid].realized_fifo)
+        + abs(book.realized_average - portfolio.books[pid].realized_average)
+        + abs(book.average_cost - portfolio.books[pid].average_cost)
+        for pid, book in books.items()
+    )
+    
+    # One new fill, then a snapshot at fresh marks
+    for product_id in portfolio.books:
+        portfolio.mark(product_id, 101.0)
+    fill = {
+        'product_id': 'P0-USD', 'side': 'BUY', 'price': 100.0, 'size': 0.5,
+        'size_in_quote': 'false', 'commission': 0.0, 'trade_ts': 1.7e9 + fills
+    }
+    start = time.perf_counter()
+    portfolio.apply_fills([fill])
+    incremental = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    snapshot = portfolio.snapshot('fifo')
+    snapshot_seconds = time.perf_counter() - start
+    
+    return {
+        'products': products,
+        'fills': fills,
+        'vectorized_rebuild_ms': round(vectorized * 1000, 1),
+        'of_which_row_conversion_ms': round((vectorized - replayed) * 1000, 1),
+        'of_which_array_replay_ms': round(replayed * 1000, 1),
+        'per_fill_rebuild_ms': round(per_fill * 1000, 1),
+        'rebuild_speedup': round(per_fill / vectorized, 1),
+        'replay_speedup': round(per_fill / replayed, 1),
+        'incremental_fill_us': round(incremental * 1e6, 2),
+        'snapshot_ms': round(snapshot_seconds * 1000, 3),
+        'open_positions': len(portfolio.held()),
+        'realized_pnl': round(snapshot['totals']['realized_pnl'], 2),
+        'max_abs_difference': float(drift)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--fills', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.products, args.fills, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Simulated Exchange Benchmark
+Orders per second through the matching engine alone (limit/market/cancel
+mix around the touch) and end to end through CoinbaseClient over HTTP.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from coinbase_client import CoinbaseClient, OrderRequest, OrderSide, OrderType
+from rate_limiter import PriorityRequestScheduler, TokenBucket
+from simulated_exchange import MatchingEngine, SimulatedExchange
+
+
+def generate(orders: int, seed: int) -> list:
+    """(action, side, configuration): 70% limits within 20 ticks of 50000, 20% markets, 10% cancels"""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(orders):
+        roll = rng.random()
+        side = rng.choice(('BUY', 'SELL'))
+        if roll < 0.7:
+            price = f"{50000 + rng.randint(-20, 20) / 100:.2f}"
+            size = f"{rng.randint(1, 100) / 1000:.3f}"
+            out.append(('limit', side, {'limit_limit_gtc': {'base_size': size, 'limit_price': price}}))
+        elif roll < 0.9:
+            out.append(('market', side, {'market_market_ioc': {'quote_size': str(rng.randint(10, 5000))}}))
+        else:
+            out.append(('cancel', side, None))
+    return out
+
+
+def run_engine(flow: list, seed: int) -> dict:
+    engine = MatchingEngine(products=None, liquidity_levels=20, liquidity_size='1')
+    rng = random.Random(seed)
+    resting = []
+    start = time.perf_counter()
+    for action, side, configuration in flow:
+        if action == 'cancel':
+            if resting:
+                engine.cancel(resting.pop(rng.randrange(len(resting))))
+            continue
+        order = engine.submit('BTC-USD', side, configuration)
+        if order.status == 'OPEN':
+            resting.append(order.order_id)
+    elapsed = time.perf_counter() - start
+    return {
+        'orders': len(flow),
+        'orders_per_second': round(len(flow) / elapsed),
+        'us_per_order': round(elapsed / len(flow) * 1e6, 2),
+        **engine.stats()
+    }
+
+
+async def run_http(flow: list, concurrency: int) -> dict:
+    requests = [
+        OrderRequest(
+            product_id='BTC-USD',
+            side=OrderSide(side),
+            order_type=OrderType.LIMIT if action == 'limit' else OrderType.MARKET,
+            base_size=configuration.get('limit_limit_gtc', {}).get('base_size'),
+            limit_price=configuration.get('limit_limit_gtc', {}).get('limit_price'),
+            quote_size=configuration.get('market_market_ioc', {}).get('quote_size')
+        )
+        for action, side, configuration in flow if action != 'cancel'
+    ]
+    async with SimulatedExchange() as exchange:
+        client = CoinbaseClient(
+            'key', 'secret', 'passphrase',
+            base_url=exchange.url,
+            scheduler=PriorityRequestScheduler({
+                'public': TokenBucket(1e9),
+                'private': TokenBucket(1e9)
+            })
+        )
+        await client.open()
+        try:
+            await client.get_rules('BTC-USD')
+            start = time.perf_counter()
+            results = await client.place_orders(requests, concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+        finally:
+            await client.close()
+        stats = exchange.stats()
+    
+    return {
+        'orders': len(requests),
+        'concurrency': concurrency,
+        'orders_per_second': round(len(requests) / elapsed),
+        'failed': sum(1 for result in results if not result['success']),
+        'matches': stats['matches']
+    }
+
+
+def run(orders: int, http_orders: int, concurrency: int, seed: int) -> dict:
+    return {
+        'engine': run_engine(generate(orders, seed), seed),
+        'http_client': asyncio.run(run_http(generate(http_orders, seed), concurrency))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=200000, help='orders through the engine')
+    parser.add_argument('--http-orders', type=int, default=5000, help='orders through the HTTP client')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.orders, args.http_orders, args.concurrency, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
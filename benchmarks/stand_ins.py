@@ -0,0 +1,156 @@
+"""
+Local Stand-in Servers
+Minimal aiohttp servers that mimic upstream APIs for benchmarks.
+"""
+
+from aiohttp import web
+
+
+class LocalServer:
+    """aiohttp application bound to a local port"""
+    
+    def __init__(self, app: web.Application, host: str = '127.0.0.1', port: int = 0):
+        self.app = app
+        self.host = host
+        self.port = port
+        self._runner = None
+    
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+    
+    async def start(self):
+        """Start serving (port 0 picks a free port)"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        """Stop serving"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    async def __aenter__(self):
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+
+class GraphStandIn(LocalServer):
+    """Stand-in for Microsoft Graph and the Azure AD token endpoint"""
+    
+    USER = {
+        'id': '00000000-0000-0000-0000-000000000000',
+        'displayName': 'Bench User',
+        'mail': 'bench.user@example.com',
+        'userPrincipalName': 'bench.user@example.com'
+    }
+    
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        app = web.Application()
+        app.router.add_get('/v1.0/me', self._me)
+        app.router.add_get('/v1.0/me/calendarview', self._calendar)
+        app.router.add_get('/v1.0/me/messages', self._messages)
+        app.router.add_post('/{tenant}/oauth2/v2.0/token', self._token)
+        super().__init__(app, host, port)
+    
+    @property
+    def graph_api_url(self) -> str:
+        return f'{self.url}/v1.0'
+    
+    def token_endpoint(self, tenant_id: str) -> str:
+        return f'{self.url}/{tenant_id}/oauth2/v2.0/token'
+    
+    async def _me(self, request: web.Request) -> web.Response:
+        return web.json_response(self.USER)
+    
+    async def _calendar(self, request: web.Request) -> web.Response:
+        return web.json_response({'value': [{'subject': f'Event {i}'} for i in range(5)]})
+    
+    async def _messages(self, request: web.Request) -> web.Response:
+        top = int(request.query.get('$top', '10'))
+        return web.json_response({'value': [{'subject': f'Message {i}'} for i in range(top)]})
+    
+    async def _token(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'access_token': 'bench-access-token',
+            'refresh_token': 'bench-refresh-token',
+            'expires_in': 3600,
+            'token_type': 'Bearer'
+        })
+
+
+class TickerFeedStandIn(LocalServer):
+    """Stand-in for the Advanced Trade WebSocket ticker channel"""
+    
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        app = web.Application()
+        app.router.add_get('/', self._ws)
+        super().__init__(app, host, port)
+        self.prices = {}
+        self._clients = set()
+        self._sequence = 0
+    
+    @property
+    def ws_url(self) -> str:
+        return f'ws://{self.host}:{self.port}/'
+    
+    def _message(self, event_type: str, product_ids) -> dict:
+        message = {
+            'channel': 'ticker',
+            'timestamp': '2024-01-01T00:00:00Z',
+            'sequence_num': self._sequence,
+            'events': [{
+                'type': event_type,
+                'tickers': [
+                    {
+                        'type': 'ticker',
+                        'product_id': product_id,
+                        'price': self.prices[product_id],
+                        'best_bid': self.prices[product_id],
+                        'best_ask': self.prices[product_id],
+                        'volume_24_h': '0'
+                    }
+                    for product_id in product_ids
+                ]
+            }]
+        }
+        self._sequence += 1
+        return message
+    
+    async def _ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._clients.add(ws)
+        try:
+            async for msg in ws:
+                subscription = msg.json()
+                if subscription.get('channel') != 'ticker':
+                    continue
+                for product_id in subscription.get('product_ids', []):
+                    self.prices.setdefault(product_id, '0')
+                await ws.send_json(self._message('snapshot', subscription.get('product_ids', [])))
+        finally:
+            self._clients.discard(ws)
+        return ws
+    
+    async def publish(self, product_id: str, price: str):
+        """Push a ticker update to every connected client"""
+        self.prices[product_id] = price
+        message = self._message('update', [product_id])
+        for ws in list(self._clients):
+            await ws.send_json(message)
+    
+    def skip_sequence(self, count: int = 1):
+        """Inject a sequence gap into the next published message"""
+        self._sequence += count
+    
+    async def drop_connections(self):
+        """Close every client connection"""
+        for ws in list(self._clients):
+            await ws.close()
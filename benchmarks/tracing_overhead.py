@@ -0,0 +1,109 @@
+"""
+Tracing Overhead Benchmark
+Cost of a child span on the hot path (sampled and outside a trace) and of
+the ASGI middleware around a trivial FastAPI route (driven in-process, no
+sockets) at a few sampling rates, exporting to an in-memory sink.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+
+from tracing import MemoryExporter, Tracer, TracingMiddleware
+
+
+def _app(tracer: Tracer = None, child_spans: int = 0) -> FastAPI:
+    app = FastAPI()
+    
+    @app.get('/items/{item_id}')
+    async def item(item_id: str):
+        for _ in range(child_spans):
+            with tracer.span('child', item=item_id):
+                pass
+        return {'id': item_id}
+    
+    if tracer is not None:
+        app.add_middleware(TracingMiddleware, tracer=tracer)
+    return app
+
+
+async def _drive(app: FastAPI, requests: int) -> float:
+    """Seconds per request through the ASGI app"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': '/items/abc', 'raw_path': b'/items/abc', 'root_path': '',
+        'query_string': b'', 'headers': [], 'client': ('127.0.0.1', 1), 'server': ('127.0.0.1', 80)
+    }
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    
+    async def send(message):
+        pass
+    
+    for _ in range(200):  # Warm up
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def _spans(tracer: Tracer, count: int, sampled: bool) -> float:
+    root = tracer.trace('root') if sampled else None
+    start = time.perf_counter()
+    if root is not None:
+        with root:
+            for _ in range(count):
+                with tracer.span('child', key='value'):
+                    pass
+    else:
+        for _ in range(count):
+            with tracer.span('child', key='value'):
+                pass
+    return (time.perf_counter() - start) / count
+
+
+def run(spans: int, requests: int, child_spans: int) -> dict:
+    tracer = Tracer(MemoryExporter(), batch_size=4096)
+    sampled = _spans(tracer, spans, True)
+    outside = _spans(tracer, spans, False)
+    tracer.shutdown()
+    
+    bare = asyncio.run(_drive(_app(), requests))
+    middleware = {}
+    for rate in (0.0, 0.1, 1.0):
+        tracer = Tracer(MemoryExporter(), sample_rate=rate)
+        measured = asyncio.run(_drive(_app(tracer, child_spans), requests))
+        tracer.shutdown()
+        middleware[str(rate)] = {
+            'asgi_request_us': round(measured * 1e6, 2),
+            'overhead_us': round((measured - bare) * 1e6, 2),
+            'spans_exported': tracer.spans_exported,
+            'spans_dropped': tracer.spans_dropped
+        }
+    
+    return {
+        'child_span_sampled_us': round(sampled * 1e6, 3),
+        'child_span_outside_trace_us': round(outside * 1e6, 3),
+        'asgi_request_without_tracing_us': round(bare * 1e6, 2),
+        'child_spans_per_request': child_spans,
+        'by_sample_rate': middleware
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--spans', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=20000, help='requests through the ASGI app')
+    parser.add_argument('--child-spans', type=int, default=4, help='spans opened by the route handler')
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.spans, args.requests, args.child_spans), indent=2))
+
+
+if __name__ == '__main__':
+    main()
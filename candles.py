@@ -0,0 +1,189 @@
+"""
+Candle Aggregation
+Streaming OHLCV bars per product and granularity, built from the trade and
+ticker channels into preallocated NumPy ring buffers.
+"""
+
+import calendar
+import time
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Any
+
+import numpy as np
+
+
+# Granularity name -> bar length in seconds
+GRANULARITIES = {
+    '1s': 1,
+    '1m': 60,
+    '5m': 300,
+    '1h': 3600
+}
+
+# Ring buffer columns
+START, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+
+class CandleSeries:
+    """
+    Bars of one granularity in a fixed-size ring buffer
+    The forming bar is kept in plain attributes and written into the ring
+    once per bar (when it closes or is read), never once per tick.
+    """
+    __slots__ = (
+        'period', 'capacity', 'bars', 'head', 'count',
+        'start', 'open', 'high', 'low', 'close', 'volume', 'late', 'on_close'
+    )
+    
+    def __init__(self, period: int, capacity: int, on_close: Optional[Callable[[tuple], None]] = None):
+        self.period = period
+        self.capacity = capacity
+        self.on_close = on_close
+        self.bars = np.zeros((capacity, 6), dtype=np.float64)
+        self.head = -1  # Ring slot of the forming bar
+        self.count = 0
+        self.start = -1
+        self.open = self.high = self.low = self.close = self.volume = 0.0
+        self.late = 0
+    
+    def update(self, second: int, price: float, size: float):
+        """Add a trade at epoch `second`"""
+        start = second - second % self.period
+        if start == self.start:
+            if price > self.high:
+                self.high = price
+            elif price < self.low:
+                self.low = price
+            self.close = price
+            self.volume += size
+        elif start > self.start:
+            if self.head >= 0:
+                bar = self._commit()
+                if self.on_close is not None:
+                    self.on_close(bar)
+            self.head = (self.head + 1) % self.capacity
+            if self.count < self.capacity:
+                self.count += 1
+            self.start = start
+            self.open = self.high = self.low = self.close = price
+            self.volume = size
+        else:
+            # Older than the forming bar; bars already written stay final
+            self.late += 1
+    
+    def _commit(self) -> tuple:
+        bar = (self.start, self.open, self.high, self.low, self.close, self.volume)
+        self.bars[self.head] = bar
+        return bar
+    
+    def latest(self, limit: int) -> np.ndarray:
+        """Up to `limit` most recent bars, oldest first (a copy)"""
+        if self.head < 0:
+            return np.empty((0, 6), dtype=np.float64)
+        self._commit()
+        n = min(limit, self.count)
+        first = self.head - n + 1
+        if first >= 0:
+            return self.bars[first:self.head + 1].copy()
+        return np.concatenate((self.bars[first:], self.bars[:self.head + 1]))
+
+
+class CandleAggregator:
+    """OHLCV bars for every product seen on the feed"""
+    
+    TRADES_CHANNEL = 'market_trades'
+    TICKER_CHANNEL = 'ticker'
+    
+    def __init__(
+        self,
+        granularities: Iterable[str] = tuple(GRANULARITIES),
+        capacity: int = 360
+    ):
+        self.periods = [(name, GRANULARITIES[name]) for name in granularities]
+        self.capacity = capacity
+        self.series: Dict[str, Dict[str, CandleSeries]] = {}
+        self._series_lists: Dict[str, List[CandleSeries]] = {}
+        self._bar_listeners: List[Callable[[str, str, tuple], None]] = []
+        
+        # One-entry cache: consecutive messages share the same second
+        self._time_prefix = ''
+        self._time_second = 0
+        
+        # Counters
+        self.ticks = 0
+    
+    def _series_for(self, product_id: str) -> List[CandleSeries]:
+        series = self._series_lists.get(product_id)
+        if series is None:
+            by_name = {
+                name: CandleSeries(period, self.capacity, partial(self._bar_closed, product_id, name))
+                for name, period in self.periods
+            }
+            self.series[product_id] = by_name
+            series = self._series_lists[product_id] = list(by_name.values())
+        return series
+    
+    def add_bar_listener(self, listener: Callable[[str, str, tuple], None]):
+        """Call `listener(product_id, granularity, bar)` each time a bar closes"""
+        self._bar_listeners.append(listener)
+    
+    def _bar_closed(self, product_id: str, granularity: str, bar: tuple):
+        for listener in self._bar_listeners:
+            listener(product_id, granularity, bar)
+    
+    def _second(self, timestamp: str) -> int:
+        """Epoch second of an RFC 3339 timestamp ('2024-01-01T00:00:00.123Z')"""
+        prefix = timestamp[:19]
+        if prefix != self._time_prefix:
+            self._time_second = calendar.timegm(time.strptime(prefix, '%Y-%m-%dT%H:%M:%S'))
+            self._time_prefix = prefix
+        return self._time_second
+    
+    def add_trade(self, product_id: str, second: int, price: float, size: float):
+        """Feed one trade into every granularity for the product"""
+        for series in self._series_for(product_id):
+            series.update(second, price, size)
+        self.ticks += 1
+    
+    def on_trades(self, message: dict):
+        """Handle one `market_trades` message from the market-data feed"""
+        for event in message.get('events', []):
+            for trade in event.get('trades', []):
+                self.add_trade(
+                    trade['product_id'],
+                    self._second(trade['time']),
+                    float(trade['price']),
+                    float(trade['size'])
+                )
+    
+    def on_ticker(self, message: dict):
+        """Handle one `ticker` message (price only, so bars carry no volume)"""
+        timestamp = message.get('timestamp')
+        second = self._second(timestamp) if timestamp else int(time.time())
+        for event in message.get('events', []):
+            for ticker in event.get('tickers', []):
+                self.add_trade(ticker['product_id'], second, float(ticker['price']), 0.0)
+    
+    def candles(self, product_id: str, granularity: str, limit: int = 100) -> Optional[np.ndarray]:
+        """
+        Most recent bars as an (n, 6) array of start, open, high, low, close, volume
+        Returns None if the product or granularity is not tracked.
+        """
+        series = self.series.get(product_id, {}).get(granularity)
+        if series is None:
+            return None
+        return series.latest(limit)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'products': len(self.series),
+            'granularities': [name for name, _ in self.periods],
+            'capacity': self.capacity,
+            'ticks': self.ticks,
+            'late_ticks': sum(
+                series.late for by_name in self.series.values() for series in by_name.values()
+            ),
+            'memory_bytes': sum(
+                series.bars.nbytes for by_name in self.series.values() for series in by_name.values()
+            )
+        }
@@ -3,15 +3,57 @@ Coinbase Advanced Trade API Client
 Handles cryptocurrency trading operations and account management.
 """
 
+import asyncio
 import json
 import hashlib
 import hmac
 import time
-from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
+import uuid
+from dataclasses import dataclass, fields
+from typing import Optional, List, Dict, Any, AsyncIterator, Awaitable, Callable
 from enum import Enum
-import aiohttp
 import base64
+from urllib.parse import parse_qsl, urlencode
+
+import aiohttp
+
+from http_transport import HTTPTransport
+from rate_limiter import PriorityRequestScheduler, TokenBucket, Priority, RequestShedError
+from single_flight import SingleFlight
+from product_catalog import ProductCatalog
+from product_rules import ProductRulesIndex, ProductRules, OrderValidationError
+from resilience import RetryPolicy, LatencyTracker, CircuitBreaker
+from metrics import Metrics, NULL_CALL
+from tracing import Tracer, NULL_SPAN, current_span
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def json_loads(data):
+    """Decode JSON (orjson when installed)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(data) -> str:
+    """Encode JSON (orjson when installed)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data).decode()
+    return json.dumps(data)
+
+
+class APIError(Exception):
+    """Error response from the Coinbase API"""
+    
+    def __init__(self, status: int, data: Any):
+        super().__init__(f"API Error {status}: {data}")
+        self.status = status
+        self.data = data
 
 
 class OrderType(str, Enum):
@@ -27,7 +69,7 @@ class OrderSide(str, Enum):
     SELL = 'SELL'
 
 
-@dataclass
+@dataclass(slots=True)
 class CoinbaseAccount:
     """Coinbase account information"""
     uuid: str
@@ -40,7 +82,7 @@ class CoinbaseAccount:
     updated_at: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CoinbaseProduct:
     """Coinbase product (trading pair) information"""
     id: str
@@ -62,7 +104,7 @@ class CoinbaseProduct:
     quote_min_size: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CoinbaseTicker:
     """Current ticker data"""
     product_id: str
@@ -74,7 +116,7 @@ class CoinbaseTicker:
     volume: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CoinbaseOrder:
     """Coinbase order details"""
     order_id: str
@@ -97,6 +139,86 @@ class CoinbaseOrder:
     reject_reason: Optional[str]
     settled: bool
     status: str
+    client_order_id: str = ''
+
+
+@dataclass
+class OrderRequest:
+    """Order to place (used for batch placement)"""
+    product_id: str
+    side: OrderSide
+    order_type: OrderType
+    base_size: Optional[str] = None
+    quote_size: Optional[str] = None
+    limit_price: Optional[str] = None
+    stop_price: Optional[str] = None
+
+
+_REQUIRED = object()
+
+
+class LazyModel:
+    """
+    Slotted view over a raw API dict
+    Each field is a property that reads the dict on access, so parsing is a
+    single allocation and callers only pay for the fields they touch.
+    """
+    __slots__ = ('_data',)
+    
+    model: type = None
+    field_names: tuple = ()
+    
+    def __init__(self, data: dict):
+        self._data = data
+    
+    def materialize(self):
+        """Build the full eager model"""
+        return self.model(**{name: getattr(self, name) for name in self.field_names})
+    
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._data!r})'
+
+
+def _field_property(name: str, default: Any) -> property:
+    if default is _REQUIRED:
+        return property(lambda self: self._data[name])
+    return property(lambda self: self._data.get(name, default))
+
+
+def _lazy_model(model: type, defaults: Dict[str, Any]) -> type:
+    """Create a LazyModel subclass exposing every field of `model`"""
+    names = tuple(field.name for field in fields(model))
+    namespace = {'__slots__': (), 'model': model, 'field_names': names}
+    for name in names:
+        namespace[name] = _field_property(name, defaults.get(name, _REQUIRED))
+    return type(f'Lazy{model.__name__[len("Coinbase"):]}', (LazyModel,), namespace)
+
+
+LazyAccount = _lazy_model(CoinbaseAccount, {})
+LazyProduct = _lazy_model(CoinbaseProduct, {})
+LazyOrder = _lazy_model(CoinbaseOrder, {
+    'order_id': '',
+    'product_id': '',
+    'user_id': '',
+    'order_configuration': {},
+    'side': '',
+    'type': '',
+    'time_in_force': '',
+    'post_only': False,
+    'creation_time': '',
+    'completion_time': None,
+    'order_type': '',
+    'filled_size': '0',
+    'average_filled_price': '0',
+    'fee': '0',
+    'number_of_fills': 0,
+    'filled_value': '0',
+    'pending_cancel_reason': None,
+    'reject_reason': None,
+    'settled': False,
+    'status': '',
+    'client_order_id': ''
+})
 
 
 class CoinbaseClient:
@@ -105,6 +227,16 @@ class CoinbaseClient:
     BASE_URL_PRODUCTION = 'https://api.coinbase.com'
     BASE_URL_SANDBOX = 'https://api-sandbox.coinbase.com'
     
+    # Maximum order ids per batch_cancel request
+    BATCH_CANCEL_MAX = 100
+    
+    # Advanced Trade rate limits (requests per second)
+    PUBLIC_RATE_LIMIT = 10
+    PRIVATE_RATE_LIMIT = 30
+    
+    # Responses worth retrying (idempotent calls only)
+    RETRYABLE_STATUSES = frozenset((429, 500, 502, 503, 504))
+    
     def __init__(
         self,
         api_key: str,
@@ -113,7 +245,22 @@ class CoinbaseClient:
         sandbox_mode: bool = False,
         sandbox_api_key: Optional[str] = None,
         sandbox_api_secret: Optional[str] = None,
-        sandbox_api_passphrase: Optional[str] = None
+        sandbox_api_passphrase: Optional[str] = None,
+        transport: Optional[HTTPTransport] = None,
+        scheduler: Optional[PriorityRequestScheduler] = None,
+        read_deadline: Optional[float] = 2.0,
+        product_cache_ttl: float = 300.0,
+        ticker_batch_concurrency: int = 10,
+        lazy_models: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge_percentile: Optional[float] = 0.95,
+        breaker_threshold: int = 5,
+        breaker_reset_timeout: float = 10.0,
+        validate_orders: bool = True,
+        snap_orders: bool = False,
+        base_url: Optional[str] = None,
+        metrics: Optional[Metrics] = None,
+        tracer: Optional[Tracer] = None
     ):
         self.api_key = api_key
         self.api_secret = api_secret
@@ -122,6 +269,55 @@ class CoinbaseClient:
         self.sandbox_api_key = sandbox_api_key
         self.sandbox_api_secret = sandbox_api_secret
         self.sandbox_api_passphrase = sandbox_api_passphrase
+        self.base_url = base_url.rstrip('/') if base_url else None  # e.g. a SimulatedExchange
+        self.transport = transport or HTTPTransport()
+        self.scheduler = scheduler or PriorityRequestScheduler({
+            'public': TokenBucket(self.PUBLIC_RATE_LIMIT),
+            'private': TokenBucket(self.PRIVATE_RATE_LIMIT)
+        })
+        self.read_deadline = read_deadline
+        self.single_flight = SingleFlight()
+        self.catalog = ProductCatalog(
+            self.fetch_products,
+            self.fetch_product,
+            ttl=product_cache_ttl
+        )
+        self.rules = ProductRulesIndex()
+        self.catalog.add_listener(self.rules.rebuild)
+        self.validate_orders = validate_orders
+        self.snap_orders = snap_orders
+        self.ticker_batch_concurrency = ticker_batch_concurrency
+        self.lazy_models = lazy_models
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedge_percentile = hedge_percentile
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset_timeout = breaker_reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+        self.metrics = metrics
+        self.tracer = tracer
+        
+        # Counters
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+    
+    async def open(self):
+        """Open the pooled HTTP transport"""
+        await self.transport.open()
+    
+    async def close(self):
+        """Stop background work and close the pooled HTTP transport"""
+        await self.catalog.stop()
+        await self.transport.close()
+    
+    async def __aenter__(self):
+        await self.open()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
     
     def get_active_credentials(self) -> tuple:
         """Get currently active credentials based on mode"""
@@ -130,7 +326,9 @@ class CoinbaseClient:
         return (self.api_key, self.api_secret, self.api_passphrase)
     
     def get_base_url(self) -> str:
-        """Get API base URL based on mode"""
+        """Get API base URL based on mode (or the explicit base_url override)"""
+        if self.base_url:
+            return self.base_url
         return self.BASE_URL_SANDBOX if self.sandbox_mode else self.BASE_URL_PRODUCTION
     
     def _generate_signature(
@@ -161,6 +359,19 @@ class CoinbaseClient:
         
         return signature_b64, api_key, api_passphrase
     
+    def sign_ws_subscription(self, message: dict) -> dict:
+        """Add authentication fields to a WebSocket subscribe message"""
+        api_key, api_secret, _ = self.get_active_credentials()
+        timestamp = str(int(time.time()))
+        payload = timestamp + message['channel'] + ','.join(message.get('product_ids', []))
+        
+        return {
+            **message,
+            'api_key': api_key,
+            'timestamp': timestamp,
+            'signature': hmac.new(api_secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+        }
+    
     def _get_headers(self, method: str, path: str, body: str = '') -> dict:
         """Generate request headers with authentication"""
         timestamp = str(time.time())
@@ -174,116 +385,359 @@ class CoinbaseClient:
             'Content-Type': 'application/json'
         }
     
+    @staticmethod
+    def _classify(method: str, endpoint: str) -> tuple:
+        """
+        Map a request to its rate budget and priority
+        Returns: (budget, priority)
+        """
+        budget = 'public' if endpoint.startswith('/api/v1/products') else 'private'
+        
+        path = endpoint.split('?', 1)[0]
+        if path.endswith('/cancel') or path.endswith('/batch_cancel'):
+            priority = Priority.CANCEL
+        elif method != 'GET':
+            priority = Priority.PLACE
+        else:
+            priority = Priority.READ
+        
+        return budget, priority
+    
+    @staticmethod
+    def _endpoint_key(method: str, endpoint: str) -> str:
+        """Group requests by route (ids in the path collapse to {id})"""
+        path = endpoint.split('?', 1)[0]
+        segments = [
+            '{id}' if '-' in segment or segment.isdigit() else segment
+            for segment in path.split('/')
+        ]
+        return f"{method} {'/'.join(segments)}"
+    
+    @staticmethod
+    def _is_idempotent(method: str, endpoint: str, data: Optional[dict]) -> bool:
+        """GETs, cancels and orders carrying a client_order_id are safe to repeat"""
+        if method == 'GET':
+            return True
+        path = endpoint.split('?', 1)[0]
+        if path.endswith('/cancel') or path.endswith('/batch_cancel'):
+            return True
+        return bool(data and data.get('client_order_id'))
+    
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, APIError):
+            return error.status in self.RETRYABLE_STATUSES
+        return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+    
+    def _breaker(self, key: str) -> CircuitBreaker:
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers[key] = CircuitBreaker(
+                key,
+                failure_threshold=self.breaker_threshold,
+                reset_timeout=self.breaker_reset_timeout
+            )
+        return breaker
+    
+    def _latency(self, key: str) -> LatencyTracker:
+        tracker = self.latencies.get(key)
+        if tracker is None:
+            tracker = self.latencies[key] = LatencyTracker()
+        return tracker
+    
     async def _request(
         self,
         method: str,
         endpoint: str,
-        data: Optional[dict] = None
+        data: Optional[dict] = None,
+        priority: Optional[Priority] = None
+    ) -> dict:
+        """Make authenticated API request (identical concurrent GETs are coalesced)"""
+        if method == 'GET' and data is None:
+            path, _, query = endpoint.partition('?')
+            key = (method, path, tuple(sorted(parse_qsl(query))))
+            return await self.single_flight.do(
+                key,
+                lambda: self._call(method, endpoint, data, priority)
+            )
+        return await self._call(method, endpoint, data, priority)
+    
+    def _span(self, name: str, **attributes):
+        """Child span of the current trace (a no-op without a tracer)"""
+        if self.tracer is None:
+            return NULL_SPAN
+        return self.tracer.span(name, **attributes)
+    
+    async def _call(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[dict] = None,
+        priority: Optional[Priority] = None
     ) -> dict:
-        """Make authenticated API request"""
+        """Send through the endpoint's circuit breaker, retrying idempotent calls"""
+        key = self._endpoint_key(method, endpoint)
+        breaker = self._breaker(key)
+        idempotent = self._is_idempotent(method, endpoint, data)
+        
+        attempt = 0
+        with self._span('coinbase.request', endpoint=key) as span:
+            while True:
+                probe = breaker.before_call()
+                try:
+                    if method == 'GET' and self.hedge_percentile:
+                        result = await self._hedged_send(key, method, endpoint, data, priority)
+                    else:
+                        result = await self._timed_send(key, method, endpoint, data, priority)
+                except (RequestShedError, OrderValidationError):
+                    # Refused before reaching the exchange: no verdict on it
+                    if probe:
+                        breaker.release_probe()
+                    raise
+                except Exception as e:
+                    retryable = self._is_retryable(e)
+                    if retryable and not (isinstance(e, APIError) and e.status == 429):
+                        breaker.record_failure()
+                    else:
+                        # The exchange answered; it is not degraded
+                        breaker.record_success()
+                    
+                    if not (retryable and idempotent) or attempt + 1 >= self.retry_policy.max_attempts:
+                        raise
+                    
+                    self.retries += 1
+                    await asyncio.sleep(self.retry_policy.delay(attempt))
+                    attempt += 1
+                    span.set('retries', attempt)
+                    continue
+                except BaseException:
+                    # Cancelled (client gone, timeout, shutdown): no verdict either
+                    if probe:
+                        breaker.release_probe()
+                    raise
+                
+                breaker.record_success()
+                return result
+    
+    async def _hedged_send(
+        self,
+        key: str,
+        method: str,
+        endpoint: str,
+        data: Optional[dict],
+        priority: Optional[Priority]
+    ) -> dict:
+        """
+        Send a read, and a second copy if the first is slower upstream than
+        the endpoint's hedge percentile; the first success wins. The timer
+        starts once the first copy holds its token, and the second copy is
+        only sent if the budget has a token to spare.
+        """
+        budget = await self._acquire(method, endpoint, priority)
+        delay = self._latency(key).percentile(self.hedge_percentile)
+        primary = asyncio.ensure_future(self._timed_exchange(key, method, endpoint, data, budget))
+        if delay is None:
+            return await primary
+        
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            
+            if not self.scheduler.try_acquire(budget):
+                # Others are waiting for tokens; a second copy would take one from them
+                self.hedges_skipped += 1
+                return await primary
+            
+            self.hedges += 1
+            current_span().set('hedged', True)
+            hedge = asyncio.ensure_future(self._timed_exchange(key, method, endpoint, data, budget))
+            pending = {primary, hedge}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _timed_send(
+        self,
+        key: str,
+        method: str,
+        endpoint: str,
+        data: Optional[dict],
+        priority: Optional[Priority]
+    ) -> dict:
+        """Rate-limit, then send one upstream request"""
+        budget = await self._acquire(method, endpoint, priority)
+        return await self._timed_exchange(key, method, endpoint, data, budget)
+    
+    async def _timed_exchange(
+        self,
+        key: str,
+        method: str,
+        endpoint: str,
+        data: Optional[dict],
+        budget: str
+    ) -> dict:
+        """Send with a token already taken, recording only the upstream latency"""
+        start = time.monotonic()
+        result = await self._send_request(method, endpoint, data, budget)
+        self._latency(key).record(time.monotonic() - start)
+        return result
+    
+    async def _acquire(self, method: str, endpoint: str, priority: Optional[Priority] = None) -> str:
+        """Wait for a token from the request's budget; returns the budget name"""
+        budget, default_priority = self._classify(method, endpoint)
+        if priority is None:
+            priority = default_priority
+        
+        # Only reads are shed; cancels and placements wait their turn
+        deadline = self.read_deadline if priority == Priority.READ else None
+        with self._span('coinbase.rate_limit', budget=budget):
+            await self.scheduler.acquire(budget, priority, deadline)
+        return budget
+    
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[dict],
+        budget: str
+    ) -> dict:
+        """Sign and send one upstream request (its `budget` token already taken)"""
         url = f'{self.get_base_url()}{endpoint}'
-        body = json.dumps(data) if data else ''
-        headers = self._get_headers(method, endpoint, body)
+        body = json_dumps(data) if data else ''
+        with self._span('coinbase.sign'):
+            headers = self._get_headers(method, endpoint, body)
         
-        async with aiohttp.ClientSession() as session:
-            async with session.request(
+        call = NULL_CALL
+        if self.metrics is not None:
+            call = self.metrics.upstream('coinbase', method, self._endpoint_key(method, endpoint)[len(method) + 1:])
+        
+        session = await self.transport.get_session()
+        with self._span('coinbase.upstream', method=method, url=url) as span:
+            async with call, session.request(
                 method,
                 url,
                 headers=headers,
                 data=body
             ) as resp:
-                response_data = await resp.json()
-                
-                if resp.status >= 400:
-                    raise Exception(f"API Error {resp.status}: {response_data}")
-                
-                return response_data
+                call.status = resp.status
+                span.set('status', resp.status)
+                raw = await resp.read()
+        
+        with self._span('coinbase.parse', bytes=len(raw)):
+            try:
+                response_data = json_loads(raw) if raw else None
+            except ValueError:
+                if resp.status < 400:
+                    raise
+                # Gateway errors (e.g. an HTML 502) are not JSON
+                response_data = raw.decode(errors='replace')
+        
+        if resp.status == 429:
+            self.scheduler.penalize(budget)
+        
+        if resp.status >= 400:
+            raise APIError(resp.status, response_data)
+        
+        return response_data
+    
+    def resilience_stats(self) -> Dict[str, Any]:
+        """Retry/hedge counters and circuit breaker states per endpoint"""
+        return {
+            'retries': self.retries,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'hedges_skipped': self.hedges_skipped,
+            'breakers': {key: breaker.stats() for key, breaker in self.breakers.items()},
+            'p95_ms': {
+                key: round(p95 * 1000, 3)
+                for key, p95 in (
+                    (key, tracker.percentile(0.95)) for key, tracker in self.latencies.items()
+                )
+                if p95 is not None
+            }
+        }
     
     async def get_accounts(self) -> List[CoinbaseAccount]:
         """Get all accounts"""
         response = await self._request('GET', '/api/v1/accounts')
         
-        accounts = []
-        for account_data in response.get('accounts', []):
-            accounts.append(CoinbaseAccount(
-                uuid=account_data['uuid'],
-                name=account_data['name'],
-                currency=account_data['currency'],
-                available_balance=account_data['available_balance'],
-                default=account_data['default'],
-                active=account_data['active'],
-                created_at=account_data['created_at'],
-                updated_at=account_data['updated_at']
-            ))
-        
-        return accounts
+        return [
+            self._parse_account_data(account_data)
+            for account_data in response.get('accounts', [])
+        ]
     
     async def get_account(self, account_id: str) -> CoinbaseAccount:
         """Get specific account details"""
         response = await self._request('GET', f'/api/v1/accounts/{account_id}')
-        
-        return CoinbaseAccount(
-            uuid=response['uuid'],
-            name=response['name'],
-            currency=response['currency'],
-            available_balance=response['available_balance'],
-            default=response['default'],
-            active=response['active'],
-            created_at=response['created_at'],
-            updated_at=response['updated_at']
-        )
+        return self._parse_account_data(response)
     
     async def get_products(self) -> List[CoinbaseProduct]:
-        """Get all available products (trading pairs)"""
+        """Get all available products (trading pairs) from the catalog cache"""
+        return await self.catalog.get_products()
+    
+    async def get_product(self, product_id: str) -> CoinbaseProduct:
+        """Get specific product details from the catalog cache"""
+        return await self.catalog.get_product(product_id)
+    
+    async def fetch_products(self) -> List[CoinbaseProduct]:
+        """Fetch all available products (trading pairs) from the API"""
         response = await self._request('GET', '/api/v1/products')
         
-        products = []
-        for product_data in response.get('products', []):
-            products.append(CoinbaseProduct(
-                id=product_data['id'],
-                base_currency=product_data['base_currency'],
-                quote_currency=product_data['quote_currency'],
-                base_display_symbol=product_data['base_display_symbol'],
-                quote_display_symbol=product_data['quote_display_symbol'],
-                base_increment=product_data['base_increment'],
-                quote_increment=product_data['quote_increment'],
-                display_name=product_data['display_name'],
-                status=product_data['status'],
-                price=product_data['price'],
-                price_percentage_change_24h=product_data['price_percentage_change_24h'],
-                volume_24h=product_data['volume_24h'],
-                volume_percentage_change_24h=product_data['volume_percentage_change_24h'],
-                base_max_size=product_data['base_max_size'],
-                base_min_size=product_data['base_min_size'],
-                quote_max_size=product_data['quote_max_size'],
-                quote_min_size=product_data['quote_min_size']
-            ))
-        
-        return products
+        return [
+            self._parse_product_data(product_data)
+            for product_data in response.get('products', [])
+        ]
     
-    async def get_product(self, product_id: str) -> CoinbaseProduct:
-        """Get specific product details"""
+    async def fetch_product(self, product_id: str) -> CoinbaseProduct:
+        """Fetch specific product details from the API"""
         response = await self._request('GET', f'/api/v1/products/{product_id}')
+        return self._parse_product_data(response)
+    
+    async def get_rules(self, product_id: str) -> Optional[ProductRules]:
+        """Trading rules for a product (fetched on an index miss; None if unavailable)"""
+        rules = self.rules.get(product_id)
+        if rules is None:
+            try:
+                rules = self.rules.update(await self.catalog.get_product(product_id))
+            except Exception:
+                return None
+        return rules
+    
+    async def _check_order(
+        self,
+        product_id: str,
+        side: OrderSide,
+        base_size: Optional[str] = None,
+        quote_size: Optional[str] = None,
+        limit_price: Optional[str] = None,
+        stop_price: Optional[str] = None
+    ) -> dict:
+        """Validate (and optionally snap) order fields against the product rules"""
+        order_fields = {
+            'base_size': base_size,
+            'quote_size': quote_size,
+            'limit_price': limit_price,
+            'stop_price': stop_price
+        }
+        if not self.validate_orders:
+            return order_fields
         
-        return CoinbaseProduct(
-            id=response['id'],
-            base_currency=response['base_currency'],
-            quote_currency=response['quote_currency'],
-            base_display_symbol=response['base_display_symbol'],
-            quote_display_symbol=response['quote_display_symbol'],
-            base_increment=response['base_increment'],
-            quote_increment=response['quote_increment'],
-            display_name=response['display_name'],
-            status=response['status'],
-            price=response['price'],
-            price_percentage_change_24h=response['price_percentage_change_24h'],
-            volume_24h=response['volume_24h'],
-            volume_percentage_change_24h=response['volume_percentage_change_24h'],
-            base_max_size=response['base_max_size'],
-            base_min_size=response['base_min_size'],
-            quote_max_size=response['quote_max_size'],
-            quote_min_size=response['quote_min_size']
-        )
+        rules = await self.get_rules(product_id)
+        if rules is None:
+            # No metadata for the product; the exchange still validates
+            return order_fields
+        return rules.check(side.value, snap=self.snap_orders, **order_fields)
     
     async def place_market_order(
         self,
@@ -292,6 +746,9 @@ class CoinbaseClient:
         quote_size: str
     ) -> CoinbaseOrder:
         """Place market order (quote_size = amount in USD)"""
+        checked = await self._check_order(product_id, side, quote_size=quote_size)
+        quote_size = checked['quote_size']
+        
         order_config = {
             'market_market_ioc': {
                 'quote_size': quote_size
@@ -299,7 +756,7 @@ class CoinbaseClient:
         }
         
         data = {
-            'client_order_id': f'market_{product_id}_{int(time.time())}',
+            'client_order_id': str(uuid.uuid4()),
             'product_id': product_id,
             'side': side.value,
             'order_configuration': order_config
@@ -316,6 +773,11 @@ class CoinbaseClient:
         limit_price: str
     ) -> CoinbaseOrder:
         """Place limit order (base_size = amount of crypto)"""
+        checked = await self._check_order(
+            product_id, side, base_size=base_size, limit_price=limit_price
+        )
+        base_size, limit_price = checked['base_size'], checked['limit_price']
+        
         order_config = {
             'limit_limit_gtc': {
                 'base_size': base_size,
@@ -324,7 +786,7 @@ class CoinbaseClient:
         }
         
         data = {
-            'client_order_id': f'limit_{product_id}_{int(time.time())}',
+            'client_order_id': str(uuid.uuid4()),
             'product_id': product_id,
             'side': side.value,
             'order_configuration': order_config
@@ -342,6 +804,12 @@ class CoinbaseClient:
         stop_price: str
     ) -> CoinbaseOrder:
         """Place stop order"""
+        checked = await self._check_order(
+            product_id, side, base_size=base_size, limit_price=limit_price, stop_price=stop_price
+        )
+        base_size = checked['base_size']
+        limit_price, stop_price = checked['limit_price'], checked['stop_price']
+        
         order_config = {
             'stop_limit_stop_limit_gtc': {
                 'base_size': base_size,
@@ -351,7 +819,7 @@ class CoinbaseClient:
         }
         
         data = {
-            'client_order_id': f'stop_{product_id}_{int(time.time())}',
+            'client_order_id': str(uuid.uuid4()),
             'product_id': product_id,
             'side': side.value,
             'order_configuration': order_config
@@ -360,6 +828,56 @@ class CoinbaseClient:
         response = await self._request('POST', '/api/v1/brokerage/orders', data)
         return self._parse_order_response(response)
     
+    async def place_order(self, request: OrderRequest) -> CoinbaseOrder:
+        """Place an order described by an OrderRequest"""
+        if request.order_type == OrderType.MARKET:
+            return await self.place_market_order(request.product_id, request.side, request.quote_size)
+        if request.order_type == OrderType.LIMIT:
+            return await self.place_limit_order(
+                request.product_id, request.side, request.base_size, request.limit_price
+            )
+        return await self.place_stop_order(
+            request.product_id, request.side, request.base_size, request.limit_price, request.stop_price
+        )
+    
+    async def place_orders(
+        self,
+        requests: List[OrderRequest],
+        concurrency: int = 10
+    ) -> List[dict]:
+        """
+        Place several orders concurrently
+        Returns one result per request, in order: {'success', 'order', 'error'}
+        """
+        errors: List[Optional[str]] = [None] * len(requests)
+        if self.validate_orders and not self.snap_orders:
+            # Reject invalid orders up front, in one vectorized pass
+            await asyncio.gather(*(
+                self.get_rules(product_id)
+                for product_id in {request.product_id for request in requests}
+            ))
+            errors = self.rules.validate_batch(requests)
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def place(request: OrderRequest, error: Optional[str]) -> CoinbaseOrder:
+            if error is not None:
+                raise OrderValidationError(error)
+            async with semaphore:
+                return await self.place_order(request)
+        
+        results = await asyncio.gather(
+            *(place(request, error) for request, error in zip(requests, errors)),
+            return_exceptions=True
+        )
+        
+        return [
+            {'success': False, 'order': None, 'error': str(result) or type(result).__name__}
+            if isinstance(result, BaseException)
+            else {'success': True, 'order': result, 'error': None}
+            for result in results
+        ]
+    
     async def get_orders(
         self,
         product_id: Optional[str] = None,
@@ -378,6 +896,17 @@ class CoinbaseClient:
         
         return orders
     
+    async def get_all_orders(
+        self,
+        product_id: Optional[str] = None,
+        order_status: str = 'OPEN'
+    ) -> List[CoinbaseOrder]:
+        """Get every order with `order_status`, following pagination cursors"""
+        return [
+            self._parse_order_data(order_data)
+            async for order_data in self.iter_orders(product_id, order_status=order_status)
+        ]
+    
     async def get_order(self, order_id: str) -> CoinbaseOrder:
         """Get specific order details"""
         response = await self._request('GET', f'/api/v1/brokerage/orders/{order_id}')
@@ -388,18 +917,159 @@ class CoinbaseClient:
         await self._request('POST', f'/api/v1/brokerage/orders/{order_id}/cancel', {})
         return True
     
+    async def cancel_orders(self, order_ids: List[str]) -> List[dict]:
+        """
+        Cancel many orders via the batch_cancel endpoint (chunked, chunks sent concurrently)
+        Returns one result per order id: {'order_id', 'success', 'failure_reason'}
+        """
+        order_ids = list(dict.fromkeys(order_ids))
+        chunks = [
+            order_ids[i:i + self.BATCH_CANCEL_MAX]
+            for i in range(0, len(order_ids), self.BATCH_CANCEL_MAX)
+        ]
+        
+        async def cancel_chunk(chunk: List[str]) -> List[dict]:
+            try:
+                response = await self._request(
+                    'POST',
+                    '/api/v1/brokerage/orders/batch_cancel',
+                    {'order_ids': chunk}
+                )
+            except Exception as e:
+                return [
+                    {'order_id': order_id, 'success': False, 'failure_reason': str(e)}
+                    for order_id in chunk
+                ]
+            
+            return [
+                {
+                    'order_id': result.get('order_id', ''),
+                    'success': bool(result.get('success')),
+                    'failure_reason': None if result.get('success') else result.get('failure_reason')
+                }
+                for result in response.get('results', [])
+            ]
+        
+        results = await asyncio.gather(*(cancel_chunk(chunk) for chunk in chunks))
+        return [result for chunk_results in results for result in chunk_results]
+    
+    async def cancel_all_orders(self, product_id: str) -> List[dict]:
+        """Cancel every open order for a product (all pages of them)"""
+        orders = await self.get_all_orders(product_id=product_id, order_status='OPEN')
+        return await self.cancel_orders([order.order_id for order in orders])
+    
     async def get_fills(
         self,
         product_id: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> list:
-        """Get trade fills/history"""
-        params = f'?limit={limit}'
+        """Get one page of trade fills/history"""
+        response = await self._fetch_fills_page(product_id, limit, cursor)
+        return response.get('fills', [])
+    
+    def iter_fills(
+        self,
+        product_id: Optional[str] = None,
+        page_size: int = 100,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Iterate over every fill, following pagination cursors.
+        The next page is fetched while the caller consumes the current one.
+        """
+        return self._iter_pages(
+            lambda cursor: self._fetch_fills_page(product_id, page_size, cursor, start, end),
+            'fills'
+        )
+    
+    def iter_orders(
+        self,
+        product_id: Optional[str] = None,
+        order_status: Optional[str] = None,
+        page_size: int = 100,
+        start: Optional[str] = None
+    ) -> AsyncIterator[dict]:
+        """Iterate over raw order dicts (any status unless given), created at or after `start`"""
+        return self._iter_pages(
+            lambda cursor: self._fetch_orders_page(product_id, order_status, page_size, cursor, start),
+            'orders'
+        )
+    
+    async def _iter_pages(
+        self,
+        fetch_page: Callable[[Optional[str]], Awaitable[dict]],
+        key: str
+    ) -> AsyncIterator[dict]:
+        """Yield the `key` items of cursor-paginated pages, prefetching the next page"""
+        next_page = asyncio.ensure_future(fetch_page(None))
+        try:
+            while next_page is not None:
+                response = await next_page
+                items = response.get(key, [])
+                cursor = response.get('cursor')
+                
+                next_page = None
+                if items and cursor and response.get('has_next', True):
+                    next_page = asyncio.ensure_future(fetch_page(cursor))
+                
+                for item in items:
+                    yield item
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+                next_page.add_done_callback(
+                    lambda page: page.cancelled() or page.exception()
+                )
+    
+    async def _fetch_fills_page(
+        self,
+        product_id: Optional[str],
+        limit: int,
+        cursor: Optional[str],
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> dict:
+        """Fetch one page of fills (response includes the next cursor)"""
+        params = {'limit': limit}
         if product_id:
-            params += f'&product_id={product_id}'
+            params['product_id'] = product_id
+        if cursor:
+            params['cursor'] = cursor
+        if start:
+            params['start_sequence_timestamp'] = start
+        if end:
+            params['end_sequence_timestamp'] = end
         
-        response = await self._request('GET', f'/api/v1/brokerage/orders/historical/fills{params}')
-        return response.get('fills', [])
+        return await self._request(
+            'GET',
+            f'/api/v1/brokerage/orders/historical/fills?{urlencode(params)}'
+        )
+    
+    async def _fetch_orders_page(
+        self,
+        product_id: Optional[str],
+        order_status: Optional[str],
+        limit: int,
+        cursor: Optional[str],
+        start: Optional[str] = None
+    ) -> dict:
+        """Fetch one page of orders (response includes the next cursor)"""
+        params = {'limit': limit}
+        if product_id:
+            params['product_id'] = product_id
+        if order_status:
+            params['order_status'] = order_status
+        if cursor:
+            params['cursor'] = cursor
+        if start:
+            params['start_date'] = start
+        
+        return await self._request(
+            'GET',
+            f'/api/v1/brokerage/orders/batch?{urlencode(params)}'
+        )
     
     async def get_ticker(self, product_id: str) -> CoinbaseTicker:
         """Get current ticker data"""
@@ -415,6 +1085,76 @@ class CoinbaseClient:
             volume=response.get('volume', '0')
         )
     
+    async def get_tickers(
+        self,
+        product_ids: List[str],
+        concurrency: Optional[int] = None
+    ) -> tuple:
+        """
+        Get tickers for several products concurrently (bounded fan-out)
+        Returns: (tickers by product_id, error messages by product_id)
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.ticker_batch_concurrency)
+        
+        async def fetch(product_id: str) -> CoinbaseTicker:
+            async with semaphore:
+                return await self.get_ticker(product_id)
+        
+        unique_ids = list(dict.fromkeys(product_ids))
+        results = await asyncio.gather(
+            *(fetch(product_id) for product_id in unique_ids),
+            return_exceptions=True
+        )
+        
+        tickers = {}
+        errors = {}
+        for product_id, result in zip(unique_ids, results):
+            if isinstance(result, BaseException):
+                errors[product_id] = str(result) or type(result).__name__
+            else:
+                tickers[product_id] = result
+        
+        return tickers, errors
+    
+    def _parse_account_data(self, account_data: dict) -> CoinbaseAccount:
+        """Parse account data dict into CoinbaseAccount"""
+        if self.lazy_models:
+            return LazyAccount(account_data)
+        return CoinbaseAccount(
+            uuid=account_data['uuid'],
+            name=account_data['name'],
+            currency=account_data['currency'],
+            available_balance=account_data['available_balance'],
+            default=account_data['default'],
+            active=account_data['active'],
+            created_at=account_data['created_at'],
+            updated_at=account_data['updated_at']
+        )
+    
+    def _parse_product_data(self, product_data: dict) -> CoinbaseProduct:
+        """Parse product data dict into CoinbaseProduct"""
+        if self.lazy_models:
+            return LazyProduct(product_data)
+        return CoinbaseProduct(
+            id=product_data['id'],
+            base_currency=product_data['base_currency'],
+            quote_currency=product_data['quote_currency'],
+            base_display_symbol=product_data['base_display_symbol'],
+            quote_display_symbol=product_data['quote_display_symbol'],
+            base_increment=product_data['base_increment'],
+            quote_increment=product_data['quote_increment'],
+            display_name=product_data['display_name'],
+            status=product_data['status'],
+            price=product_data['price'],
+            price_percentage_change_24h=product_data['price_percentage_change_24h'],
+            volume_24h=product_data['volume_24h'],
+            volume_percentage_change_24h=product_data['volume_percentage_change_24h'],
+            base_max_size=product_data['base_max_size'],
+            base_min_size=product_data['base_min_size'],
+            quote_max_size=product_data['quote_max_size'],
+            quote_min_size=product_data['quote_min_size']
+        )
+    
     def _parse_order_response(self, response: dict) -> CoinbaseOrder:
         """Parse order response"""
         order_data = response.get('order', response)
@@ -422,6 +1162,8 @@ class CoinbaseClient:
     
     def _parse_order_data(self, order_data: dict) -> CoinbaseOrder:
         """Parse order data dict into CoinbaseOrder"""
+        if self.lazy_models:
+            return LazyOrder(order_data)
         return CoinbaseOrder(
             order_id=order_data.get('order_id', ''),
             product_id=order_data.get('product_id', ''),
@@ -442,7 +1184,8 @@ class CoinbaseClient:
             pending_cancel_reason=order_data.get('pending_cancel_reason'),
             reject_reason=order_data.get('reject_reason'),
             settled=order_data.get('settled', False),
-            status=order_data.get('status', '')
+            status=order_data.get('status', ''),
+            client_order_id=order_data.get('client_order_id', '')
         )
 
 
@@ -475,5 +1218,7 @@ if __name__ == '__main__':
             print(f"BTC-USD Price: {ticker.price}")
         except Exception as e:
             print(f"Error: {e}")
+        finally:
+            await client.close()
     
     asyncio.run(example())
@@ -48,6 +48,8 @@ class AzureLoginConfig:
     client_id: Optional[str] = None
     client_secret: Optional[str] = None
     redirect_uri: Optional[str] = None
+    authority_host: str = 'https://login.microsoftonline.com'
+    graph_api_url: str = 'https://graph.microsoft.com/v1.0'
     
     def is_configured(self) -> bool:
         return bool(self.tenant_id and self.client_id and self.client_secret and self.redirect_uri)
@@ -85,6 +87,36 @@ class CoinbaseConfig:
     sandbox_api_key: Optional[str] = None
     sandbox_api_secret: Optional[str] = None
     sandbox_api_passphrase: Optional[str] = None
+    pool_size: int = 100
+    pool_size_per_host: int = 20
+    keepalive_timeout: float = 30.0
+    dns_cache_ttl: int = 300
+    public_rate_limit: float = 10.0
+    private_rate_limit: float = 30.0
+    read_deadline: float = 2.0
+    product_cache_ttl: float = 300.0
+    base_url: Optional[str] = None
+    ws_url: Optional[str] = None
+    ws_products: list = field(default_factory=list)
+    ws_level2: bool = False
+    ws_user_channel: bool = False
+    ws_trades: bool = False
+    candle_capacity: int = 360
+    indicator_granularities: list = field(default_factory=lambda: ['1m'])
+    history_db_url: Optional[str] = None  # e.g. sqlite:///trading_history.db
+    history_sync_interval: float = 60.0
+    record_dir: Optional[str] = None
+    record_segment_records: int = 1 << 20
+    record_segment_seconds: float = 3600.0
+    order_reconcile_interval: float = 60.0
+    ticker_batch_concurrency: int = 10
+    lazy_models: bool = True
+    max_attempts: int = 3
+    hedge_percentile: float = 0.95
+    breaker_threshold: int = 5
+    breaker_reset_timeout: float = 10.0
+    validate_orders: bool = True
+    snap_orders: bool = False
     
     def is_configured(self) -> bool:
         if self.sandbox_mode:
@@ -127,6 +159,31 @@ class DiscordConfig:
         return bool(self.bot_token or self.webhook_url)
 
 
+@dataclass
+class ProfilingConfig:
+    """Sampling Profiler Configuration (admin endpoints and per-request header)"""
+    enabled: bool = False
+    token: Optional[str] = None  # Required: without it profiling stays off
+    interval: float = 0.005
+    max_seconds: float = 60.0
+    
+    def is_configured(self) -> bool:
+        return self.enabled and bool(self.token)
+
+
+@dataclass
+class TracingConfig:
+    """Request Tracing Configuration (span sampling and export sink)"""
+    enabled: bool = False
+    sample_rate: float = 1.0
+    exporter: str = 'console'  # console, file, memory or module:factory
+    file: str = 'traces.jsonl'
+    service_name: str = 'trading-platform-api'
+    
+    def is_configured(self) -> bool:
+        return self.enabled
+
+
 @dataclass
 class ApplicationConfig:
     """Master Application Configuration - Singleton"""
@@ -140,6 +197,8 @@ class ApplicationConfig:
     tradingview: TradingViewConfig = field(default_factory=TradingViewConfig)
     slack: SlackConfig = field(default_factory=SlackConfig)
     discord: DiscordConfig = field(default_factory=DiscordConfig)
+    profiling: ProfilingConfig = field(default_factory=ProfilingConfig)
+    tracing: TracingConfig = field(default_factory=TracingConfig)
     
     def __post_init__(self):
         """Initialize all services from environment variables"""
@@ -167,7 +226,9 @@ class ApplicationConfig:
             tenant_id=os.getenv('AZURE_LOGIN_TENANT_ID'),
             client_id=os.getenv('AZURE_LOGIN_CLIENT_ID'),
             client_secret=os.getenv('AZURE_LOGIN_CLIENT_SECRET'),
-            redirect_uri=os.getenv('AZURE_LOGIN_REDIRECT_URI')
+            redirect_uri=os.getenv('AZURE_LOGIN_REDIRECT_URI'),
+            authority_host=os.getenv('AZURE_LOGIN_AUTHORITY_HOST', 'https://login.microsoftonline.com'),
+            graph_api_url=os.getenv('AZURE_GRAPH_API_URL', 'https://graph.microsoft.com/v1.0')
         )
         
         self.pinecone = PineconeConfig(
@@ -189,7 +250,39 @@ class ApplicationConfig:
             sandbox_mode=os.getenv('COINBASE_SANDBOX_MODE', 'false').lower() == 'true',
             sandbox_api_key=os.getenv('COINBASE_SANDBOX_API_KEY'),
             sandbox_api_secret=os.getenv('COINBASE_SANDBOX_API_SECRET'),
-            sandbox_api_passphrase=os.getenv('COINBASE_SANDBOX_API_PASSPHRASE')
+            sandbox_api_passphrase=os.getenv('COINBASE_SANDBOX_API_PASSPHRASE'),
+            pool_size=int(os.getenv('COINBASE_POOL_SIZE', '100')),
+            pool_size_per_host=int(os.getenv('COINBASE_POOL_SIZE_PER_HOST', '20')),
+            keepalive_timeout=float(os.getenv('COINBASE_KEEPALIVE_TIMEOUT', '30')),
+            dns_cache_ttl=int(os.getenv('COINBASE_DNS_CACHE_TTL', '300')),
+            public_rate_limit=float(os.getenv('COINBASE_PUBLIC_RATE_LIMIT', '10')),
+            private_rate_limit=float(os.getenv('COINBASE_PRIVATE_RATE_LIMIT', '30')),
+            read_deadline=float(os.getenv('COINBASE_READ_DEADLINE', '2')),
+            product_cache_ttl=float(os.getenv('COINBASE_PRODUCT_CACHE_TTL', '300')),
+            base_url=os.getenv('COINBASE_BASE_URL'),
+            ws_url=os.getenv('COINBASE_WS_URL'),
+            ws_products=[p.strip() for p in os.getenv('COINBASE_WS_PRODUCTS', '').split(',') if p.strip()],
+            ws_level2=os.getenv('COINBASE_WS_LEVEL2', 'false').lower() == 'true',
+            ws_user_channel=os.getenv('COINBASE_WS_USER_CHANNEL', 'false').lower() == 'true',
+            ws_trades=os.getenv('COINBASE_WS_TRADES', 'false').lower() == 'true',
+            candle_capacity=int(os.getenv('COINBASE_CANDLE_CAPACITY', '360')),
+            indicator_granularities=[
+                g.strip() for g in os.getenv('COINBASE_INDICATOR_GRANULARITIES', '1m').split(',') if g.strip()
+            ],
+            history_db_url=os.getenv('COINBASE_HISTORY_DB_URL') or None,
+            history_sync_interval=float(os.getenv('COINBASE_HISTORY_SYNC_INTERVAL', '60')),
+            record_dir=os.getenv('COINBASE_RECORD_DIR') or None,
+            record_segment_records=int(os.getenv('COINBASE_RECORD_SEGMENT_RECORDS', str(1 << 20))),
+            record_segment_seconds=float(os.getenv('COINBASE_RECORD_SEGMENT_SECONDS', '3600')),
+            order_reconcile_interval=float(os.getenv('COINBASE_ORDER_RECONCILE_INTERVAL', '60')),
+            ticker_batch_concurrency=int(os.getenv('COINBASE_TICKER_BATCH_CONCURRENCY', '10')),
+            lazy_models=os.getenv('COINBASE_LAZY_MODELS', 'true').lower() == 'true',
+            max_attempts=int(os.getenv('COINBASE_MAX_ATTEMPTS', '3')),
+            hedge_percentile=float(os.getenv('COINBASE_HEDGE_PERCENTILE', '0.95')),
+            breaker_threshold=int(os.getenv('COINBASE_BREAKER_THRESHOLD', '5')),
+            breaker_reset_timeout=float(os.getenv('COINBASE_BREAKER_RESET_TIMEOUT', '10')),
+            validate_orders=os.getenv('COINBASE_VALIDATE_ORDERS', 'true').lower() == 'true',
+            snap_orders=os.getenv('COINBASE_SNAP_ORDERS', 'false').lower() == 'true'
         )
         
         self.tradingview = TradingViewConfig(
@@ -205,6 +298,21 @@ class ApplicationConfig:
             bot_token=os.getenv('DISCORD_BOT_TOKEN'),
             webhook_url=os.getenv('DISCORD_WEBHOOK_URL')
         )
+        
+        self.profiling = ProfilingConfig(
+            enabled=os.getenv('PROFILING_ENABLED', 'false').lower() == 'true',
+            token=os.getenv('PROFILING_TOKEN') or None,
+            interval=float(os.getenv('PROFILING_INTERVAL', '0.005')),
+            max_seconds=float(os.getenv('PROFILING_MAX_SECONDS', '60'))
+        )
+        
+        self.tracing = TracingConfig(
+            enabled=os.getenv('TRACING_ENABLED', 'false').lower() == 'true',
+            sample_rate=float(os.getenv('TRACING_SAMPLE_RATE', '1.0')),
+            exporter=os.getenv('TRACING_EXPORTER', 'console'),
+            file=os.getenv('TRACING_FILE', 'traces.jsonl'),
+            service_name=os.getenv('TRACING_SERVICE_NAME', 'trading-platform-api')
+        )
     
     def get_status(self) -> Dict[str, Any]:
         """Get status of all configured services"""
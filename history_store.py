@@ -0,0 +1,421 @@
+"""
+Fills & Orders History Store
+Local SQLite (any SQLAlchemy URL) copy of account fills and orders, synced
+incrementally from the last seen timestamp so range queries stay local.
+"""
+
+import asyncio
+import dataclasses
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Any
+
+from sqlalchemy import (
+    Column, Float, Index, MetaData, String, Table, Text,
+    create_engine, event, func, select
+)
+
+from coinbase_client import LazyModel, json_dumps, json_loads
+
+if TYPE_CHECKING:
+    from coinbase_client import CoinbaseClient
+
+
+TERMINAL_STATUSES = frozenset(('FILLED', 'CANCELLED', 'EXPIRED', 'FAILED'))
+
+metadata = MetaData()
+
+fills_table = Table(
+    'fills', metadata,
+    Column('entry_id', String, primary_key=True),
+    Column('trade_id', String),
+    Column('order_id', String, nullable=False),
+    Column('product_id', String, nullable=False),
+    Column('side', String),
+    Column('price', Float),
+    Column('size', Float),
+    Column('commission', Float),
+    Column('size_in_quote', String),
+    Column('trade_time', String),
+    Column('trade_ts', Float, nullable=False),
+    Column('sequence_timestamp', String),
+    Column('raw', Text),
+    Index('ix_fills_product_ts', 'product_id', 'trade_ts'),
+    Index('ix_fills_ts', 'trade_ts'),
+    Index('ix_fills_order', 'order_id')
+)
+
+orders_table = Table(
+    'orders', metadata,
+    Column('order_id', String, primary_key=True),
+    Column('client_order_id', String),
+    Column('product_id', String, nullable=False),
+    Column('side', String),
+    Column('status', String),
+    Column('order_type', String),
+    Column('creation_time', String),
+    Column('created_ts', Float),
+    Column('completion_time', String),
+    Column('filled_size', Float),
+    Column('average_filled_price', Float),
+    Column('fee', Float),
+    Column('raw', Text),
+    Index('ix_orders_product_ts', 'product_id', 'created_ts'),
+    Index('ix_orders_ts', 'created_ts'),
+    Index('ix_orders_status', 'status'),
+    Index('ix_orders_client_id', 'client_order_id')
+)
+
+sync_state_table = Table(
+    'sync_state', metadata,
+    Column('name', String, primary_key=True),
+    Column('value', String)
+)
+
+
+def to_epoch(timestamp: Optional[str]) -> Optional[float]:
+    """RFC 3339 timestamp -> epoch seconds (None if empty; no offset means UTC)"""
+    if not timestamp:
+        return None
+    parsed = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def fill_row(fill: dict) -> dict:
+    """Row (numeric columns plus raw JSON) from an exchange fill dict"""
+    trade_time = fill.get('trade_time', '')
+    return {
+        'entry_id': fill.get('entry_id') or f"{fill.get('trade_id')}:{fill.get('order_id')}",
+        'trade_id': fill.get('trade_id'),
+        'order_id': fill.get('order_id', ''),
+        'product_id': fill.get('product_id', ''),
+        'side': fill.get('side'),
+        'price': _number(fill.get('price')),
+        'size': _number(fill.get('size')),
+        'commission': _number(fill.get('commission')),
+        'size_in_quote': str(fill.get('size_in_quote', False)).lower(),
+        'trade_time': trade_time,
+        'trade_ts': to_epoch(trade_time) or 0.0,
+        'sequence_timestamp': fill.get('sequence_timestamp') or trade_time,
+        'raw': json_dumps(fill)
+    }
+
+
+def _order_row(order: Any) -> dict:
+    """Row from a raw order dict or a (lazy) CoinbaseOrder"""
+    if isinstance(order, LazyModel):
+        data = order._data
+    elif dataclasses.is_dataclass(order):
+        data = dataclasses.asdict(order)
+    else:
+        data = order
+    return {
+        'order_id': data['order_id'],
+        'client_order_id': data.get('client_order_id') or None,
+        'product_id': data.get('product_id', ''),
+        'side': data.get('side'),
+        'status': data.get('status'),
+        'order_type': data.get('order_type'),
+        'creation_time': data.get('created_time') or data.get('creation_time'),
+        'created_ts': to_epoch(data.get('created_time') or data.get('creation_time')),
+        'completion_time': data.get('last_fill_time') or data.get('completion_time'),
+        'filled_size': _number(data.get('filled_size')),
+        'average_filled_price': _number(data.get('average_filled_price')),
+        'fee': _number(data.get('total_fees') or data.get('fee')),
+        'raw': json_dumps(data)
+    }
+
+
+class HistoryStore:
+    """Persistent fills/orders history with background incremental sync"""
+    
+    def __init__(
+        self,
+        client: 'CoinbaseClient',
+        url: str = 'sqlite:///trading_history.db',
+        sync_interval: float = 60.0,
+        page_size: int = 100,
+        max_order_refreshes: int = 50
+    ):
+        self.client = client
+        self.url = url
+        self.sync_interval = sync_interval
+        self.page_size = page_size
+        self.max_order_refreshes = max_order_refreshes  # Single-order reads per sync
+        
+        self.engine = create_engine(url)
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', self._sqlite_pragmas)
+        
+        self._task: Optional[asyncio.Task] = None
+        self.sync_lock = asyncio.Lock()  # Listeners are notified while it is held
+        self._fill_listeners: List[Callable[[List[dict]], None]] = []
+        
+        # Counters
+        self.syncs = 0
+        self.fills_synced = 0
+        self.orders_synced = 0
+        self.order_refreshes = 0
+        self.order_refresh_errors = 0
+        self.order_refreshes_deferred = 0
+        self.last_synced_at: Optional[float] = None
+        self.last_sync_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+    
+    def add_fill_listener(self, listener: Callable[[List[dict]], None]):
+        """Call `listener(rows)` with newly stored fill rows (oldest first) after each sync, failed or not"""
+        self._fill_listeners.append(listener)
+    
+    @staticmethod
+    def _sqlite_pragmas(connection, _record):
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+    
+    async def open(self):
+        """Create tables and indexes if they do not exist"""
+        await asyncio.to_thread(metadata.create_all, self.engine)
+    
+    async def close(self):
+        await self.stop()
+        self.engine.dispose()
+    
+    async def start(self):
+        """Sync now and then every `sync_interval` seconds in the background"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            await asyncio.sleep(self.sync_interval)
+    
+    async def sync(self) -> Dict[str, int]:
+        """Pull fills and orders newer than what is stored (one sync at a time)"""
+        async with self.sync_lock:
+            started = time.monotonic()
+            self.last_error = None  # Failed order refreshes below set it again
+            fills = await self.sync_fills()
+            orders = await self.sync_orders()
+            self.syncs += 1
+            self.last_synced_at = time.time()
+            self.last_sync_seconds = time.monotonic() - started
+            return {'fills': fills, 'orders': orders}
+    
+    async def sync_fills(self) -> int:
+        """Fetch fills from the stored watermark on; duplicates are ignored"""
+        watermark = await asyncio.to_thread(self._get_state, 'fills_watermark')
+        newest = watermark
+        batch: List[dict] = []
+        inserted: List[dict] = []
+        
+        try:
+            async for fill in self.client.iter_fills(page_size=self.page_size, start=watermark):
+                row = fill_row(fill)
+                batch.append(row)
+                if newest is None or to_epoch(row['sequence_timestamp']) > to_epoch(newest):
+                    newest = row['sequence_timestamp']
+                if len(batch) >= self.page_size:
+                    inserted += await asyncio.to_thread(self._insert_fills, batch)
+                    batch = []
+            if batch:
+                inserted += await asyncio.to_thread(self._insert_fills, batch)
+            
+            # Only advance once everything up to `newest` is stored
+            if newest != watermark:
+                await asyncio.to_thread(self._set_state, 'fills_watermark', newest)
+        finally:
+            # Rows stored before a failed page are skipped as duplicates by
+            # later syncs, so listeners hear about them now or never
+            self.fills_synced += len(inserted)
+            if inserted:
+                inserted.sort(key=lambda row: row['trade_ts'])
+                for listener in self._fill_listeners:
+                    listener(inserted)
+        return len(inserted)
+    
+    async def sync_orders(self) -> int:
+        """Fetch orders created since the watermark and refresh locally non-terminal ones"""
+        watermark = await asyncio.to_thread(self._get_state, 'orders_watermark')
+        newest, rows = watermark, []
+        
+        async for order in self.client.iter_orders(page_size=self.page_size, start=watermark):
+            row = _order_row(order)
+            rows.append(row)
+            if row['creation_time'] and (newest is None or row['created_ts'] > to_epoch(newest)):
+                newest = row['creation_time']
+        
+        # Older orders may have changed status since they were stored. One
+        # listing of open orders refreshes those still open; only the rest
+        # need a read each, bounded per sync (the remainder waits for the next)
+        seen = {row['order_id'] for row in rows}
+        stale = [
+            order_id for order_id in await asyncio.to_thread(self._open_order_ids)
+            if order_id not in seen
+        ]
+        if stale:
+            stale_ids = set(stale)
+            async for order in self.client.iter_orders(order_status='OPEN', page_size=self.page_size):
+                row = _order_row(order)
+                if row['order_id'] in stale_ids:
+                    rows.append(row)
+                    seen.add(row['order_id'])
+            stale = [order_id for order_id in stale if order_id not in seen]
+        
+        self.order_refreshes_deferred = max(0, len(stale) - self.max_order_refreshes)
+        failed = 0
+        for order_id in stale[:self.max_order_refreshes]:
+            self.order_refreshes += 1
+            try:
+                rows.append(_order_row(await self.client.get_order(order_id)))
+            except Exception as e:
+                failed += 1
+                self.order_refresh_errors += 1
+                self.last_error = f"{failed} order refresh(es) failed; last: order {order_id}: {type(e).__name__}: {e}"
+        
+        if rows:
+            await asyncio.to_thread(self.upsert_orders, rows)
+        if newest != watermark:
+            await asyncio.to_thread(self._set_state, 'orders_watermark', newest)
+        self.orders_synced += len(rows)
+        return len(rows)
+    
+    def _insert_fills(self, rows: List[dict]) -> List[dict]:
+        """Insert fills not already stored; returns the new rows"""
+        rows = list({row['entry_id']: row for row in rows}.values())
+        with self.engine.begin() as connection:
+            existing = set(connection.execute(
+                select(fills_table.c.entry_id)
+                .where(fills_table.c.entry_id.in_([row['entry_id'] for row in rows]))
+            ).scalars())
+            new_rows = [row for row in rows if row['entry_id'] not in existing]
+            if new_rows:
+                connection.execute(fills_table.insert(), new_rows)
+            return new_rows
+    
+    def upsert_orders(self, orders: Iterable[Any]):
+        """Insert or replace orders (raw dicts, rows or CoinbaseOrder objects)"""
+        rows = {}
+        for order in orders:
+            row = order if isinstance(order, dict) and 'raw' in order else _order_row(order)
+            rows[row['order_id']] = row
+        if not rows:
+            return
+        with self.engine.begin() as connection:
+            connection.execute(orders_table.delete().where(orders_table.c.order_id.in_(list(rows))))
+            connection.execute(orders_table.insert(), list(rows.values()))
+    
+    def _open_order_ids(self) -> List[str]:
+        with self.engine.connect() as connection:
+            return list(connection.execute(
+                select(orders_table.c.order_id)
+                .where(orders_table.c.status.not_in(TERMINAL_STATUSES))
+            ).scalars())
+    
+    def _get_state(self, name: str) -> Optional[str]:
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(sync_state_table.c.value).where(sync_state_table.c.name == name)
+            ).scalar()
+    
+    def _set_state(self, name: str, value: str):
+        with self.engine.begin() as connection:
+            connection.execute(sync_state_table.delete().where(sync_state_table.c.name == name))
+            connection.execute(sync_state_table.insert(), {'name': name, 'value': value})
+    
+    def fills(
+        self,
+        product_id: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        order_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[dict]:
+        """Stored fills in [start, end), newest first"""
+        query = select(fills_table.c.raw)
+        if product_id:
+            query = query.where(fills_table.c.product_id == product_id)
+        if order_id:
+            query = query.where(fills_table.c.order_id == order_id)
+        if start:
+            query = query.where(fills_table.c.trade_ts >= to_epoch(start))
+        if end:
+            query = query.where(fills_table.c.trade_ts < to_epoch(end))
+        query = query.order_by(fills_table.c.trade_ts.desc()).limit(limit)
+        
+        with self.engine.connect() as connection:
+            return [json_loads(raw) for raw in connection.execute(query).scalars()]
+    
+    def fill_rows(self, columns: Iterable[str]) -> List[tuple]:
+        """Selected columns of every stored fill, oldest first (no JSON decoding)"""
+        query = select(*(fills_table.c[name] for name in columns)).order_by(
+            fills_table.c.trade_ts, fills_table.c.entry_id
+        )
+        with self.engine.connect() as connection:
+            return [tuple(row) for row in connection.execute(query)]
+    
+    def orders(
+        self,
+        product_id: Optional[str] = None,
+        status: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[dict]:
+        """Stored orders created in [start, end), newest first"""
+        query = select(orders_table.c.raw)
+        if product_id:
+            query = query.where(orders_table.c.product_id == product_id)
+        if status:
+            query = query.where(orders_table.c.status == status)
+        if start:
+            query = query.where(orders_table.c.created_ts >= to_epoch(start))
+        if end:
+            query = query.where(orders_table.c.created_ts < to_epoch(end))
+        query = query.order_by(orders_table.c.created_ts.desc()).limit(limit)
+        
+        with self.engine.connect() as connection:
+            return [json_loads(raw) for raw in connection.execute(query).scalars()]
+    
+    def stats(self) -> Dict[str, Any]:
+        with self.engine.connect() as connection:
+            fills = connection.execute(select(func.count()).select_from(fills_table)).scalar()
+            orders = connection.execute(select(func.count()).select_from(orders_table)).scalar()
+        return {
+            'url': self.engine.url.render_as_string(hide_password=True),
+            'fills': fills,
+            'orders': orders,
+            'syncs': self.syncs,
+            'fills_synced': self.fills_synced,
+            'orders_synced': self.orders_synced,
+            'order_refreshes': self.order_refreshes,
+            'order_refresh_errors': self.order_refresh_errors,
+            'order_refreshes_deferred': self.order_refreshes_deferred,
+            'last_synced_at': self.last_synced_at,
+            'last_sync_seconds': self.last_sync_seconds,
+            'last_error': self.last_error
+        }
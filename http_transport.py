@@ -0,0 +1,141 @@
+"""
+Pooled HTTP Transport
+Long-lived aiohttp session with keep-alive, DNS caching and pool statistics.
+"""
+
+import time
+from typing import Optional, Dict, Any
+import aiohttp
+
+from tracing import Tracer, NULL_SPAN
+
+
+class HTTPTransport:
+    """Lifecycle-managed aiohttp session shared by an API client"""
+    
+    def __init__(
+        self,
+        pool_size: int = 100,
+        pool_size_per_host: int = 20,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        request_timeout: float = 30.0,
+        tracer: Optional[Tracer] = None
+    ):
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.request_timeout = request_timeout
+        self.tracer = tracer
+        
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        
+        # Pool counters (fed by aiohttp trace hooks)
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.pool_waits = 0
+        self.pool_wait_time = 0.0
+    
+    @property
+    def is_open(self) -> bool:
+        """Whether the underlying session is open"""
+        return self._session is not None and not self._session.closed
+    
+    async def open(self) -> aiohttp.ClientSession:
+        """Create the pooled session (idempotent)"""
+        if self.is_open:
+            return self._session
+        
+        self._connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+            enable_cleanup_closed=True
+        )
+        self._session = aiohttp.ClientSession(
+            connector=self._connector,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            trace_configs=[self._build_trace_config()]
+        )
+        return self._session
+    
+    async def close(self):
+        """Close the session and all pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._connector = None
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return the open session, opening it lazily on first use"""
+        if not self.is_open:
+            await self.open()
+        return self._session
+    
+    def request(self, method: str, url: str, **kwargs):
+        """Issue a request on the pooled session (use as async context manager)"""
+        if not self.is_open:
+            raise RuntimeError("HTTPTransport is not open")
+        return self._session.request(method, url, **kwargs)
+    
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """Hook connection pool events into the transport counters (and traces)"""
+        trace_config = aiohttp.TraceConfig()
+        tracer = self.tracer
+        
+        async def on_request_start(session, ctx, params):
+            # Pool wait, DNS and connect time, as a child of the caller's span
+            ctx.connect_span = tracer.span('http.connect', host=params.url.host) if tracer else NULL_SPAN
+        
+        async def on_request_exception(session, ctx, params):
+            ctx.connect_span.finish(params.exception)
+        
+        async def on_create_end(session, ctx, params):
+            self.connections_created += 1
+            ctx.connect_span.set('reused', False)
+            ctx.connect_span.finish()
+        
+        async def on_reuse(session, ctx, params):
+            self.connections_reused += 1
+            ctx.connect_span.set('reused', True)
+            ctx.connect_span.finish()
+        
+        async def on_queued_start(session, ctx, params):
+            ctx.pool_queued_at = time.perf_counter()
+            ctx.connect_span.set('queued', True)
+        
+        async def on_queued_end(session, ctx, params):
+            self.pool_waits += 1
+            self.pool_wait_time += time.perf_counter() - ctx.pool_queued_at
+        
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_create_end.append(on_create_end)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        return trace_config
+    
+    def stats(self) -> Dict[str, Any]:
+        """Connection pool statistics for sizing"""
+        in_use = 0
+        idle = 0
+        if self._connector is not None:
+            in_use = len(getattr(self._connector, '_acquired', ()))
+            idle = sum(len(conns) for conns in getattr(self._connector, '_conns', {}).values())
+        
+        return {
+            'open': self.is_open,
+            'pool_size': self.pool_size,
+            'pool_size_per_host': self.pool_size_per_host,
+            'in_use': in_use,
+            'idle': idle,
+            'created': self.connections_created,
+            'reused': self.connections_reused,
+            'pool_waits': self.pool_waits,
+            'pool_wait_time_ms': round(self.pool_wait_time * 1000, 3)
+        }
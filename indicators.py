@@ -0,0 +1,401 @@
+"""
+Technical Indicators
+Incremental O(1)-per-bar EMA, SMA, RSI, MACD, Bollinger Bands and VWAP, plus
+vectorized batch recompute over (products x bars) arrays.
+"""
+
+import math
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from candles import CandleAggregator
+
+
+SECONDS_PER_DAY = 86400
+
+
+# ============================================================================
+# Incremental indicators (one update per closed bar)
+# ============================================================================
+
+class SMA:
+    """Simple moving average over the last `period` values"""
+    __slots__ = ('period', 'window', 'total', 'value')
+    
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.value: Optional[float] = None
+    
+    def update(self, x: float) -> Optional[float]:
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(x)
+        self.total += x
+        if len(self.window) == self.period:
+            self.value = self.total / self.period
+        return self.value
+
+
+class EMA:
+    """Exponential moving average, seeded with the SMA of the first `period` values"""
+    __slots__ = ('period', 'alpha', 'count', 'seed', 'value')
+    
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.count = 0
+        self.seed = 0.0
+        self.value: Optional[float] = None
+    
+    def update(self, x: float) -> Optional[float]:
+        if self.value is not None:
+            self.value += self.alpha * (x - self.value)
+        else:
+            self.count += 1
+            self.seed += x
+            if self.count == self.period:
+                self.value = self.seed / self.period
+        return self.value
+
+
+class RSI:
+    """Relative strength index with Wilder smoothing"""
+    __slots__ = ('period', 'previous', 'count', 'avg_gain', 'avg_loss', 'value')
+    
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.previous: Optional[float] = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.value: Optional[float] = None
+    
+    def update(self, x: float) -> Optional[float]:
+        if self.previous is None:
+            self.previous = x
+            return None
+        change = x - self.previous
+        self.previous = x
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        
+        n = self.period
+        if self.count < n:
+            # Seed with plain averages of the first `period` changes
+            self.count += 1
+            self.avg_gain += gain / n
+            self.avg_loss += loss / n
+            if self.count < n:
+                return None
+        else:
+            self.avg_gain = (self.avg_gain * (n - 1) + gain) / n
+            self.avg_loss = (self.avg_loss * (n - 1) + loss) / n
+        
+        self.value = _rsi(self.avg_gain, self.avg_loss)
+        return self.value
+
+
+def _rsi(avg_gain: float, avg_loss: float) -> float:
+    total = avg_gain + avg_loss
+    return 100.0 * avg_gain / total if total else 50.0
+
+
+class MACD:
+    """MACD line, signal line and histogram"""
+    __slots__ = ('fast', 'slow', 'signal', 'value')
+    
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+        self.value: Optional[Dict[str, float]] = None
+    
+    def update(self, x: float) -> Optional[Dict[str, float]]:
+        fast = self.fast.update(x)
+        slow = self.slow.update(x)
+        if slow is None:
+            return None
+        line = fast - slow
+        signal = self.signal.update(line)
+        if signal is not None:
+            self.value = {'macd': line, 'signal': signal, 'histogram': line - signal}
+        return self.value
+
+
+class Bollinger:
+    """Bollinger Bands: SMA +/- `width` population standard deviations"""
+    __slots__ = ('period', 'width', 'window', 'total', 'total_sq', 'value')
+    
+    def __init__(self, period: int = 20, width: float = 2.0):
+        self.period = period
+        self.width = width
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.value: Optional[Dict[str, float]] = None
+    
+    def update(self, x: float) -> Optional[Dict[str, float]]:
+        if len(self.window) == self.period:
+            old = self.window[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.window.append(x)
+        self.total += x
+        self.total_sq += x * x
+        if len(self.window) == self.period:
+            mean = self.total / self.period
+            std = math.sqrt(max(self.total_sq / self.period - mean * mean, 0.0))
+            self.value = {
+                'upper': mean + self.width * std,
+                'middle': mean,
+                'lower': mean - self.width * std
+            }
+        return self.value
+
+
+class VWAP:
+    """Volume-weighted average typical price, reset at each UTC day"""
+    __slots__ = ('day', 'pv', 'volume', 'value')
+    
+    def __init__(self):
+        self.day: Optional[int] = None
+        self.pv = 0.0
+        self.volume = 0.0
+        self.value: Optional[float] = None
+    
+    def update(self, start: float, high: float, low: float, close: float, volume: float) -> Optional[float]:
+        day = int(start) // SECONDS_PER_DAY
+        if day != self.day:
+            self.day = day
+            self.pv = 0.0
+            self.volume = 0.0
+        self.pv += (high + low + close) / 3.0 * volume
+        self.volume += volume
+        if self.volume:
+            self.value = self.pv / self.volume
+        return self.value
+
+
+class IndicatorSet:
+    """All indicators for one product and granularity"""
+    __slots__ = ('sma', 'ema', 'rsi', 'macd', 'bollinger', 'vwap', 'bars', 'updated_at')
+    
+    def __init__(self, sma_period: int = 20, ema_period: int = 20, rsi_period: int = 14):
+        self.sma = SMA(sma_period)
+        self.ema = EMA(ema_period)
+        self.rsi = RSI(rsi_period)
+        self.macd = MACD()
+        self.bollinger = Bollinger()
+        self.vwap = VWAP()
+        self.bars = 0
+        self.updated_at: Optional[float] = None
+    
+    def update(self, bar: tuple):
+        """Apply one closed (start, open, high, low, close, volume) bar"""
+        start, _, high, low, close, volume = bar
+        self.sma.update(close)
+        self.ema.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.bollinger.update(close)
+        self.vwap.update(start, high, low, close, volume)
+        self.bars += 1
+        self.updated_at = start
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'bars': self.bars,
+            'bar_start': int(self.updated_at) if self.updated_at is not None else None,
+            'sma': self.sma.value,
+            'ema': self.ema.value,
+            'rsi': self.rsi.value,
+            'macd': self.macd.value,
+            'bollinger': self.bollinger.value,
+            'vwap': self.vwap.value
+        }
+
+
+# ============================================================================
+# Vectorized batch recompute over (products x bars) arrays
+# ============================================================================
+
+def sma(x: np.ndarray, period: int) -> np.ndarray:
+    """Rolling mean along axis 1 (NaN until `period` values)"""
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= period:
+        cumsum = np.cumsum(x, axis=1)
+        out[:, period - 1] = cumsum[:, period - 1]
+        out[:, period:] = cumsum[:, period:] - cumsum[:, :-period]
+        out[:, period - 1:] /= period
+    return out
+
+
+def ema(x: np.ndarray, period: int, offset: int = 0) -> np.ndarray:
+    """EMA along axis 1 for columns from `offset` on, seeded with their first SMA"""
+    out = np.full(x.shape, np.nan)
+    first = offset + period - 1
+    if x.shape[1] > first:
+        alpha = 2.0 / (period + 1)
+        value = x[:, offset:first + 1].mean(axis=1)
+        out[:, first] = value
+        for t in range(first + 1, x.shape[1]):
+            value = value + alpha * (x[:, t] - value)
+            out[:, t] = value
+    return out
+
+
+def rsi(x: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder RSI along axis 1"""
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] > period:
+        change = np.diff(x, axis=1)
+        gain = np.where(change > 0, change, 0.0)
+        loss = np.where(change < 0, -change, 0.0)
+        avg_gain = gain[:, :period].mean(axis=1)
+        avg_loss = loss[:, :period].mean(axis=1)
+        out[:, period] = _rsi_array(avg_gain, avg_loss)
+        for t in range(period, change.shape[1]):
+            avg_gain = (avg_gain * (period - 1) + gain[:, t]) / period
+            avg_loss = (avg_loss * (period - 1) + loss[:, t]) / period
+            out[:, t + 1] = _rsi_array(avg_gain, avg_loss)
+    return out
+
+
+def _rsi_array(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    total = avg_gain + avg_loss
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, 100.0 * avg_gain / total, 50.0)
+
+
+def macd(x: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    line = ema(x, fast) - ema(x, slow)
+    signal_line = ema(np.nan_to_num(line), signal, offset=slow - 1)
+    return {'macd': line, 'signal': signal_line, 'histogram': line - signal_line}
+
+
+def bollinger(x: np.ndarray, period: int = 20, width: float = 2.0) -> Dict[str, np.ndarray]:
+    middle = sma(x, period)
+    mean_sq = sma(x * x, period)
+    std = np.sqrt(np.maximum(mean_sq - middle * middle, 0.0))
+    return {'upper': middle + width * std, 'middle': middle, 'lower': middle - width * std}
+
+
+def vwap(start: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Session VWAP along axis 1, reset where the UTC day changes"""
+    pv = np.cumsum((high + low + close) / 3.0 * volume, axis=1)
+    cum_volume = np.cumsum(volume, axis=1)
+    
+    # Column index where each bar's session begins
+    day = start.astype(np.int64) // SECONDS_PER_DAY
+    columns = np.arange(day.shape[1])
+    session_start = np.where(np.diff(day, axis=1, prepend=day[:, :1] - 1) != 0, columns, 0)
+    session_start = np.maximum.accumulate(session_start, axis=1)
+    
+    # Cumulative totals before the session began
+    previous = np.maximum(session_start - 1, 0)
+    has_previous = session_start > 0
+    pv = pv - np.where(has_previous, np.take_along_axis(pv, previous, axis=1), 0.0)
+    cum_volume = cum_volume - np.where(has_previous, np.take_along_axis(cum_volume, previous, axis=1), 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(cum_volume > 0, pv / cum_volume, np.nan)
+
+
+def compute_batch(bars: np.ndarray, sma_period: int = 20, ema_period: int = 20, rsi_period: int = 14) -> Dict[str, Any]:
+    """
+    Every indicator for a (products, bars, 6) array of OHLCV bars
+    Returns arrays of shape (products, bars) keyed like IndicatorSet.snapshot().
+    """
+    start, high, low, close, volume = (bars[:, :, column] for column in (0, 2, 3, 4, 5))
+    return {
+        'sma': sma(close, sma_period),
+        'ema': ema(close, ema_period),
+        'rsi': rsi(close, rsi_period),
+        'macd': macd(close),
+        'bollinger': bollinger(close),
+        'vwap': vwap(start, high, low, close, volume)
+    }
+
+
+def _last(value: Any) -> Any:
+    if isinstance(value, dict):
+        last = {key: _last(array) for key, array in value.items()}
+        return None if any(v is None for v in last.values()) else last
+    return None if math.isnan(value) else float(value)
+
+
+class IndicatorEngine:
+    """Incremental indicators for every product, fed by closed candle bars"""
+    
+    def __init__(
+        self,
+        aggregator: 'CandleAggregator',
+        granularities: Iterable[str] = ('1m',),
+        sma_period: int = 20,
+        ema_period: int = 20,
+        rsi_period: int = 14
+    ):
+        self.aggregator = aggregator
+        self.granularities = set(granularities)
+        self.periods = {'sma_period': sma_period, 'ema_period': ema_period, 'rsi_period': rsi_period}
+        self.sets: Dict[tuple, IndicatorSet] = {}
+        aggregator.add_bar_listener(self.on_bar)
+    
+    def on_bar(self, product_id: str, granularity: str, bar: tuple):
+        """Apply a closed bar from the candle aggregator"""
+        if granularity not in self.granularities:
+            return
+        key = (product_id, granularity)
+        indicators = self.sets.get(key)
+        if indicators is None:
+            indicators = self.sets[key] = IndicatorSet(**self.periods)
+        indicators.update(bar)
+    
+    def get(self, product_id: str, granularity: str = '1m') -> Optional[Dict[str, Any]]:
+        """Latest incremental values, or None before the first closed bar"""
+        indicators = self.sets.get((product_id, granularity))
+        return indicators.snapshot() if indicators is not None else None
+    
+    def recompute(self, granularity: str = '1m', product_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Recompute every product from its candle ring in one vectorized pass
+        Products are grouped by bar count so each group is a dense array.
+        Only closed bars are used (matching the incremental values).
+        """
+        product_ids = product_ids if product_ids is not None else list(self.aggregator.series)
+        groups: Dict[int, List[tuple]] = {}
+        for product_id in product_ids:
+            bars = self.aggregator.candles(product_id, granularity, self.aggregator.capacity)
+            if bars is None or len(bars) < 2:
+                continue
+            closed = bars[:-1]
+            groups.setdefault(len(closed), []).append((product_id, closed))
+        
+        results = {}
+        for members in groups.values():
+            stacked = np.stack([closed for _, closed in members])
+            computed = compute_batch(stacked, **self.periods)
+            for row, (product_id, closed) in enumerate(members):
+                results[product_id] = {
+                    'bars': len(closed),
+                    'bar_start': int(closed[-1, 0]),
+                    **{
+                        name: _last(
+                            {key: array[row, -1] for key, array in value.items()}
+                            if isinstance(value, dict) else value[row, -1]
+                        )
+                        for name, value in computed.items()
+                    }
+                }
+        return results
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'granularities': sorted(self.granularities),
+            'series': len(self.sets),
+            **self.periods
+        }
@@ -3,31 +3,86 @@ FastAPI Application - OAuth 2.0 with Azure AD and Coinbase Trading
 Example of integrating Azure authentication and cryptocurrency trading.
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Request
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, Request, Header
+from fastapi.responses import RedirectResponse, JSONResponse, StreamingResponse, PlainTextResponse, Response
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+from typing import List, Optional
+from pydantic import BaseModel
+import asyncio
+import hmac
+import math
 import os
 from dotenv import load_dotenv
 
 from config import get_config, ApplicationConfig
 from azure_auth import AzureADClient, AzureADLoginManager, TokenResponse
-from coinbase_client import CoinbaseClient, OrderSide
+from coinbase_client import CoinbaseClient, OrderSide, OrderType, OrderRequest, json_dumps
+from http_transport import HTTPTransport
+from rate_limiter import PriorityRequestScheduler, TokenBucket
+from resilience import RetryPolicy
+from market_data import MarketDataFeed
+from order_book import OrderBookManager
+from order_manager import OrderManager
+from product_rules import from_units
+from candles import CandleAggregator, GRANULARITIES
+from indicators import IndicatorEngine
+from history_store import HistoryStore
+from portfolio import Portfolio
+from market_recorder import MarketRecorder
+from metrics import Metrics, MetricsMiddleware
+from profiler import Profile, ProfilingMiddleware, SamplingProfiler
+from tracing import Tracer, TracingMiddleware, create_exporter
 
 # Load environment variables
 load_dotenv()
 
+
+# ============================================================================
+# Request Models
+# ============================================================================
+
+class BatchOrder(BaseModel):
+    """One order in a batch placement request"""
+    product_id: str
+    side: str  # BUY or SELL
+    type: str = 'LIMIT'  # MARKET, LIMIT or STOP
+    base_size: Optional[str] = None
+    quote_size: Optional[str] = None
+    limit_price: Optional[str] = None
+    stop_price: Optional[str] = None
+
+
+class BatchPlaceRequest(BaseModel):
+    orders: List[BatchOrder]
+
+
+class BatchCancelRequest(BaseModel):
+    order_ids: List[str]
+
+
 # Global instances
 config: ApplicationConfig = None
 azure_client: AzureADClient = None
 azure_manager: AzureADLoginManager = None
 coinbase_client: CoinbaseClient = None
+market_feed: MarketDataFeed = None
+order_books: OrderBookManager = None
+order_manager: OrderManager = None
+candles: CandleAggregator = None
+indicators: IndicatorEngine = None
+history: HistoryStore = None
+portfolio: Portfolio = None
+recorder: MarketRecorder = None
+
+# Route and upstream metrics (the middleware needs it before startup)
+metrics = Metrics()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application startup and shutdown"""
-    global config, azure_client, azure_manager, coinbase_client
+    global config, azure_client, azure_manager, coinbase_client, market_feed, order_books, order_manager, candles, indicators, history, portfolio, recorder
     
     # Startup
     config = get_config()
@@ -38,8 +93,14 @@ async def lifespan(app: FastAPI):
             tenant_id=config.azure_login.tenant_id,
             client_id=config.azure_login.client_id,
             client_secret=config.azure_login.client_secret,
-            redirect_uri=config.azure_login.redirect_uri
+            redirect_uri=config.azure_login.redirect_uri,
+            transport=HTTPTransport(pool_size_per_host=10, tracer=tracer),
+            authority_host=config.azure_login.authority_host,
+            graph_api_url=config.azure_login.graph_api_url,
+            metrics=metrics,
+            tracer=tracer
         )
+        await azure_client.open()
         azure_manager = AzureADLoginManager(azure_client)
     
     # Initialize Coinbase
@@ -51,14 +112,128 @@ async def lifespan(app: FastAPI):
             sandbox_mode=config.coinbase.sandbox_mode,
             sandbox_api_key=config.coinbase.sandbox_api_key,
             sandbox_api_secret=config.coinbase.sandbox_api_secret,
-            sandbox_api_passphrase=config.coinbase.sandbox_api_passphrase
+            sandbox_api_passphrase=config.coinbase.sandbox_api_passphrase,
+            transport=HTTPTransport(
+                pool_size=config.coinbase.pool_size,
+                pool_size_per_host=config.coinbase.pool_size_per_host,
+                keepalive_timeout=config.coinbase.keepalive_timeout,
+                dns_cache_ttl=config.coinbase.dns_cache_ttl,
+                tracer=tracer
+            ),
+            scheduler=PriorityRequestScheduler({
+                'public': TokenBucket(config.coinbase.public_rate_limit),
+                'private': TokenBucket(config.coinbase.private_rate_limit)
+            }),
+            read_deadline=config.coinbase.read_deadline,
+            product_cache_ttl=config.coinbase.product_cache_ttl,
+            ticker_batch_concurrency=config.coinbase.ticker_batch_concurrency,
+            lazy_models=config.coinbase.lazy_models,
+            retry_policy=RetryPolicy(max_attempts=config.coinbase.max_attempts),
+            hedge_percentile=config.coinbase.hedge_percentile,
+            breaker_threshold=config.coinbase.breaker_threshold,
+            breaker_reset_timeout=config.coinbase.breaker_reset_timeout,
+            validate_orders=config.coinbase.validate_orders,
+            snap_orders=config.coinbase.snap_orders,
+            base_url=config.coinbase.base_url,
+            metrics=metrics,
+            tracer=tracer
         )
+        await coinbase_client.open()
+        await coinbase_client.catalog.start()
+        
+        # Local fills/orders history, synced incrementally in the background
+        if config.coinbase.history_db_url:
+            history = HistoryStore(
+                coinbase_client,
+                url=config.coinbase.history_db_url,
+                sync_interval=config.coinbase.history_sync_interval
+            )
+            await history.open()
+            portfolio = Portfolio(history)
+            await portfolio.refresh()
+            await history.start()
+        
+        # Stream tickers (and optionally books and own orders) over WebSocket
+        if config.coinbase.ws_products or config.coinbase.ws_user_channel:
+            channels = ['heartbeats']
+            if config.coinbase.ws_products:
+                channels.append('ticker')
+            if config.coinbase.ws_level2:
+                channels.append('level2')
+            if config.coinbase.ws_trades:
+                channels.append('market_trades')
+            if config.coinbase.ws_user_channel:
+                channels.append('user')
+            
+            market_feed = MarketDataFeed(
+                product_ids=config.coinbase.ws_products,
+                transport=coinbase_client.transport,
+                ws_url=config.coinbase.ws_url,
+                rest_fallback=coinbase_client.get_ticker,
+                channels=channels,
+                signer=coinbase_client.sign_ws_subscription
+            )
+            
+            if config.coinbase.ws_products:
+                # Trades carry volume; without them bars are built from ticker prices
+                candles = CandleAggregator(capacity=config.coinbase.candle_capacity)
+                indicators = IndicatorEngine(
+                    candles,
+                    granularities=config.coinbase.indicator_granularities
+                )
+                if config.coinbase.ws_trades:
+                    market_feed.add_handler(CandleAggregator.TRADES_CHANNEL, candles.on_trades)
+                else:
+                    market_feed.add_handler(CandleAggregator.TICKER_CHANNEL, candles.on_ticker)
+                if portfolio is not None:
+                    market_feed.add_handler('ticker', portfolio.on_ticker)
+            
+            if config.coinbase.ws_level2:
+                order_books = OrderBookManager()
+                market_feed.add_handler(OrderBookManager.CHANNEL, order_books.on_message)
+                market_feed.add_disconnect_handler(order_books.reset)
+            
+            # Record what the feed delivers so incidents can be replayed
+            if config.coinbase.record_dir:
+                recorder = MarketRecorder(
+                    config.coinbase.record_dir,
+                    segment_records=config.coinbase.record_segment_records,
+                    segment_seconds=config.coinbase.record_segment_seconds
+                )
+                recorder.attach(market_feed)
+            
+            if config.coinbase.ws_user_channel:
+                order_manager = OrderManager(
+                    coinbase_client,
+                    feed=market_feed,
+                    reconcile_interval=config.coinbase.order_reconcile_interval
+                )
+                market_feed.add_handler(OrderManager.CHANNEL, order_manager.on_message)
+                market_feed.add_disconnect_handler(order_manager.mark_stale)
+            
+            await market_feed.start()
+            if order_manager is not None:
+                await order_manager.start()
     
     print("✅ Application initialized")
     yield
     
     # Shutdown
     print("🛑 Application shutting down")
+    if order_manager is not None:
+        await order_manager.stop()
+    if market_feed is not None:
+        await market_feed.stop()
+    if recorder is not None:
+        recorder.close()
+    if history is not None:
+        await history.close()
+    if coinbase_client is not None:
+        await coinbase_client.close()
+    if azure_client is not None:
+        await azure_client.close()
+    if tracer is not None:
+        await asyncio.to_thread(tracer.flush)
 
 
 # Create FastAPI application
@@ -68,6 +243,26 @@ app = FastAPI(
     version="1.0.0",
     lifespan=lifespan
 )
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+# Profiling is opt-in and needs a token: otherwise neither the middleware nor a sampler exists
+profiler: SamplingProfiler = None
+if get_config().profiling.is_configured():
+    profiler = SamplingProfiler(
+        interval=get_config().profiling.interval,
+        max_seconds=get_config().profiling.max_seconds
+    )
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, token=get_config().profiling.token)
+
+# Tracing is opt-in too; clients get the tracer at startup (None when disabled)
+tracer: Tracer = None
+if get_config().tracing.enabled:
+    tracer = Tracer(
+        exporter=create_exporter(get_config().tracing.exporter, get_config().tracing.file),
+        sample_rate=get_config().tracing.sample_rate,
+        service=get_config().tracing.service_name
+    )
+    app.add_middleware(TracingMiddleware, tracer=tracer)
 
 
 # ============================================================================
@@ -83,6 +278,12 @@ async def health_check():
     }
 
 
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Route and upstream metrics in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/status", tags=["Status"])
 async def status():
     """Get current service configuration status"""
@@ -100,6 +301,103 @@ async def status():
     }
 
 
+@app.get("/status/pool", tags=["Status"])
+async def pool_status():
+    """Get HTTP connection pool statistics"""
+    return {
+        "coinbase": coinbase_client.transport.stats() if coinbase_client else None,
+        "azure": azure_client.transport.stats() if azure_client else None
+    }
+
+
+@app.get("/status/tracing", tags=["Status"])
+async def tracing_status():
+    """Get trace sampling and export counters"""
+    if tracer is None:
+        raise HTTPException(status_code=400, detail="Tracing not enabled (TRACING_ENABLED=true)")
+    return tracer.stats()
+
+
+@app.get("/status/rate_limits", tags=["Status"])
+async def rate_limit_status():
+    """Get Coinbase rate budget, queue depth and wait-time statistics"""
+    if coinbase_client is None:
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    return coinbase_client.scheduler.stats()
+
+
+@app.get("/status/coalescing", tags=["Status"])
+async def coalescing_status():
+    """Get upstream request coalescing (single-flight) counters"""
+    if coinbase_client is None:
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    return coinbase_client.single_flight.stats()
+
+
+@app.get("/status/resilience", tags=["Status"])
+async def resilience_status():
+    """Get retry/hedge counters and per-endpoint circuit breaker states"""
+    if coinbase_client is None:
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    return coinbase_client.resilience_stats()
+
+
+@app.get("/status/catalog", tags=["Status"])
+async def catalog_status():
+    """Get product catalog cache statistics"""
+    if coinbase_client is None:
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    return coinbase_client.catalog.stats()
+
+
+@app.get("/status/market_data", tags=["Status"])
+async def market_data_status():
+    """Get WebSocket market-data feed statistics"""
+    if market_feed is None:
+        raise HTTPException(status_code=400, detail="Market data feed not configured")
+    return market_feed.stats()
+
+
+@app.get("/status/candles", tags=["Status"])
+async def candles_status():
+    """Get candle aggregation statistics"""
+    if candles is None:
+        raise HTTPException(status_code=400, detail="Candle aggregation not configured")
+    return candles.stats()
+
+
+@app.get("/status/history", tags=["Status"])
+async def history_status():
+    """Get history store size and sync statistics"""
+    if history is None:
+        raise HTTPException(status_code=400, detail="History store not configured")
+    return await asyncio.to_thread(history.stats)
+
+
+@app.get("/status/portfolio", tags=["Status"])
+async def portfolio_status():
+    """Get positions service statistics"""
+    if portfolio is None:
+        raise HTTPException(status_code=400, detail="History store not configured")
+    return portfolio.stats()
+
+
+@app.get("/status/recorder", tags=["Status"])
+async def recorder_status():
+    """Get market-data recorder segment and write statistics"""
+    if recorder is None:
+        raise HTTPException(status_code=400, detail="Market-data recorder not configured")
+    return recorder.stats()
+
+
+@app.get("/status/orders", tags=["Status"])
+async def order_manager_status():
+    """Get live order-state cache statistics"""
+    if order_manager is None:
+        raise HTTPException(status_code=400, detail="Order manager not configured")
+    return order_manager.stats()
+
+
 # ============================================================================
 # Azure AD OAuth 2.0 Authentication Endpoints
 # ============================================================================
@@ -238,6 +536,42 @@ async def get_products():
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/trading/products/refresh", tags=["Trading"])
+async def refresh_products():
+    """Invalidate the product catalog cache and reload it"""
+    if not config.coinbase.is_configured():
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    
+    try:
+        coinbase_client.catalog.invalidate()
+        products = await coinbase_client.catalog.refresh()
+        return {"success": True, "products": len(products)}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/trading/products/{product_id}/rules", tags=["Trading"])
+async def get_product_rules(product_id: str):
+    """Get a product's order increments and size limits"""
+    if not config.coinbase.is_configured():
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    
+    rules = await coinbase_client.get_rules(product_id)
+    if rules is None:
+        raise HTTPException(status_code=404, detail=f"No trading rules for {product_id}")
+    
+    return {
+        "product_id": rules.product_id,
+        "status": rules.status,
+        "base_increment": from_units(rules.base_tick, rules.base_scale),
+        "base_min_size": from_units(rules.base_min, rules.base_scale),
+        "base_max_size": from_units(rules.base_max, rules.base_scale),
+        "quote_increment": from_units(rules.quote_tick, rules.quote_scale),
+        "quote_min_size": from_units(rules.quote_min, rules.quote_scale),
+        "quote_max_size": from_units(rules.quote_max, rules.quote_scale)
+    }
+
+
 @app.get("/trading/ticker/{product_id}", tags=["Trading"])
 async def get_ticker(product_id: str):
     """Get current ticker for a product"""
@@ -245,18 +579,147 @@ async def get_ticker(product_id: str):
         raise HTTPException(status_code=400, detail="Coinbase not configured")
     
     try:
-        ticker = await coinbase_client.get_ticker(product_id)
-        return {
+        if market_feed is not None:
+            ticker = await market_feed.get_ticker(product_id)
+        else:
+            ticker = await coinbase_client.get_ticker(product_id)
+        response = {
             "product_id": ticker.product_id,
             "price": ticker.price,
             "ask": ticker.ask,
             "bid": ticker.bid,
             "volume": ticker.volume
         }
+        if indicators is not None:
+            response["indicators"] = {
+                granularity: indicators.get(product_id, granularity)
+                for granularity in sorted(indicators.granularities)
+            }
+        return response
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/trading/tickers", tags=["Trading"])
+async def get_tickers(ids: str):
+    """Get current tickers for a comma-separated list of products"""
+    if not config.coinbase.is_configured():
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    
+    product_ids = [product_id.strip() for product_id in ids.split(',') if product_id.strip()]
+    if not product_ids:
+        raise HTTPException(status_code=400, detail="No product ids given")
+    
+    # Serve what the WebSocket feed has; fetch the rest concurrently over REST
+    tickers = {}
+    if market_feed is not None:
+        for product_id in product_ids:
+            ticker = market_feed.tickers.get(product_id)
+            if ticker is not None:
+                tickers[product_id] = ticker
+    
+    missing = [product_id for product_id in product_ids if product_id not in tickers]
+    errors = {}
+    if missing:
+        fetched, errors = await coinbase_client.get_tickers(missing)
+        tickers.update(fetched)
+    
+    return {
+        "tickers": {
+            product_id: {
+                "product_id": ticker.product_id,
+                "price": ticker.price,
+                "ask": ticker.ask,
+                "bid": ticker.bid,
+                "volume": ticker.volume
+            }
+            for product_id, ticker in tickers.items()
+        },
+        "errors": errors
+    }
+
+
+@app.get("/trading/book/{product_id}", tags=["Trading"])
+async def get_order_book(
+    product_id: str,
+    depth: int = 10,
+    side: str = None,  # BUY or SELL, with size: estimate a market order
+    size: float = None
+):
+    """Get the top `depth` levels of the live L2 order book"""
+    if order_books is None:
+        raise HTTPException(status_code=400, detail="Order book feed not configured")
+    
+    book = order_books.book(product_id)
+    if book is None:
+        raise HTTPException(status_code=503, detail=f"Order book for {product_id} not available")
+    
+    result = book.depth(max(depth, 0))
+    if side and size:
+        result["estimate"] = book.estimate_fill(side, size)
+    return result
+
+
+@app.get("/trading/candles/{product_id}", tags=["Trading"])
+async def get_candles(product_id: str, granularity: str = "1m", limit: int = 100):
+    """Get recent OHLCV candles aggregated from the live feed"""
+    if candles is None:
+        raise HTTPException(status_code=400, detail="Candle aggregation not configured")
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid granularity; use one of {', '.join(GRANULARITIES)}"
+        )
+    
+    bars = candles.candles(product_id, granularity, max(1, min(limit, candles.capacity)))
+    if bars is None:
+        raise HTTPException(status_code=404, detail=f"No candles for {product_id}")
+    
+    return {
+        "product_id": product_id,
+        "granularity": granularity,
+        "candles": [
+            {
+                "start": int(start),
+                "open": open_,
+                "high": high,
+                "low": low,
+                "close": close,
+                "volume": volume
+            }
+            for start, open_, high, low, close, volume in bars.tolist()
+        ]
+    }
+
+
+@app.get("/trading/indicators", tags=["Trading"])
+async def get_all_indicators(granularity: str = "1m"):
+    """Recompute indicators for every product in one vectorized pass"""
+    if indicators is None:
+        raise HTTPException(status_code=400, detail="Indicators not configured")
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"Invalid granularity; use one of {', '.join(GRANULARITIES)}")
+    
+    return {"granularity": granularity, "products": indicators.recompute(granularity)}
+
+
+@app.get("/trading/indicators/{product_id}", tags=["Trading"])
+async def get_indicators(product_id: str, granularity: str = "1m"):
+    """Get incrementally maintained indicators for a product"""
+    if indicators is None:
+        raise HTTPException(status_code=400, detail="Indicators not configured")
+    if granularity not in indicators.granularities:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Indicators are maintained for: {', '.join(sorted(indicators.granularities))}"
+        )
+    
+    values = indicators.get(product_id, granularity)
+    if values is None:
+        raise HTTPException(status_code=404, detail=f"No closed {granularity} bars for {product_id} yet")
+    return {"product_id": product_id, "granularity": granularity, **values}
+
+
 @app.get("/trading/orders", tags=["Trading"])
 async def get_orders(product_id: str = None, status: str = "OPEN"):
     """Get open orders"""
@@ -264,10 +727,13 @@ async def get_orders(product_id: str = None, status: str = "OPEN"):
         raise HTTPException(status_code=400, detail="Coinbase not configured")
     
     try:
-        orders = await coinbase_client.get_orders(
-            product_id=product_id,
-            order_status=status
-        )
+        if order_manager is not None and order_manager.live and status == "OPEN":
+            orders = order_manager.open_orders(product_id)
+        else:
+            orders = await coinbase_client.get_orders(
+                product_id=product_id,
+                order_status=status
+            )
         return {
             "orders": [
                 {
@@ -285,6 +751,31 @@ async def get_orders(product_id: str = None, status: str = "OPEN"):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/trading/orders/{order_id}", tags=["Trading"])
+async def get_order(order_id: str):
+    """Get a single order by id (or client order id when tracked locally)"""
+    if not config.coinbase.is_configured():
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    
+    try:
+        order = None
+        if order_manager is not None and order_manager.live:
+            order = order_manager.get(order_id) or order_manager.get_by_client_id(order_id)
+        if order is None:
+            order = await coinbase_client.get_order(order_id)
+        return {
+            "order_id": order.order_id,
+            "client_order_id": order.client_order_id,
+            "product_id": order.product_id,
+            "side": order.side,
+            "status": order.status,
+            "filled_size": order.filled_size,
+            "average_filled_price": order.average_filled_price
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.post("/trading/orders/market", tags=["Trading"])
 async def place_market_order(
     product_id: str,
@@ -302,6 +793,8 @@ async def place_market_order(
             side=order_side,
             quote_size=quote_size
         )
+        if order_manager is not None:
+            order_manager.apply(order)
         return {
             "order_id": order.order_id,
             "product_id": order.product_id,
@@ -332,6 +825,8 @@ async def place_limit_order(
             base_size=base_size,
             limit_price=limit_price
         )
+        if order_manager is not None:
+            order_manager.apply(order)
         return {
             "order_id": order.order_id,
             "product_id": order.product_id,
@@ -343,6 +838,95 @@ async def place_limit_order(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _order_requests(batch: BatchPlaceRequest) -> List[OrderRequest]:
+    """Convert a batch body into OrderRequests (400 on an unknown side or type)"""
+    try:
+        return [
+            OrderRequest(
+                product_id=order.product_id,
+                side=OrderSide[order.side.upper()],
+                order_type=OrderType[order.type.upper()],
+                base_size=order.base_size,
+                quote_size=order.quote_size,
+                limit_price=order.limit_price,
+                stop_price=order.stop_price
+            )
+            for order in batch.orders
+        ]
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid side or type: {e}")
+
+
+@app.post("/trading/orders/validate", tags=["Trading"])
+async def validate_orders(batch: BatchPlaceRequest):
+    """Check orders against product trading rules without sending them"""
+    if not config.coinbase.is_configured():
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    
+    requests = _order_requests(batch)
+    await asyncio.gather(*(
+        coinbase_client.get_rules(product_id)
+        for product_id in {request.product_id for request in requests}
+    ))
+    errors = coinbase_client.rules.validate_batch(requests)
+    
+    return {
+        "valid": all(error is None for error in errors),
+        "results": [{"valid": error is None, "error": error} for error in errors]
+    }
+
+
+@app.post("/trading/orders/batch", tags=["Trading"])
+async def place_orders(batch: BatchPlaceRequest):
+    """Place several orders concurrently (per-order results)"""
+    if not config.coinbase.is_configured():
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    
+    results = await coinbase_client.place_orders(_order_requests(batch))
+    
+    response = []
+    for result in results:
+        order = result['order']
+        if order is not None and order_manager is not None:
+            order_manager.apply(order)
+        response.append({
+            "success": result['success'],
+            "error": result['error'],
+            "order_id": order.order_id if order else None,
+            "product_id": order.product_id if order else None,
+            "status": order.status if order else None
+        })
+    
+    return {"results": response}
+
+
+@app.delete("/trading/orders/batch", tags=["Trading"])
+async def cancel_orders(batch: BatchCancelRequest):
+    """Cancel many orders via the exchange batch-cancel endpoint"""
+    if not config.coinbase.is_configured():
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    
+    results = await coinbase_client.cancel_orders(batch.order_ids)
+    return {"results": results}
+
+
+@app.delete("/trading/products/{product_id}/orders", tags=["Trading"])
+async def cancel_all_orders(product_id: str):
+    """Cancel every open order for a product"""
+    if not config.coinbase.is_configured():
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    
+    try:
+        if order_manager is not None and order_manager.live:
+            order_ids = [order.order_id for order in order_manager.open_orders(product_id)]
+            results = await coinbase_client.cancel_orders(order_ids)
+        else:
+            results = await coinbase_client.cancel_all_orders(product_id)
+        return {"product_id": product_id, "results": results}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.delete("/trading/orders/{order_id}", tags=["Trading"])
 async def cancel_order(order_id: str):
     """Cancel an order"""
@@ -376,6 +960,175 @@ async def get_fills(product_id: str = None, limit: int = 100):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/trading/fills/stream", tags=["Trading"])
+async def stream_fills(
+    product_id: str = None,
+    start: str = None,
+    end: str = None,
+    page_size: int = 250
+):
+    """Stream the full fill history as NDJSON (one fill per line)"""
+    if not config.coinbase.is_configured():
+        raise HTTPException(status_code=400, detail="Coinbase not configured")
+    
+    async def ndjson():
+        try:
+            async for fill in coinbase_client.iter_fills(
+                product_id=product_id,
+                page_size=page_size,
+                start=start,
+                end=end
+            ):
+                yield json_dumps(fill) + '\n'
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            yield json_dumps({"error": str(e)}) + '\n'
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@app.get("/trading/history/fills", tags=["Trading"])
+async def get_history_fills(
+    product_id: str = None,
+    order_id: str = None,
+    start: str = None,
+    end: str = None,
+    limit: int = 1000
+):
+    """Query locally stored fills (newest first)"""
+    if history is None:
+        raise HTTPException(status_code=400, detail="History store not configured")
+    
+    try:
+        fills = await asyncio.to_thread(history.fills, product_id, start, end, order_id, limit)
+        return {"fills": fills, "count": len(fills), "last_synced_at": history.last_synced_at}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/trading/history/orders", tags=["Trading"])
+async def get_history_orders(
+    product_id: str = None,
+    status: str = None,
+    start: str = None,
+    end: str = None,
+    limit: int = 1000
+):
+    """Query locally stored orders (newest first)"""
+    if history is None:
+        raise HTTPException(status_code=400, detail="History store not configured")
+    
+    try:
+        orders = await asyncio.to_thread(history.orders, product_id, status, start, end, limit)
+        return {"orders": orders, "count": len(orders), "last_synced_at": history.last_synced_at}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/trading/history/sync", tags=["Trading"])
+async def sync_history():
+    """Pull new fills and orders into the local store now"""
+    if history is None:
+        raise HTTPException(status_code=400, detail="History store not configured")
+    
+    try:
+        return {"success": True, "synced": await history.sync()}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/trading/portfolio", tags=["Trading"])
+async def get_portfolio(method: str = "fifo"):
+    """Get positions with cost basis and realized/unrealized P&L (method: fifo or average)"""
+    if portfolio is None:
+        raise HTTPException(status_code=400, detail="History store not configured")
+    
+    try:
+        await portfolio.refresh()
+        
+        # Marks come from the ticker feed; fetch any held product it does not cover
+        unmarked = [product_id for product_id in portfolio.held() if product_id not in portfolio.marks]
+        if unmarked:
+            tickers, _ = await coinbase_client.get_tickers(unmarked)
+            for product_id, ticker in tickers.items():
+                portfolio.mark(product_id, float(ticker.price))
+        
+        response = portfolio.snapshot(method)
+        response["last_synced_at"] = history.last_synced_at
+        return response
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ============================================================================
+# Profiling Endpoints
+# ============================================================================
+
+def _check_profiling(token: Optional[str]):
+    if profiler is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Profiling not enabled (PROFILING_ENABLED=true and PROFILING_TOKEN)"
+        )
+    if not token or not hmac.compare_digest(token.encode(), get_config().profiling.token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+def _profile_response(profile: Profile, format: str) -> Response:
+    if format == "svg":
+        return Response(profile.svg(), media_type="image/svg+xml")
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    if format == "json":
+        return JSONResponse(profile.summary())
+    raise HTTPException(status_code=400, detail="format must be collapsed, svg or json")
+
+
+@app.get("/admin/profile", tags=["Admin"])
+async def profile_event_loop(
+    seconds: float = 10.0,
+    format: str = "collapsed",
+    idle: bool = False,
+    x_profile_token: str = Header(None)
+):
+    """Sample the live event loop for N seconds; returns collapsed stacks, an SVG flamegraph or a JSON summary"""
+    _check_profiling(x_profile_token)
+    if not math.isfinite(seconds) or not 0 < seconds <= profiler.max_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds must be positive and at most {profiler.max_seconds:g}"
+        )
+    
+    profile = await profiler.profile(seconds, idle=idle)
+    return _profile_response(profile, format)
+
+
+@app.get("/admin/profile/requests", tags=["Admin"])
+async def list_request_profiles(x_profile_token: str = Header(None)):
+    """Profiler state and the recent per-request profiles (requests sent with an X-Profile header)"""
+    _check_profiling(x_profile_token)
+    return {
+        **profiler.stats(),
+        "profiles": {
+            profile_id: profile.summary() for profile_id, profile in profiler.recent.items()
+        }
+    }
+
+
+@app.get("/admin/profile/requests/{profile_id}", tags=["Admin"])
+async def get_request_profile(
+    profile_id: str,
+    format: str = "collapsed",
+    x_profile_token: str = Header(None)
+):
+    """One request's profile (id from its X-Profile-Id response header)"""
+    _check_profiling(x_profile_token)
+    profile = profiler.recent.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"No profile {profile_id}")
+    return _profile_response(profile, format)
+
+
 # ============================================================================
 # Root Endpoints
 # ============================================================================
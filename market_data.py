@@ -0,0 +1,250 @@
+"""
+Market Data Feed
+WebSocket subscription to exchange channels with an in-memory ticker store,
+automatic reconnect, sequence-gap detection and REST fallback.
+"""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Any
+
+import aiohttp
+
+from coinbase_client import CoinbaseTicker, json_loads
+from http_transport import HTTPTransport
+
+
+class SequenceGapError(Exception):
+    """Raised when a message arrives out of sequence"""
+    pass
+
+
+class TickerStore:
+    """Latest ticker per product, valid only while the feed is live"""
+    
+    def __init__(self):
+        self._tickers: Dict[str, CoinbaseTicker] = {}
+        self._updated_at: Dict[str, float] = {}
+        self.live = False
+    
+    def update(self, ticker: CoinbaseTicker):
+        self._tickers[ticker.product_id] = ticker
+        self._updated_at[ticker.product_id] = time.monotonic()
+    
+    def get(self, product_id: str) -> Optional[CoinbaseTicker]:
+        """Latest ticker, or None if unknown or the feed is down"""
+        if not self.live:
+            return None
+        return self._tickers.get(product_id)
+    
+    def age(self, product_id: str) -> Optional[float]:
+        """Seconds since the product was last updated"""
+        updated_at = self._updated_at.get(product_id)
+        return time.monotonic() - updated_at if updated_at is not None else None
+    
+    def clear(self):
+        """Drop all tickers (the next snapshot repopulates them)"""
+        self._tickers.clear()
+        self._updated_at.clear()
+    
+    def __len__(self) -> int:
+        return len(self._tickers)
+
+
+class MarketDataFeed:
+    """Coinbase Advanced Trade WebSocket feed"""
+    
+    WS_URL = 'wss://advanced-trade-ws.coinbase.com'
+    
+    def __init__(
+        self,
+        product_ids: Iterable[str],
+        transport: Optional[HTTPTransport] = None,
+        ws_url: Optional[str] = None,
+        rest_fallback: Optional[Callable[[str], Awaitable[CoinbaseTicker]]] = None,
+        channels: Iterable[str] = ('ticker', 'heartbeats'),
+        signer: Optional[Callable[[dict], dict]] = None,
+        private_channels: Iterable[str] = ('user',),
+        min_reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30.0,
+        heartbeat: float = 30.0
+    ):
+        self.product_ids = list(product_ids)
+        self.transport = transport or HTTPTransport()
+        self.ws_url = ws_url or self.WS_URL
+        self.rest_fallback = rest_fallback
+        self.channels = list(channels)
+        self.signer = signer
+        self.private_channels = set(private_channels)
+        self.min_reconnect_delay = min_reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.heartbeat = heartbeat
+        
+        self.tickers = TickerStore()
+        self._handlers: Dict[str, List[Callable[[dict], None]]] = {'ticker': [self._on_ticker]}
+        self._disconnect_handlers: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._last_sequence: Optional[int] = None
+        self._connected = asyncio.Event()
+        
+        # Counters
+        self.connects = 0
+        self.disconnects = 0
+        self.sequence_gaps = 0
+        self.messages = 0
+        self.rest_fallbacks = 0
+        self.handler_errors: Dict[str, int] = {}
+        self.last_error: Optional[str] = None
+    
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+    
+    def add_handler(self, channel: str, handler: Callable[[dict], None]):
+        """Call `handler(message)` for every message on `channel`"""
+        self._handlers.setdefault(channel, []).append(handler)
+    
+    def add_disconnect_handler(self, handler: Callable[[], None]):
+        """Call `handler()` whenever the feed goes down (state built from it is stale)"""
+        self._disconnect_handlers.append(handler)
+    
+    async def start(self):
+        """Connect and keep the feed running in the background"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+    
+    async def stop(self):
+        """Disconnect and stop reconnecting"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._mark_down()
+    
+    async def wait_connected(self, timeout: Optional[float] = None):
+        """Wait until the feed has (re)connected"""
+        await asyncio.wait_for(self._connected.wait(), timeout)
+    
+    async def get_ticker(self, product_id: str) -> CoinbaseTicker:
+        """Latest ticker from memory, falling back to REST"""
+        ticker = self.tickers.get(product_id)
+        if ticker is not None:
+            return ticker
+        if self.rest_fallback is None:
+            raise Exception(f"No live ticker for {product_id}")
+        self.rest_fallbacks += 1
+        return await self.rest_fallback(product_id)
+    
+    def _subscribe_messages(self) -> List[dict]:
+        messages = []
+        for channel in self.channels:
+            message = {'type': 'subscribe', 'product_ids': self.product_ids, 'channel': channel}
+            if channel in self.private_channels:
+                if self.signer is None:
+                    raise Exception(f"Channel '{channel}' requires a signer")
+                message = self.signer(message)
+            messages.append(message)
+        return messages
+    
+    async def _run(self):
+        delay = self.min_reconnect_delay
+        while True:
+            connects = self.connects
+            try:
+                await self._connect_and_consume()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            finally:
+                self._mark_down()
+            
+            if self.connects != connects:
+                # The connection was healthy for a while; start backing off afresh
+                delay = self.min_reconnect_delay
+            
+            # Exponential backoff with full jitter
+            await asyncio.sleep(random.uniform(0, delay))
+            delay = min(delay * 2, self.max_reconnect_delay)
+    
+    async def _connect_and_consume(self):
+        session = await self.transport.get_session()
+        async with session.ws_connect(self.ws_url, heartbeat=self.heartbeat) as ws:
+            for message in self._subscribe_messages():
+                await ws.send_json(message)
+            
+            self._last_sequence = None
+            self.connects += 1
+            self.tickers.live = True
+            self._connected.set()
+            
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    self._dispatch(json_loads(msg.data))
+                elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+    
+    def _dispatch(self, message: dict):
+        sequence = message.get('sequence_num')
+        if sequence is not None:
+            if self._last_sequence is not None and sequence != self._last_sequence + 1:
+                self.sequence_gaps += 1
+                raise SequenceGapError(f"Expected sequence {self._last_sequence + 1}, got {sequence}")
+            self._last_sequence = sequence
+        
+        self.messages += 1
+        for handler in self._handlers.get(message.get('channel'), ()):
+            self._call_handler(handler, message)
+    
+    def _call_handler(self, handler: Callable, *args):
+        try:
+            handler(*args)
+        except Exception as e:
+            # A failing consumer must not drop the socket for everyone else
+            name = getattr(handler, '__qualname__', repr(handler))
+            self.handler_errors[name] = self.handler_errors.get(name, 0) + 1
+            self.last_error = f"{name}: {type(e).__name__}: {e}"
+    
+    def _mark_down(self):
+        if self._connected.is_set():
+            self.disconnects += 1
+        self._connected.clear()
+        self.tickers.live = False
+        self.tickers.clear()
+        for handler in self._disconnect_handlers:
+            self._call_handler(handler)
+    
+    def _on_ticker(self, message: dict):
+        timestamp = message.get('timestamp', '')
+        for event in message.get('events', []):
+            for ticker_data in event.get('tickers', []):
+                self.tickers.update(CoinbaseTicker(
+                    product_id=ticker_data['product_id'],
+                    price=ticker_data.get('price', '0'),
+                    time=timestamp,
+                    trade_id=ticker_data.get('trade_id', ''),
+                    ask=ticker_data.get('best_ask', '0'),
+                    bid=ticker_data.get('best_bid', '0'),
+                    volume=ticker_data.get('volume_24_h', '0')
+                ))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Connection and message counters"""
+        return {
+            'url': self.ws_url,
+            'connected': self.connected,
+            'products': self.product_ids,
+            'channels': self.channels,
+            'tickers': len(self.tickers),
+            'connects': self.connects,
+            'disconnects': self.disconnects,
+            'sequence_gaps': self.sequence_gaps,
+            'messages': self.messages,
+            'rest_fallbacks': self.rest_fallbacks,
+            'handler_errors': dict(self.handler_errors),
+            'last_error': self.last_error
+        }
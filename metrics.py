@@ -0,0 +1,253 @@
+"""
+Metrics
+Request/error counters, latency histograms and in-flight gauges for the
+API routes and for upstream (Coinbase, Graph) calls, rendered in the
+Prometheus text exposition format.
+"""
+
+import asyncio
+import bisect
+import time
+from typing import Any, Dict, Iterable, List
+
+
+# Seconds; Prometheus' defaults extended down to 100us for local hops
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram (per-bucket counts; cumulated when rendered)"""
+    __slots__ = ('bounds', 'counts', 'sum')
+    
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+    
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class UpstreamCall:
+    """
+    Times one upstream call and counts it in flight while it runs
+    Set `status` once the response arrives; calls that raise before then
+    are recorded as 'error' (or 'cancelled', e.g. a losing hedge).
+    """
+    __slots__ = ('metrics', 'service', 'method', 'endpoint', 'status', 'start')
+    
+    def __init__(self, metrics: 'Metrics', service: str, method: str, endpoint: str):
+        self.metrics = metrics
+        self.service = service
+        self.method = method
+        self.endpoint = endpoint
+        self.status: Any = None
+        self.start = 0.0
+    
+    async def __aenter__(self) -> 'UpstreamCall':
+        in_flight = self.metrics.upstream_in_flight
+        in_flight[self.service] = in_flight.get(self.service, 0) + 1
+        self.start = time.perf_counter()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        status = self.status
+        if status is None:
+            status = 'cancelled' if exc_type is asyncio.CancelledError else 'error'
+        self.metrics.upstream_in_flight[self.service] -= 1
+        self.metrics.observe_upstream(
+            self.service, self.method, self.endpoint, status, time.perf_counter() - self.start
+        )
+
+
+class _NullCall:
+    """Stands in for UpstreamCall when no registry is configured"""
+    __slots__ = ('status',)
+    
+    async def __aenter__(self) -> '_NullCall':
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
+NULL_CALL = _NullCall()
+
+
+def _labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return ','.join(pairs)
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """In-process registry for route and upstream metrics"""
+    
+    REQUEST_LABELS = ('method', 'route')
+    UPSTREAM_LABELS = ('service', 'method', 'endpoint')
+    
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        
+        # (method, route, status) -> count; (method, route) -> errors / histogram
+        self.requests: Dict[tuple, int] = {}
+        self.request_errors: Dict[tuple, int] = {}
+        self.request_latency: Dict[tuple, Histogram] = {}
+        self.requests_in_flight = 0
+        
+        # (service, method, endpoint, status) -> count; (service, method, endpoint) -> histogram
+        self.upstream_calls: Dict[tuple, int] = {}
+        self.upstream_latency: Dict[tuple, Histogram] = {}
+        self.upstream_in_flight: Dict[str, int] = {}
+        
+        self.started_at = time.time()
+    
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        """Count a handled API request (status >= 400 also counts as an error)"""
+        key = (method, route)
+        histogram = self.request_latency.get(key)
+        if histogram is None:
+            histogram = self.request_latency[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+        
+        counted = (method, route, status)
+        self.requests[counted] = self.requests.get(counted, 0) + 1
+        if status >= 400:
+            self.request_errors[key] = self.request_errors.get(key, 0) + 1
+    
+    def upstream(self, service: str, method: str, endpoint: str) -> UpstreamCall:
+        """Context manager timing one upstream call"""
+        return UpstreamCall(self, service, method, endpoint)
+    
+    def observe_upstream(self, service: str, method: str, endpoint: str, status: Any, seconds: float):
+        key = (service, method, endpoint)
+        histogram = self.upstream_latency.get(key)
+        if histogram is None:
+            histogram = self.upstream_latency[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+        
+        counted = (service, method, endpoint, status)
+        self.upstream_calls[counted] = self.upstream_calls.get(counted, 0) + 1
+    
+    # Exposition
+    
+    def _counter(self, lines: List[str], name: str, help_text: str, labels: tuple, values: Dict[tuple, int]):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for key, value in values.items():
+            lines.append(f'{name}{{{_labels(labels, key)}}} {value}')
+    
+    def _histogram(self, lines: List[str], name: str, help_text: str, labels: tuple, values: Dict[tuple, Histogram]):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        bounds = [_number(bound) for bound in self.buckets] + ['+Inf']
+        for key, histogram in values.items():
+            label_text = _labels(labels, key)
+            cumulative = 0
+            for bound, count in zip(bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{label_text}}} {_number(histogram.sum)}')
+            lines.append(f'{name}_count{{{label_text}}} {cumulative}')
+    
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        self._counter(
+            lines, 'http_requests_total', 'API requests handled',
+            self.REQUEST_LABELS + ('status',), self.requests
+        )
+        self._counter(
+            lines, 'http_request_errors_total', 'API requests answered with status >= 400',
+            self.REQUEST_LABELS, self.request_errors
+        )
+        self._histogram(
+            lines, 'http_request_duration_seconds', 'API request latency',
+            self.REQUEST_LABELS, self.request_latency
+        )
+        lines.append('# HELP http_requests_in_flight API requests being handled')
+        lines.append('# TYPE http_requests_in_flight gauge')
+        lines.append(f'http_requests_in_flight {self.requests_in_flight}')
+        
+        self._counter(
+            lines, 'upstream_requests_total', 'Upstream calls by response status (error/cancelled without one)',
+            self.UPSTREAM_LABELS + ('status',), self.upstream_calls
+        )
+        self._histogram(
+            lines, 'upstream_request_duration_seconds', 'Upstream call latency',
+            self.UPSTREAM_LABELS, self.upstream_latency
+        )
+        lines.append('# HELP upstream_requests_in_flight Upstream calls awaiting a response')
+        lines.append('# TYPE upstream_requests_in_flight gauge')
+        for service, value in self.upstream_in_flight.items():
+            lines.append(f'upstream_requests_in_flight{{{_labels(("service",), (service,))}}} {value}')
+        
+        lines.append('# HELP process_start_time_seconds Start time of the process since unix epoch')
+        lines.append('# TYPE process_start_time_seconds gauge')
+        lines.append(f'process_start_time_seconds {_number(self.started_at)}')
+        return '\n'.join(lines) + '\n'
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'routes': len(self.request_latency),
+            'requests': sum(self.requests.values()),
+            'request_errors': sum(self.request_errors.values()),
+            'requests_in_flight': self.requests_in_flight,
+            'upstream_endpoints': len(self.upstream_latency),
+            'upstream_calls': sum(self.upstream_calls.values()),
+            'upstream_in_flight': dict(self.upstream_in_flight)
+        }
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording every HTTP request into a Metrics registry
+    Requests are labelled by route template (e.g. /trading/ticker/{product_id})
+    so ids do not explode the label set; unrouted paths share 'unmatched'.
+    """
+    
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        
+        status = 500  # If the app raises before responding
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+        
+        metrics = self.metrics
+        metrics.requests_in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.requests_in_flight -= 1
+            route = scope.get('route')
+            metrics.observe_request(
+                scope['method'],
+                getattr(route, 'path', 'unmatched'),
+                status,
+                time.perf_counter() - start
+            )
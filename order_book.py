@@ -0,0 +1,203 @@
+"""
+Level-2 Order Book
+Per-product price-level books built from the level2 WebSocket channel
+(snapshot + incremental updates), with depth, spread and slippage queries.
+"""
+
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Any
+
+
+class BookSide:
+    """
+    One side of the book: a sorted array of price levels plus a size map.
+    Lookups are O(log n) bisects; top-k reads are O(k) slices.
+    """
+    __slots__ = ('prices', 'sizes', 'descending')
+    
+    def __init__(self, descending: bool):
+        self.prices: List[float] = []
+        self.sizes: Dict[float, float] = {}
+        self.descending = descending
+    
+    def update(self, price: float, size: float):
+        """Set the size at a price level (size 0 removes the level)"""
+        sizes = self.sizes
+        if size == 0:
+            if price in sizes:
+                del sizes[price]
+                prices = self.prices
+                del prices[bisect_left(prices, price)]
+        else:
+            if price not in sizes:
+                insort(self.prices, price)
+            sizes[price] = size
+    
+    def clear(self):
+        self.prices.clear()
+        self.sizes.clear()
+    
+    def best(self) -> Optional[float]:
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.descending else self.prices[0]
+    
+    def top(self, depth: int) -> List[tuple]:
+        """Best `depth` levels as (price, size), best first"""
+        if self.descending:
+            levels = self.prices[:-depth - 1:-1] if depth else []
+        else:
+            levels = self.prices[:depth]
+        sizes = self.sizes
+        return [(price, sizes[price]) for price in levels]
+    
+    def levels(self):
+        """Iterate every level best first"""
+        prices = reversed(self.prices) if self.descending else self.prices
+        sizes = self.sizes
+        for price in prices:
+            yield price, sizes[price]
+    
+    def __len__(self) -> int:
+        return len(self.prices)
+
+
+class L2OrderBook:
+    """Aggregated price-level order book for one product"""
+    
+    def __init__(self, product_id: str):
+        self.product_id = product_id
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.initialized = False
+        self.updates = 0
+        self.updated_at: Optional[float] = None
+    
+    def _side(self, side: str) -> BookSide:
+        return self.bids if side in ('bid', 'buy', 'BUY') else self.asks
+    
+    def apply_snapshot(self, levels: List[tuple]):
+        """Replace the book with `(side, price, size)` levels"""
+        self.bids.clear()
+        self.asks.clear()
+        for side, price, size in levels:
+            self._side(side).update(price, size)
+        self.initialized = True
+        self.updated_at = time.monotonic()
+    
+    def apply_update(self, side: str, price: float, size: float):
+        """Apply one incremental level update"""
+        self._side(side).update(price, size)
+        self.updates += 1
+        self.updated_at = time.monotonic()
+    
+    def best_bid(self) -> Optional[float]:
+        return self.bids.best()
+    
+    def best_ask(self) -> Optional[float]:
+        return self.asks.best()
+    
+    def spread(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return ask - bid
+    
+    def mid(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+    
+    def depth(self, levels: int = 10) -> Dict[str, Any]:
+        """Top `levels` price levels per side"""
+        return {
+            'product_id': self.product_id,
+            'bids': self.bids.top(levels),
+            'asks': self.asks.top(levels),
+            'spread': self.spread(),
+            'mid': self.mid()
+        }
+    
+    def estimate_fill(self, side: str, size: float) -> Dict[str, Any]:
+        """
+        Walk the opposite side to estimate a market order of `size` (base units)
+        Returns average price, slippage vs. the touch, and any unfilled size.
+        """
+        book_side = self.asks if side.upper() == 'BUY' else self.bids
+        touch = book_side.best()
+        remaining = size
+        cost = 0.0
+        for price, level_size in book_side.levels():
+            take = level_size if level_size < remaining else remaining
+            cost += take * price
+            remaining -= take
+            if remaining <= 0:
+                break
+        
+        filled = size - remaining
+        average = cost / filled if filled else None
+        slippage = None
+        if average is not None and touch:
+            slippage = abs(average - touch) / touch
+        return {
+            'filled': filled,
+            'unfilled': max(remaining, 0.0),
+            'average_price': average,
+            'slippage': slippage
+        }
+
+
+class OrderBookManager:
+    """Maintains an L2OrderBook per product from level2 channel messages"""
+    
+    CHANNEL = 'l2_data'
+    
+    def __init__(self):
+        self.books: Dict[str, L2OrderBook] = {}
+    
+    def book(self, product_id: str) -> Optional[L2OrderBook]:
+        """The product's book, or None until its snapshot has arrived"""
+        book = self.books.get(product_id)
+        if book is None or not book.initialized:
+            return None
+        return book
+    
+    def reset(self):
+        """Mark every book stale (e.g. after a disconnect)"""
+        for book in self.books.values():
+            book.initialized = False
+    
+    def on_message(self, message: dict):
+        """Handle one `l2_data` message from the market-data feed"""
+        for event in message.get('events', []):
+            product_id = event['product_id']
+            book = self.books.get(product_id)
+            if book is None:
+                book = self.books[product_id] = L2OrderBook(product_id)
+            
+            updates = event.get('updates', [])
+            if event.get('type') == 'snapshot':
+                book.apply_snapshot([
+                    (update['side'], float(update['price_level']), float(update['new_quantity']))
+                    for update in updates
+                ])
+            elif book.initialized:
+                bids, asks = book.bids, book.asks
+                for update in updates:
+                    side = bids if update['side'] == 'bid' else asks
+                    side.update(float(update['price_level']), float(update['new_quantity']))
+                book.updates += len(updates)
+                book.updated_at = time.monotonic()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            product_id: {
+                'initialized': book.initialized,
+                'bid_levels': len(book.bids),
+                'ask_levels': len(book.asks),
+                'updates': book.updates
+            }
+            for product_id, book in self.books.items()
+        }
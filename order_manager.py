@@ -0,0 +1,249 @@
+"""
+Order Manager
+Live local order state seeded from REST and kept current by the
+authenticated `user` WebSocket channel, with periodic REST reconciliation.
+"""
+
+import asyncio
+import dataclasses
+import time
+from typing import Dict, List, Optional, Set, Any
+
+from coinbase_client import CoinbaseClient, CoinbaseOrder, LazyModel
+from market_data import MarketDataFeed
+
+
+class OrderManager:
+    """In-memory order book-keeping indexed by order id, client order id and product"""
+    
+    CHANNEL = 'user'
+    OPEN_STATUSES = frozenset(('OPEN', 'PENDING', 'QUEUED'))
+    TERMINAL_STATUSES = frozenset(('FILLED', 'CANCELLED', 'EXPIRED', 'FAILED'))
+    
+    def __init__(
+        self,
+        client: CoinbaseClient,
+        feed: Optional[MarketDataFeed] = None,
+        reconcile_interval: float = 60.0,
+        stale_retry_interval: float = 1.0
+    ):
+        self.client = client
+        self.feed = feed
+        self.reconcile_interval = reconcile_interval
+        self.stale_retry_interval = stale_retry_interval
+        
+        self.orders: Dict[str, CoinbaseOrder] = {}
+        self._by_client_id: Dict[str, str] = {}
+        self._by_product: Dict[str, Set[str]] = {}
+        self._open: Set[str] = set()
+        self._event_marks: Dict[str, int] = {}  # Order id -> `events` count at its latest event
+        
+        self._synced = False
+        self._stale = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        
+        # Counters
+        self.events = 0
+        self.reconciliations = 0
+        self.reconcile_corrections = 0
+        self.superseded_reads = 0
+        self.last_reconciled_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+    
+    @property
+    def live(self) -> bool:
+        """Whether local state can answer queries without REST"""
+        return self._synced and (self.feed is None or self.feed.connected)
+    
+    async def start(self):
+        """Seed from REST and start the reconciliation loop"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._synced = False
+    
+    def mark_stale(self):
+        """Events may have been missed (feed disconnect); reconcile before serving again"""
+        self._synced = False
+        self._stale.set()
+    
+    async def _run(self):
+        while True:
+            if self.feed is not None and not self.feed.connected:
+                # Events sent while disconnected are lost; wait for the feed first
+                await self.feed.wait_connected()
+            
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            
+            # Reconcile periodically, immediately after a disconnect, and
+            # retry soon after a failure
+            interval = self.reconcile_interval if self._synced else self.stale_retry_interval
+            try:
+                await asyncio.wait_for(self._stale.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._stale.clear()
+    
+    async def reconcile(self):
+        """Compare local open orders with REST and correct any drift"""
+        async with self._lock:
+            # Events keep arriving while REST calls are in flight; rows read
+            # before an order's latest event must not overwrite it
+            listed_at = self.events
+            remote = await self.client.get_all_orders(order_status='OPEN')
+            remote_ids = set()
+            for order in remote:
+                remote_ids.add(order.order_id)
+                if self._superseded(order, listed_at):
+                    continue
+                if self._differs(order):
+                    self.reconcile_corrections += 1
+                self.apply(order)
+            
+            # Orders we think are open but the exchange no longer lists
+            for order_id in list(self._open - remote_ids):
+                if self._event_marks.get(order_id, 0) > listed_at:
+                    continue  # Placed or updated since the listing was read
+                self.reconcile_corrections += 1
+                read_at = self.events
+                try:
+                    order = await self.client.get_order(order_id)
+                except Exception:
+                    if self._event_marks.get(order_id, 0) <= read_at:
+                        self._set_status(order_id, 'UNKNOWN')
+                    continue
+                if not self._superseded(order, read_at):
+                    self.apply(order)
+            
+            self.reconciliations += 1
+            self.last_reconciled_at = time.time()
+            self._synced = True
+    
+    def apply(self, order: CoinbaseOrder):
+        """Insert or replace an order and update the indexes"""
+        if isinstance(order, LazyModel):
+            order = order.materialize()
+        if not order.order_id:
+            return
+        
+        self.orders[order.order_id] = order
+        if order.client_order_id:
+            self._by_client_id[order.client_order_id] = order.order_id
+        self._by_product.setdefault(order.product_id, set()).add(order.order_id)
+        
+        if order.status in self.OPEN_STATUSES:
+            self._open.add(order.order_id)
+        else:
+            self._open.discard(order.order_id)
+    
+    def _differs(self, order: CoinbaseOrder) -> bool:
+        local = self.orders.get(order.order_id)
+        return local is None or (
+            local.status != order.status or local.filled_size != order.filled_size
+        )
+    
+    def _superseded(self, order: CoinbaseOrder, read_at: int) -> bool:
+        """Whether local state is newer than a REST read started after `read_at` events"""
+        local = self.orders.get(order.order_id)
+        if self._event_marks.get(order.order_id, 0) > read_at or (
+            local is not None and local.status in self.TERMINAL_STATUSES
+            and order.status not in self.TERMINAL_STATUSES
+        ):
+            self.superseded_reads += 1
+            return True
+        return False
+    
+    def _set_status(self, order_id: str, status: str):
+        order = self.orders.get(order_id)
+        if order is not None:
+            order.status = status
+            self._open.discard(order_id)
+    
+    def on_message(self, message: dict):
+        """Handle one `user` channel message from the market-data feed"""
+        for event in message.get('events', []):
+            for update in event.get('orders', []):
+                self.events += 1
+                self._event_marks[update['order_id']] = self.events
+                self._apply_event(update)
+    
+    def _apply_event(self, update: dict):
+        order_id = update['order_id']
+        order = self.orders.get(order_id)
+        if order is None:
+            order = CoinbaseOrder(
+                order_id=order_id,
+                product_id=update.get('product_id', ''),
+                user_id='',
+                order_configuration={},
+                side=update.get('order_side', ''),
+                type=update.get('order_type', ''),
+                time_in_force=update.get('time_in_force', ''),
+                post_only=False,
+                creation_time=update.get('creation_time', ''),
+                completion_time=None,
+                order_type=update.get('order_type', ''),
+                filled_size='0',
+                average_filled_price='0',
+                fee='0',
+                number_of_fills=0,
+                filled_value='0',
+                pending_cancel_reason=None,
+                reject_reason=None,
+                settled=False,
+                status='',
+                client_order_id=update.get('client_order_id', '')
+            )
+        else:
+            order = dataclasses.replace(order)
+        
+        order.status = update.get('status', order.status)
+        order.filled_size = update.get('cumulative_quantity', order.filled_size)
+        order.average_filled_price = update.get('avg_price', order.average_filled_price)
+        order.fee = update.get('total_fees', order.fee)
+        if update.get('client_order_id'):
+            order.client_order_id = update['client_order_id']
+        self.apply(order)
+    
+    def get(self, order_id: str) -> Optional[CoinbaseOrder]:
+        return self.orders.get(order_id)
+    
+    def get_by_client_id(self, client_order_id: str) -> Optional[CoinbaseOrder]:
+        order_id = self._by_client_id.get(client_order_id)
+        return self.orders.get(order_id) if order_id else None
+    
+    def open_orders(self, product_id: Optional[str] = None) -> List[CoinbaseOrder]:
+        """Open orders, optionally for one product"""
+        if product_id is None:
+            ids = self._open
+        else:
+            ids = self._by_product.get(product_id, set()) & self._open
+        return [self.orders[order_id] for order_id in ids]
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'live': self.live,
+            'orders': len(self.orders),
+            'open': len(self._open),
+            'products': len(self._by_product),
+            'events': self.events,
+            'reconciliations': self.reconciliations,
+            'reconcile_corrections': self.reconcile_corrections,
+            'superseded_reads': self.superseded_reads,
+            'last_reconciled_at': self.last_reconciled_at,
+            'last_error': self.last_error
+        }
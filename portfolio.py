@@ -0,0 +1,377 @@
+"""
+Positions and P&L
+Per-product positions with FIFO and average cost basis, realized and
+unrealized P&L, rebuilt from the fills history with NumPy and kept current
+incrementally as new fills and ticker prices arrive.
+"""
+
+import asyncio
+import time
+from collections import defaultdict, deque
+from itertools import count
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from history_store import HistoryStore
+
+
+# Positions at or below this many base units count as flat
+EPSILON = 1e-9
+
+# Fill columns read from the history store for a rebuild
+FILL_COLUMNS = ('product_id', 'side', 'price', 'size', 'size_in_quote', 'commission', 'trade_ts')
+
+# One record per fill row; NULL numbers come through as NaN
+FILL_DTYPE = np.dtype([
+    ('product_id', object), ('side', 'U4'), ('price', 'f8'), ('size', 'f8'),
+    ('size_in_quote', 'U5'), ('commission', 'f8'), ('trade_ts', 'f8')
+])
+
+METHODS = ('fifo', 'average')
+
+
+def _base_size(price: float, size: float, size_in_quote: Any) -> float:
+    """Fill size in base units (some fills are sized in the quote currency)"""
+    if size_in_quote in (True, 'true') and price:
+        return size / price
+    return size
+
+
+class ProductBook:
+    """Position and cost basis for one product, updated one fill at a time"""
+    __slots__ = (
+        'product_id', 'lots', 'position', 'fifo_cost', 'average_cost',
+        'realized_fifo', 'realized_average', 'fees', 'unmatched', 'fills', 'last_ts'
+    )
+    
+    def __init__(self, product_id: str):
+        self.product_id = product_id
+        self.lots = deque()  # Open buy lots as [size, price], oldest first
+        self.position = 0.0
+        self.fifo_cost = 0.0
+        self.average_cost = 0.0
+        self.realized_fifo = 0.0
+        self.realized_average = 0.0
+        self.fees = 0.0
+        self.unmatched = 0.0  # Sold size with no recorded buy to match
+        self.fills = 0
+        self.last_ts = 0.0
+    
+    def apply(self, side: str, price: float, size: float, commission: float = 0.0, trade_ts: float = 0.0):
+        """Apply one fill (size in base units)"""
+        self.fills += 1
+        self.fees += commission
+        if trade_ts > self.last_ts:
+            self.last_ts = trade_ts
+        
+        if side == 'BUY':
+            self.lots.append([size, price])
+            self.position += size
+            self.fifo_cost += size * price
+            self.average_cost += size * price
+            return
+        
+        matched = min(size, self.position)
+        self.unmatched += size - matched
+        if matched <= 0:
+            return
+        
+        # FIFO: consume the oldest lots first
+        remaining, removed = matched, 0.0
+        lots = self.lots
+        while remaining > EPSILON and lots:
+            lot = lots[0]
+            if lot[0] <= remaining:
+                removed += lot[0] * lot[1]
+                remaining -= lot[0]
+                lots.popleft()
+            else:
+                removed += remaining * lot[1]
+                lot[0] -= remaining
+                remaining = 0.0
+                if lot[0] <= EPSILON:
+                    lots.popleft()
+        self.realized_fifo += matched * price - removed
+        self.fifo_cost -= removed
+        
+        # Average cost: the sold fraction takes the same fraction of the cost
+        removed = self.average_cost * matched / self.position
+        self.realized_average += matched * price - removed
+        self.average_cost -= removed
+        
+        self.position -= matched
+        if self.position <= EPSILON:
+            self.position = self.fifo_cost = self.average_cost = 0.0
+            lots.clear()
+    
+    def cost_basis(self, method: str) -> float:
+        return self.fifo_cost if method == 'fifo' else self.average_cost
+    
+    def realized(self, method: str) -> float:
+        return self.realized_fifo if method == 'fifo' else self.realized_average
+
+
+def replay(
+    product_id: str,
+    buy: np.ndarray,
+    price: np.ndarray,
+    size: np.ndarray,
+    commission: np.ndarray,
+    trade_ts: np.ndarray
+) -> ProductBook:
+    """
+    Build a product's book from all of its fills (time order) with array operations
+    FIFO cost comes from cumulative buy sizes/costs: selling x units in total
+    consumes the cost of the first x units bought, found with one searchsorted.
+    Average cost follows C[t] = r[t] * C[t-1] + bought[t], solved as
+    R * cumsum(bought / R) with R = cumprod(r) in log space, restarting at
+    every point the position goes flat. Falls back to the per-fill loop when a
+    sell exceeds the position or the log scale would underflow.
+    """
+    book = ProductBook(product_id)
+    total = len(size)
+    if not total:
+        return book
+    
+    signed = np.where(buy, size, -size)
+    position = np.cumsum(signed)
+    if position.min() < -EPSILON:
+        return _replay_loop(book, buy, price, size, commission, trade_ts)
+    
+    sell = ~buy
+    before = position - signed
+    flat = sell & (position <= EPSILON)
+    
+    # Average cost: r = share of the position kept by each sell (1 for buys)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kept = np.where(sell & ~flat, position / before, 1.0)
+        log_kept = np.log(kept)
+    if not np.isfinite(log_kept).all():
+        return _replay_loop(book, buy, price, size, commission, trade_ts)
+    
+    # Segment s starts after the s-th flat point; each restarts from zero cost
+    segment = np.cumsum(flat) - flat
+    starts = np.flatnonzero(np.r_[True, segment[1:] != segment[:-1]])
+    log_scale = np.cumsum(log_kept)
+    log_scale -= (log_scale[starts] - log_kept[starts])[segment]
+    if log_scale.min() < -600:
+        return _replay_loop(book, buy, price, size, commission, trade_ts)
+    
+    bought = np.where(buy, size * price, 0.0)
+    scaled = np.cumsum(bought * np.exp(-log_scale))
+    scaled -= (scaled[starts] - bought[starts] * np.exp(-log_scale[starts]))[segment]
+    average_cost = np.exp(log_scale) * scaled
+    average_cost[flat] = 0.0
+    
+    cost_before = np.r_[0.0, average_cost[:-1]]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        released = np.where(sell & (before > EPSILON), cost_before * size / before, 0.0)
+    proceeds = float((size * price)[sell].sum())
+    book.realized_average = proceeds - float(released[sell].sum())
+    book.average_cost = float(average_cost[-1])
+    
+    # FIFO: cost of the first `sold` units bought
+    buy_size, buy_price = size[buy], price[buy]
+    cum_size = np.cumsum(buy_size)
+    cum_cost = np.cumsum(buy_size * buy_price)
+    sold = float(size[sell].sum())
+    if len(buy_size):
+        lot = min(int(np.searchsorted(cum_size, sold, 'right')), len(buy_size) - 1)
+        prev_size = cum_size[lot - 1] if lot else 0.0
+        prev_cost = cum_cost[lot - 1] if lot else 0.0
+        consumed = prev_cost + (sold - prev_size) * buy_price[lot]
+        book.realized_fifo = proceeds - float(consumed)
+        book.fifo_cost = float(cum_cost[-1] - consumed)
+        if not flat[-1] and position[-1] > EPSILON:
+            first = cum_size[lot] - sold
+            if first > EPSILON:
+                book.lots.append([float(first), float(buy_price[lot])])
+            book.lots.extend(map(list, zip(buy_size[lot + 1:].tolist(), buy_price[lot + 1:].tolist())))
+    
+    book.position = float(position[-1])
+    if flat[-1] or book.position <= EPSILON:
+        book.position = book.fifo_cost = book.average_cost = 0.0
+        book.lots.clear()
+    book.fees = float(commission.sum())
+    book.fills = total
+    book.last_ts = float(trade_ts.max())
+    return book
+
+
+def _replay_loop(book, buy, price, size, commission, trade_ts) -> ProductBook:
+    for i in range(len(size)):
+        book.apply(
+            'BUY' if buy[i] else 'SELL',
+            float(price[i]), float(size[i]), float(commission[i]), float(trade_ts[i])
+        )
+    return book
+
+
+class Portfolio:
+    """Positions and P&L for every traded product, backed by the history store"""
+    
+    def __init__(self, store: 'HistoryStore'):
+        self.store = store
+        self.books: Dict[str, ProductBook] = {}
+        self.marks: Dict[str, float] = {}
+        self.stale = True  # Rebuild from the store before the next snapshot
+        self._rebuild_lock = asyncio.Lock()
+        
+        # Counters
+        self.rebuilds = 0
+        self.fills_applied = 0
+        self.out_of_order = 0
+        self.last_rebuild_seconds: Optional[float] = None
+        
+        store.add_fill_listener(self.apply_fills)
+    
+    async def refresh(self):
+        """Rebuild from the stored fills if anything arrived out of order since"""
+        async with self._rebuild_lock:
+            if not self.stale:
+                return
+            # No sync can notify new fills between the read and the rebuild
+            async with self.store.sync_lock:
+                rows = await asyncio.to_thread(self.store.fill_rows, FILL_COLUMNS)
+                await asyncio.to_thread(self.rebuild, rows)
+    
+    def rebuild(self, rows: List[tuple]):
+        """Replace every book from (FILL_COLUMNS) tuples in trade time order"""
+        self.rebuild_from_array(np.array(rows, dtype=FILL_DTYPE))
+    
+    def rebuild_from_array(self, fills: np.ndarray):
+        """Replace every book from a FILL_DTYPE array in trade time order"""
+        started = time.perf_counter()
+        books: Dict[str, ProductBook] = {}
+        if len(fills):
+            price = np.nan_to_num(fills['price'])
+            size = np.nan_to_num(fills['size'])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                size = np.where((fills['size_in_quote'] == 'true') & (price > 0), size / price, size)
+            buy = fills['side'] == 'BUY'
+            commission = np.nan_to_num(fills['commission'])
+            trade_ts = np.nan_to_num(fills['trade_ts'])
+            
+            # Group by product, keeping time order within each group
+            ids = defaultdict(count().__next__)  # product id -> code, in first-seen order
+            codes = np.fromiter(map(ids.__getitem__, fills['product_id'].tolist()), np.int64, len(fills))
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(ids) + 1))
+            for code, pid in enumerate(ids):
+                index = order[bounds[code]:bounds[code + 1]]
+                books[pid] = replay(
+                    pid, buy[index], price[index], size[index], commission[index], trade_ts[index]
+                )
+        
+        self.books = books
+        self.stale = False
+        self.rebuilds += 1
+        self.last_rebuild_seconds = time.perf_counter() - started
+    
+    def apply_fills(self, rows: Iterable[dict]):
+        """Apply newly stored fill rows (history store listener)"""
+        if self.stale:
+            return  # The next refresh reads them from the store
+        for row in rows:
+            book = self.books.get(row['product_id'])
+            if book is None:
+                book = self.books[row['product_id']] = ProductBook(row['product_id'])
+            trade_ts = row['trade_ts'] or 0.0
+            if trade_ts < book.last_ts:
+                # Cost basis depends on fill order; rebuild instead of patching
+                self.out_of_order += 1
+                self.stale = True
+                return
+            price = row['price'] or 0.0
+            book.apply(
+                row['side'],
+                price,
+                _base_size(price, row['size'] or 0.0, row['size_in_quote']),
+                row['commission'] or 0.0,
+                trade_ts
+            )
+            self.fills_applied += 1
+    
+    def mark(self, product_id: str, price: float):
+        self.marks[product_id] = price
+    
+    def on_ticker(self, message: dict):
+        """Handle one `ticker` message from the market-data feed"""
+        for event in message.get('events', []):
+            for ticker in event.get('tickers', []):
+                self.marks[ticker['product_id']] = float(ticker['price'])
+    
+    def held(self) -> List[str]:
+        """Products with an open position"""
+        return [pid for pid, book in self.books.items() if book.position > 0]
+    
+    def snapshot(self, method: str = 'fifo') -> Dict[str, Any]:
+        """
+        Positions and P&L at the latest marks
+        Returns: {'positions': [...], 'totals': {...}}; unrealized P&L is None
+        for products with an open position but no mark price.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown cost basis method: {method}")
+        
+        books = list(self.books.values())
+        position = np.array([book.position for book in books], dtype=np.float64)
+        cost = np.array([book.cost_basis(method) for book in books], dtype=np.float64)
+        realized = np.array([book.realized(method) for book in books], dtype=np.float64)
+        fees = np.array([book.fees for book in books], dtype=np.float64)
+        mark = np.array([self.marks.get(book.product_id, np.nan) for book in books], dtype=np.float64)
+        
+        held = position > 0
+        market_value = np.where(held, position * mark, 0.0)
+        unrealized = market_value - cost
+        with np.errstate(divide='ignore', invalid='ignore'):
+            average_price = np.where(held, cost / position, np.nan)
+        
+        def number(value: float) -> Optional[float]:
+            return None if np.isnan(value) else float(value)
+        
+        positions = [
+            {
+                'product_id': book.product_id,
+                'position': float(position[i]),
+                'cost_basis': float(cost[i]),
+                'average_price': number(average_price[i]),
+                'mark_price': number(mark[i]),
+                'market_value': number(market_value[i]),
+                'unrealized_pnl': number(unrealized[i]),
+                'realized_pnl': float(realized[i]),
+                'fees': float(fees[i]),
+                'unmatched_size': book.unmatched,
+                'fills': book.fills
+            }
+            for i, book in enumerate(books)
+        ]
+        
+        valued = ~np.isnan(unrealized)
+        return {
+            'method': method,
+            'positions': positions,
+            'totals': {
+                'cost_basis': float(cost.sum()),
+                'market_value': float(market_value[valued].sum()),
+                'unrealized_pnl': float(unrealized[valued].sum()),
+                'realized_pnl': float(realized.sum()),
+                'fees': float(fees.sum()),
+                'net_pnl': float(unrealized[valued].sum() + realized.sum() - fees.sum()),
+                'unmarked': [books[i].product_id for i in np.flatnonzero(held & ~valued)]
+            }
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'products': len(self.books),
+            'open_positions': len(self.held()),
+            'marks': len(self.marks),
+            'stale': self.stale,
+            'rebuilds': self.rebuilds,
+            'fills_applied': self.fills_applied,
+            'out_of_order': self.out_of_order,
+            'last_rebuild_seconds': self.last_rebuild_seconds
+        }
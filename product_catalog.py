@@ -0,0 +1,177 @@
+"""
+Product Catalog Cache
+TTL cache with stale-while-revalidate semantics and an index by product id.
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Any
+
+if TYPE_CHECKING:
+    from coinbase_client import CoinbaseProduct
+
+
+class ProductCatalog:
+    """
+    Cached product list
+    Reads never block on a refresh once the catalog has been loaded: stale
+    data is served while a background refresh runs.
+    """
+    
+    def __init__(
+        self,
+        fetch_products: Callable[[], Awaitable[List['CoinbaseProduct']]],
+        fetch_product: Callable[[str], Awaitable['CoinbaseProduct']],
+        ttl: float = 300.0
+    ):
+        self.fetch_products = fetch_products
+        self.fetch_product = fetch_product
+        self.ttl = ttl
+        
+        self._products: List['CoinbaseProduct'] = []
+        self._index: Dict[str, 'CoinbaseProduct'] = {}
+        self._loaded_at: Optional[float] = None
+        self._expires_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._background_task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[List['CoinbaseProduct']], None]] = []
+        
+        # Counters
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_error: Optional[str] = None
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+    
+    def is_fresh(self) -> bool:
+        """Whether the cached catalog is within its TTL"""
+        return self.is_loaded and time.monotonic() < self._expires_at
+    
+    async def get_products(self) -> List['CoinbaseProduct']:
+        """Return the catalog, blocking only for the very first load"""
+        if not self.is_loaded:
+            self.misses += 1
+            await self.refresh()
+        elif self.is_fresh():
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+            self._schedule_refresh()
+        return self._products
+    
+    async def get_product(self, product_id: str) -> 'CoinbaseProduct':
+        """Index lookup, falling back to a single-product fetch on a miss"""
+        product = self._index.get(product_id)
+        if product is not None:
+            if self.is_fresh():
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._schedule_refresh()
+            return product
+        
+        self.misses += 1
+        product = await self.fetch_product(product_id)
+        self._index[product_id] = product
+        return product
+    
+    def add_listener(self, listener: Callable[[List['CoinbaseProduct']], None]):
+        """Call `listener(products)` after every successful refresh"""
+        self._listeners.append(listener)
+    
+    def lookup(self, product_id: str) -> Optional['CoinbaseProduct']:
+        """Synchronous index lookup (no upstream fallback)"""
+        return self._index.get(product_id)
+    
+    async def refresh(self) -> List['CoinbaseProduct']:
+        """Reload from upstream; concurrent callers share one refresh"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+        await asyncio.shield(self._refresh_task)
+        return self._products
+    
+    def invalidate(self, drop: bool = False):
+        """
+        Expire the catalog so the next read triggers a refresh.
+        With drop=True the cached data is discarded and the next read blocks.
+        """
+        self._expires_at = 0.0
+        if drop:
+            self._products = []
+            self._index = {}
+            self._loaded_at = None
+    
+    def _schedule_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+            self._refresh_task.add_done_callback(self._consume_error)
+    
+    @staticmethod
+    def _consume_error(task: asyncio.Task):
+        if not task.cancelled():
+            task.exception()
+    
+    async def _refresh(self):
+        try:
+            products = await self.fetch_products()
+        except Exception as e:
+            self.refresh_errors += 1
+            self.last_error = str(e)
+            raise
+        
+        self._products = products
+        self._index = {product.id: product for product in products}
+        self._loaded_at = time.monotonic()
+        self._expires_at = self._loaded_at + self.ttl
+        self.refreshes += 1
+        for listener in self._listeners:
+            listener(products)
+    
+    async def start(self):
+        """Start refreshing in the background every `ttl` seconds"""
+        if self._background_task is None:
+            self._background_task = asyncio.ensure_future(self._refresh_loop())
+    
+    async def stop(self):
+        """Stop the background refresh loop"""
+        for task in (self._background_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._background_task = None
+        self._refresh_task = None
+    
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass  # Keep serving the stale catalog; counted in refresh_errors
+            await asyncio.sleep(self.ttl)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cache size, age and hit/miss counters"""
+        age = time.monotonic() - self._loaded_at if self.is_loaded else None
+        return {
+            'products': len(self._products),
+            'indexed': len(self._index),
+            'ttl': self.ttl,
+            'age_seconds': round(age, 3) if age is not None else None,
+            'fresh': self.is_fresh(),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,336 @@
+"""
+Product Trading Rules
+Per-product increments and size limits precomputed as integer ticks, for
+exact local validation and rounding of orders before they are sent.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation, ROUND_CEILING, ROUND_FLOOR
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Any
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from coinbase_client import CoinbaseProduct, OrderRequest
+
+
+INT64_MAX = 2 ** 63 - 1
+
+
+class OrderValidationError(Exception):
+    """Raised when an order violates its product's trading rules"""
+    pass
+
+
+def _decimal(value: str) -> Decimal:
+    try:
+        number = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        raise OrderValidationError(f"not a number: {value!r}")
+    if not number.is_finite():
+        raise OrderValidationError(f"not a number: {value!r}")
+    return number
+
+
+def _increment(value: str) -> tuple:
+    """
+    Split an increment string into a decimal scale and a tick size
+    Returns: (scale, tick) such that increment == tick / 10**scale
+    """
+    increment = Decimal(value or '0').normalize()
+    if increment <= 0:
+        return 0, 1
+    scale = max(0, -increment.as_tuple().exponent)
+    return scale, int(increment.scaleb(scale))
+
+
+def to_units(value: str, scale: int, rounding: str = ROUND_FLOOR) -> tuple:
+    """
+    Exact decimal string -> integer units of 10**-scale
+    Returns: (units, exact)
+    """
+    # Fast path for plain non-negative decimals ("123", "0.015"): integer math only.
+    # ASCII only: str.isdigit() also accepts digits int() cannot parse, like '²'
+    whole, _, fraction = value.partition('.') if isinstance(value, str) and value.isascii() else ('', '', '')
+    if (whole.isdigit() or (not whole and fraction)) and (fraction.isdigit() or not fraction):
+        kept, rest = fraction[:scale], fraction[scale:]
+        units = int((whole or '0') + kept.ljust(scale, '0'))
+        exact = not rest or not rest.strip('0')
+        if not exact and rounding == ROUND_CEILING:
+            units += 1
+        return units, exact
+    
+    scaled = _decimal(value).scaleb(scale)
+    units = int(scaled.to_integral_value(rounding=rounding))
+    return units, units == scaled
+
+
+def from_units(units: int, scale: int) -> str:
+    """Integer units of 10**-scale -> decimal string"""
+    if not scale:
+        return str(units)
+    whole, fraction = divmod(units, 10 ** scale)
+    return f"{whole}.{fraction:0{scale}d}"
+
+
+@dataclass(slots=True)
+class ProductRules:
+    """Trading rules for one product in integer units (0 min/max means unbounded)"""
+    product_id: str
+    status: str
+    base_scale: int
+    base_tick: int
+    base_min: int
+    base_max: int
+    quote_scale: int
+    quote_tick: int
+    quote_min: int
+    quote_max: int
+    
+    @classmethod
+    def from_product(cls, product: 'CoinbaseProduct') -> 'ProductRules':
+        base_scale, base_tick = _increment(product.base_increment)
+        quote_scale, quote_tick = _increment(product.quote_increment)
+        return cls(
+            product_id=product.id,
+            status=product.status,
+            base_scale=base_scale,
+            base_tick=base_tick,
+            base_min=to_units(product.base_min_size or '0', base_scale, ROUND_CEILING)[0],
+            base_max=to_units(product.base_max_size or '0', base_scale)[0],
+            quote_scale=quote_scale,
+            quote_tick=quote_tick,
+            quote_min=to_units(product.quote_min_size or '0', quote_scale, ROUND_CEILING)[0],
+            quote_max=to_units(product.quote_max_size or '0', quote_scale)[0]
+        )
+    
+    def _units(self, value: str, name: str, scale: int, rounding: str = ROUND_FLOOR) -> tuple:
+        try:
+            return to_units(value, scale, rounding)
+        except OrderValidationError as e:
+            raise OrderValidationError(f"{self.product_id}: {name} is {e}")
+    
+    def _size(self, value: str, name: str, scale: int, tick: int, low: int, high: int, snap: bool) -> str:
+        units, exact = self._units(value, name, scale)
+        if snap:
+            units -= units % tick
+        elif not exact or units % tick:
+            raise OrderValidationError(
+                f"{self.product_id}: {name} {value} is not a multiple of {from_units(tick, scale)}"
+            )
+        if units <= 0:
+            raise OrderValidationError(f"{self.product_id}: {name} must be positive")
+        if low and units < low:
+            raise OrderValidationError(
+                f"{self.product_id}: {name} {value} is below the minimum {from_units(low, scale)}"
+            )
+        if high and units > high:
+            raise OrderValidationError(
+                f"{self.product_id}: {name} {value} is above the maximum {from_units(high, scale)}"
+            )
+        return from_units(units, scale)
+    
+    def _price(self, value: str, name: str, side: str, snap: bool) -> str:
+        # Snapping never makes a price more aggressive: buys round down, sells up
+        rounding = ROUND_FLOOR if side == 'BUY' else ROUND_CEILING
+        units, exact = self._units(value, name, self.quote_scale, rounding)
+        tick = self.quote_tick
+        if snap:
+            remainder = units % tick
+            if remainder:
+                units += -remainder if side == 'BUY' else tick - remainder
+        elif not exact or units % tick:
+            raise OrderValidationError(
+                f"{self.product_id}: {name} {value} is not a multiple of "
+                f"{from_units(tick, self.quote_scale)}"
+            )
+        if units <= 0:
+            raise OrderValidationError(f"{self.product_id}: {name} must be positive")
+        return from_units(units, self.quote_scale)
+    
+    def check(
+        self,
+        side: str,
+        base_size: Optional[str] = None,
+        quote_size: Optional[str] = None,
+        limit_price: Optional[str] = None,
+        stop_price: Optional[str] = None,
+        snap: bool = False
+    ) -> Dict[str, Optional[str]]:
+        """
+        Validate an order's fields (rounding them onto the increments if `snap`)
+        Returns the normalized fields; raises OrderValidationError if invalid.
+        """
+        if self.status and self.status.lower() != 'online':
+            raise OrderValidationError(f"{self.product_id}: product is {self.status}")
+        
+        return {
+            'base_size': None if base_size is None else self._size(
+                base_size, 'base_size', self.base_scale, self.base_tick,
+                self.base_min, self.base_max, snap
+            ),
+            'quote_size': None if quote_size is None else self._size(
+                quote_size, 'quote_size', self.quote_scale, self.quote_tick,
+                self.quote_min, self.quote_max, snap
+            ),
+            'limit_price': None if limit_price is None else self._price(
+                limit_price, 'limit_price', side, snap
+            ),
+            'stop_price': None if stop_price is None else self._price(
+                stop_price, 'stop_price', side, snap
+            )
+        }
+
+
+class ProductRulesIndex:
+    """ProductRules by product id, rebuilt whenever the catalog refreshes"""
+    
+    def __init__(self):
+        self._rules: Dict[str, ProductRules] = {}
+        self._rows: Dict[str, int] = {}
+        self._table: Optional[Dict[str, Any]] = None
+        self.rebuilds = 0
+        self.skipped = 0  # Products left out of the last rebuild
+    
+    def rebuild(self, products: Iterable['CoinbaseProduct']):
+        """Replace every product's rules"""
+        rules, skipped = {}, 0
+        for product in products:
+            try:
+                rules[product.id] = ProductRules.from_product(product)
+            except (InvalidOperation, OrderValidationError, ValueError, KeyError, TypeError):
+                # Malformed or missing metadata (lazy models raise KeyError on
+                # access); orders for it go unvalidated
+                skipped += 1
+        self._rules = rules
+        self.skipped = skipped
+        self._rows = {}
+        self._table = None
+        self.rebuilds += 1
+    
+    def update(self, product: 'CoinbaseProduct') -> ProductRules:
+        """Add or replace one product's rules"""
+        rules = self._rules[product.id] = ProductRules.from_product(product)
+        self._table = None
+        return rules
+    
+    def get(self, product_id: str) -> Optional[ProductRules]:
+        return self._rules.get(product_id)
+    
+    def __len__(self) -> int:
+        return len(self._rules)
+    
+    def _columns(self) -> Dict[str, Any]:
+        """Rule columns as arrays, one row per product (built lazily)"""
+        if self._table is None:
+            rules = list(self._rules.values())
+            self._rows = {rule.product_id: row for row, rule in enumerate(rules)}
+            self._table = {
+                name: np.array([getattr(rule, name) for rule in rules], dtype=np.int64)
+                for name in ('base_tick', 'base_min', 'base_max', 'quote_tick', 'quote_min', 'quote_max')
+            }
+            self._table['online'] = np.array(
+                [not rule.status or rule.status.lower() == 'online' for rule in rules],
+                dtype=bool
+            )
+        return self._table
+    
+    def validate_batch(self, requests: List['OrderRequest']) -> List[Optional[str]]:
+        """
+        Check many orders at once: sizes/prices are parsed to integer units per
+        order, then tick, min/max and status checks run as array operations.
+        Returns one error message per order (None when the order is valid).
+        """
+        if not NUMPY_AVAILABLE:
+            return [self._validate_one(request) for request in requests]
+        
+        count = len(requests)
+        errors: List[Optional[str]] = [None] * count
+        if not self._rules:
+            return errors
+        table = self._columns()
+        rows = np.zeros(count, dtype=np.int64)
+        known = np.zeros(count, dtype=bool)
+        # -1 marks a field the order does not use
+        base = np.full(count, -1, dtype=np.int64)
+        quote = np.full(count, -1, dtype=np.int64)
+        limit = np.full(count, -1, dtype=np.int64)
+        stop = np.full(count, -1, dtype=np.int64)
+        
+        rules_by_id = self._rules
+        row_of = self._rows
+        for i, request in enumerate(requests):
+            rule = rules_by_id.get(request.product_id)
+            if rule is None:
+                continue
+            try:
+                for name, column, value, scale in (
+                    ('base_size', base, request.base_size, rule.base_scale),
+                    ('quote_size', quote, request.quote_size, rule.quote_scale),
+                    ('limit_price', limit, request.limit_price, rule.quote_scale),
+                    ('stop_price', stop, request.stop_price, rule.quote_scale)
+                ):
+                    if value is None:
+                        continue
+                    units, exact = rule._units(value, name, scale)
+                    if not exact:
+                        raise OrderValidationError(
+                            f"{request.product_id}: {name} {value} has more decimals than the product allows"
+                        )
+                    if units <= 0:
+                        raise OrderValidationError(f"{request.product_id}: {name} must be positive")
+                    if units > INT64_MAX:
+                        raise OrderValidationError(f"{request.product_id}: {name} {value} is out of range")
+                    column[i] = units
+            except OrderValidationError as e:
+                errors[i] = str(e)
+                continue
+            rows[i] = row_of[request.product_id]
+            known[i] = True
+        
+        base_tick, base_min, base_max = table['base_tick'][rows], table['base_min'][rows], table['base_max'][rows]
+        quote_tick, quote_min, quote_max = table['quote_tick'][rows], table['quote_min'][rows], table['quote_max'][rows]
+        checks = (
+            (~table['online'][rows], 'product is not online'),
+            ((base > 0) & (base % base_tick != 0), 'base_size is not a multiple of base_increment'),
+            ((base > 0) & (base < base_min), 'base_size is below base_min_size'),
+            ((base > 0) & (base_max > 0) & (base > base_max), 'base_size is above base_max_size'),
+            ((quote > 0) & (quote % quote_tick != 0), 'quote_size is not a multiple of quote_increment'),
+            ((quote > 0) & (quote < quote_min), 'quote_size is below quote_min_size'),
+            ((quote > 0) & (quote_max > 0) & (quote > quote_max), 'quote_size is above quote_max_size'),
+            ((limit > 0) & (limit % quote_tick != 0), 'limit_price is not a multiple of quote_increment'),
+            ((stop > 0) & (stop % quote_tick != 0), 'stop_price is not a multiple of quote_increment')
+        )
+        for failed, reason in checks:
+            for i in np.flatnonzero(failed & known):
+                if errors[i] is None:
+                    errors[i] = f"{requests[i].product_id}: {reason}"
+        return errors
+    
+    def _validate_one(self, request: 'OrderRequest') -> Optional[str]:
+        rule = self._rules.get(request.product_id)
+        if rule is None:
+            return None
+        try:
+            rule.check(
+                request.side.value,
+                request.base_size,
+                request.quote_size,
+                request.limit_price,
+                request.stop_price
+            )
+        except OrderValidationError as e:
+            return str(e)
+        return None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'products': len(self._rules),
+            'rebuilds': self.rebuilds,
+            'skipped': self.skipped,
+            'vectorized': NUMPY_AVAILABLE
+        }
@@ -0,0 +1,338 @@
+"""
+Sampling Profiler
+Opt-in, on-demand profiling of the running process: samples the event
+loop thread's stack (or one request's task, including where it is
+suspended) and aggregates collapsed stacks, renderable as folded text for
+flamegraph tools or as a self-contained SVG flamegraph.
+"""
+
+import asyncio
+import collections
+import hmac
+import html
+import itertools
+import math
+import os
+import signal
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+
+def _label(code) -> str:
+    # ';' separates frames in the folded format
+    name = getattr(code, 'co_qualname', code.co_name).replace(';', ':')
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame) -> List[Any]:
+    """Frames from the outermost call to `frame`"""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _await_chain(coro) -> tuple:
+    """
+    Frames of a suspended coroutine chain, outermost first
+    Returns: (frames, what the innermost frame is waiting on, if not a coroutine)
+    """
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None) or getattr(coro, 'ag_frame', None)
+        if frame is None:
+            return frames, f"<awaiting {type(coro).__name__}>"
+        frames.append(frame)
+        inner = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None) or getattr(coro, 'ag_await', None)
+        coro = inner
+    return frames, None
+
+
+class Profile:
+    """Aggregated samples: collapsed stack -> count"""
+    
+    def __init__(self, name: str, interval: float, idle: bool = True):
+        self.name = name
+        self.interval = interval
+        self.idle = idle  # Keep samples of the loop waiting in select()
+        self.stacks: Dict[tuple, int] = collections.Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self.started_at = time.time()
+        self.seconds: Optional[float] = None
+        self.done = False
+    
+    def add(self, stack: tuple):
+        self.stacks[stack] += 1
+        self.samples += 1
+    
+    def finish(self):
+        self.seconds = time.time() - self.started_at
+        self.done = True
+    
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format: 'outer;inner count' per line"""
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.stacks.items()]
+        lines.sort()
+        return '\n'.join(lines) + ('\n' if lines else '')
+    
+    def top(self, limit: int = 20) -> List[dict]:
+        """Functions with the most samples on top of the stack (self time)"""
+        leaves = collections.Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack[-1]] += count
+        return [
+            {'frame': frame, 'samples': count, 'share': round(count / self.samples, 4)}
+            for frame, count in leaves.most_common(limit)
+        ]
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'samples': self.samples,
+            'idle_samples': self.idle_samples,
+            'interval_ms': self.interval * 1e3,
+            'started_at': self.started_at,
+            'seconds': self.seconds,
+            'done': self.done,
+            'top': self.top(10) if self.samples else []
+        }
+    
+    def svg(self, width: int = 1200, row: int = 16) -> str:
+        """Self-contained flamegraph (root at the bottom; hover for counts)"""
+        tree = {'children': {}, 'count': 0}
+        for stack, count in self.stacks.items():
+            node = tree
+            node['count'] += count
+            for frame in stack:
+                node = node['children'].setdefault(frame, {'children': {}, 'count': 0})
+                node['count'] += count
+        
+        depth = max((len(stack) for stack in self.stacks), default=0)
+        height = (depth + 2) * row + 24
+        total = max(tree['count'], 1)
+        rects = []
+        
+        def draw(node: dict, x: float, level: int):
+            for frame, child in sorted(node['children'].items()):
+                w = child['count'] / total * width
+                if w >= 0.5:
+                    y = height - (level + 2) * row
+                    hue = 20 + zlib.crc32(frame.encode()) % 40
+                    title = html.escape(f"{frame} ({child['count']} samples, {child['count'] / total:.1%})")
+                    text = html.escape(frame[:int(w / 7)]) if w > 21 else ''
+                    rects.append(
+                        f'<g><title>{title}</title>'
+                        f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row - 1}" fill="hsl({hue},85%,60%)"/>'
+                        f'<text x="{x + 3:.1f}" y="{y + row - 4}">{text}</text></g>'
+                    )
+                    draw(child, x, level + 1)
+                x += w
+        
+        draw(tree, 0.0, 0)
+        header = html.escape(f"{self.name}: {self.samples} samples every {self.interval * 1e3:g} ms")
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'font-family="monospace" font-size="11">'
+            f'<rect width="100%" height="100%" fill="#fff"/>'
+            f'<text x="4" y="16" font-size="13">{header}</text>'
+            + ''.join(rects) + '</svg>'
+        )
+
+
+class SamplingProfiler:
+    """
+    Samples only while something is being profiled
+    A loop on the main thread is sampled by a wall-clock interval timer
+    (SIGALRM), which sees the interrupted frame; other loops, and single
+    tasks (track()/untrack()), by a sampler thread that exits when its last
+    target finishes. A thread sampler only runs when the loop thread
+    releases the GIL, so its loop profiles lean towards I/O calls. A
+    tracked task is sampled whether it is running (its part of the thread
+    stack) or suspended (its await chain).
+    """
+    
+    def __init__(self, interval: float = 0.005, max_seconds: float = 60.0, keep: int = 20):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.recent: collections.OrderedDict = collections.OrderedDict()  # id -> finished task Profile
+        self.keep = keep
+        self._threads: Dict[Profile, int] = {}  # Loop profiles -> thread id
+        self._signal_profiles: List[Profile] = []  # Loop profiles sampled by the timer
+        self._previous_handler = None
+        self._tasks: Dict[asyncio.Task, tuple] = {}  # Task -> (Profile, loop, thread id)
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+        self._ids = itertools.count(1)
+        
+        # Counters
+        self.loop_profiles = 0
+        self.task_profiles = 0
+    
+    def _ensure_sampler(self):
+        if self._sampler is None or not self._sampler.is_alive():
+            self._sampler = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._sampler.start()
+    
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._threads and not self._tasks:
+                    self._sampler = None
+                    return
+                frames = sys._current_frames()
+                for profile, thread_id in self._threads.items():
+                    self._sample_thread(profile, frames.get(thread_id))
+                for task, (profile, loop, thread_id) in self._tasks.items():
+                    self._sample_task(profile, task, loop, frames.get(thread_id))
+    
+    def _sample_thread(self, profile: Profile, frame):
+        if frame is None:
+            return
+        stack = _thread_stack(frame)
+        if stack[-1].f_code.co_filename.endswith('selectors.py'):
+            profile.idle_samples += 1
+            if not profile.idle:
+                return
+        profile.add(tuple(_label(f.f_code) for f in stack))
+    
+    def _sample_task(self, profile: Profile, task: asyncio.Task, loop, frame):
+        if task.done():
+            return
+        coro = task.get_coro()
+        if asyncio.current_task(loop) is task and frame is not None:
+            # Running: the thread stack from the task's outermost coroutine down
+            stack = _thread_stack(frame)
+            root = getattr(coro, 'cr_frame', None)
+            for index, candidate in enumerate(stack):
+                if candidate is root:
+                    stack = stack[index:]
+                    break
+            profile.add(tuple(_label(f.f_code) for f in stack))
+        else:
+            frames, waiting = _await_chain(coro)
+            labels = tuple(_label(f.f_code) for f in frames)
+            profile.add(labels + (waiting,) if waiting else labels)
+    
+    def _on_timer(self, signum, frame):
+        for profile in self._signal_profiles:
+            self._sample_thread(profile, frame)
+    
+    def _start_timer(self, profile: Profile):
+        if not self._signal_profiles:
+            self._previous_handler = signal.signal(signal.SIGALRM, self._on_timer)
+            signal.setitimer(signal.ITIMER_REAL, self.interval, self.interval)
+        self._signal_profiles.append(profile)
+    
+    def _stop_timer(self, profile: Profile):
+        self._signal_profiles.remove(profile)
+        if not self._signal_profiles:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous_handler or signal.SIG_DFL)
+    
+    async def profile(self, seconds: float, idle: bool = False) -> Profile:
+        """Sample the event loop thread for `seconds` (capped at max_seconds)"""
+        if not math.isfinite(seconds) or seconds <= 0:
+            raise ValueError(f"seconds must be positive and finite, got {seconds}")
+        seconds = min(seconds, self.max_seconds)
+        profile = Profile('event loop', self.interval, idle)
+        use_timer = hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+        if use_timer:
+            self._start_timer(profile)
+        else:
+            with self._lock:
+                self._threads[profile] = threading.get_ident()
+                self._ensure_sampler()
+        self.loop_profiles += 1
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            if use_timer:
+                self._stop_timer(profile)
+            else:
+                with self._lock:
+                    del self._threads[profile]
+            profile.finish()
+        return profile
+    
+    def track(self, task: asyncio.Task, name: str) -> str:
+        """Start sampling `task` (call from its loop); returns the profile id"""
+        profile_id = f"{int(time.time())}-{next(self._ids)}"
+        profile = Profile(name, self.interval)
+        with self._lock:
+            self._tasks[task] = (profile, asyncio.get_running_loop(), threading.get_ident())
+            self._ensure_sampler()
+        self.task_profiles += 1
+        self.recent[profile_id] = profile
+        while len(self.recent) > self.keep:
+            self.recent.popitem(last=False)
+        return profile_id
+    
+    def untrack(self, task: asyncio.Task):
+        with self._lock:
+            entry = self._tasks.pop(task, None)
+        if entry is not None:
+            entry[0].finish()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'interval_ms': self.interval * 1e3,
+            'max_seconds': self.max_seconds,
+            'sampling': self._sampler is not None or bool(self._signal_profiles),
+            'active_loop_profiles': len(self._threads) + len(self._signal_profiles),
+            'active_task_profiles': len(self._tasks),
+            'loop_profiles': self.loop_profiles,
+            'task_profiles': self.task_profiles,
+            'recent': list(self.recent)
+        }
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling single requests whose trigger header carries the token
+    The response gets an X-Profile-Id header naming the stored profile.
+    Only installed when profiling is enabled, so it costs nothing otherwise.
+    """
+    
+    def __init__(self, app, profiler: SamplingProfiler, token: str, header: str = 'x-profile'):
+        if not token:
+            raise ValueError("ProfilingMiddleware needs a token")
+        self.app = app
+        self.profiler = profiler
+        self.header = header.lower().encode()
+        self.token = token.encode()
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        
+        value = None
+        for name, header_value in scope['headers']:
+            if name == self.header:
+                value = header_value
+                break
+        if not value or not hmac.compare_digest(value, self.token):
+            await self.app(scope, receive, send)
+            return
+        
+        task = asyncio.current_task()
+        profile_id = self.profiler.track(task, f"{scope['method']} {scope['path']}")
+        
+        async def send_with_id(message):
+            if message['type'] == 'http.response.start':
+                message = {**message, 'headers': list(message.get('headers', [])) + [
+                    (b'x-profile-id', profile_id.encode())
+                ]}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            self.profiler.untrack(task)
@@ -0,0 +1,200 @@
+"""
+Client-side Rate Limiting
+Token buckets with a priority scheduler so cancels beat placements and
+placements beat reads when the exchange rate budget is tight.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Optional, Dict, Any
+
+
+class Priority(IntEnum):
+    """Request priority classes (lower value is served first)"""
+    CANCEL = 0
+    PLACE = 1
+    READ = 2
+
+
+class RequestShedError(Exception):
+    """Raised when a queued request misses its deadline and is dropped"""
+    pass
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second"""
+    
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+    
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+    
+    def try_take(self, now: Optional[float] = None) -> bool:
+        """Take one token if available"""
+        self._refill(now if now is not None else time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+    
+    def time_until_token(self, now: Optional[float] = None) -> float:
+        """Seconds until one token will be available"""
+        self._refill(now if now is not None else time.monotonic())
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+    
+    def drain(self):
+        """Empty the bucket (e.g. after the exchange answered 429)"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 0.0)
+
+
+class _Waiter:
+    """Queued acquire() call"""
+    __slots__ = ('priority', 'future', 'enqueued_at', 'timer')
+    
+    def __init__(self, priority: Priority, future: asyncio.Future, enqueued_at: float):
+        self.priority = priority
+        self.future = future
+        self.enqueued_at = enqueued_at
+        self.timer = None
+
+
+class _BudgetStats:
+    """Counters for one budget"""
+    __slots__ = ('granted', 'shed', 'total_wait', 'max_wait')
+    
+    def __init__(self):
+        self.granted = 0
+        self.shed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class PriorityRequestScheduler:
+    """Grants tokens from named budgets to waiters in priority order"""
+    
+    def __init__(self, budgets: Dict[str, TokenBucket]):
+        self.budgets = budgets
+        self._queues: Dict[str, list] = {name: [] for name in budgets}
+        self._pumps: Dict[str, asyncio.Task] = {}
+        self._stats: Dict[str, _BudgetStats] = {name: _BudgetStats() for name in budgets}
+        self._sequence = itertools.count()
+    
+    async def acquire(
+        self,
+        budget: str,
+        priority: Priority = Priority.READ,
+        deadline: Optional[float] = None
+    ):
+        """
+        Wait for a token from `budget`.
+        If `deadline` (seconds) passes while queued, raise RequestShedError.
+        """
+        bucket = self.budgets[budget]
+        queue = self._queues[budget]
+        now = time.monotonic()
+        
+        # Fast path: nothing queued ahead of us
+        if not queue and bucket.try_take(now):
+            self._record_grant(budget, 0.0)
+            return
+        
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, loop.create_future(), now)
+        heapq.heappush(queue, (priority, next(self._sequence), waiter))
+        if deadline is not None:
+            waiter.timer = loop.call_later(deadline, self._shed, budget, waiter)
+        
+        if budget not in self._pumps:
+            self._pumps[budget] = loop.create_task(self._pump(budget))
+        
+        try:
+            await waiter.future
+        finally:
+            if waiter.timer is not None:
+                waiter.timer.cancel()
+    
+    def try_acquire(self, budget: str) -> bool:
+        """Take a token only if one is free now and nobody is queued for it"""
+        if not self._queues[budget] and self.budgets[budget].try_take():
+            self._record_grant(budget, 0.0)
+            return True
+        return False
+    
+    def penalize(self, budget: str):
+        """Drain a budget after the upstream signalled rate limiting"""
+        self.budgets[budget].drain()
+    
+    def _shed(self, budget: str, waiter: _Waiter):
+        if not waiter.future.done():
+            self._stats[budget].shed += 1
+            waiter.future.set_exception(RequestShedError(
+                f"Request shed after waiting {time.monotonic() - waiter.enqueued_at:.3f}s "
+                f"for '{budget}' rate budget"
+            ))
+    
+    def _record_grant(self, budget: str, waited: float):
+        stats = self._stats[budget]
+        stats.granted += 1
+        stats.total_wait += waited
+        if waited > stats.max_wait:
+            stats.max_wait = waited
+    
+    async def _pump(self, budget: str):
+        """Hand out tokens to queued waiters as the bucket refills"""
+        bucket = self.budgets[budget]
+        queue = self._queues[budget]
+        try:
+            while queue:
+                waiter = queue[0][2]
+                if waiter.future.done():
+                    # Shed or cancelled while queued
+                    heapq.heappop(queue)
+                    continue
+                
+                now = time.monotonic()
+                if bucket.try_take(now):
+                    heapq.heappop(queue)
+                    waiter.future.set_result(None)
+                    self._record_grant(budget, now - waiter.enqueued_at)
+                else:
+                    await asyncio.sleep(bucket.time_until_token(now))
+        finally:
+            self._pumps.pop(budget, None)
+    
+    def queue_depth(self, budget: str) -> Dict[str, int]:
+        """Pending waiters per priority class"""
+        depth = {priority.name: 0 for priority in Priority}
+        for _, _, waiter in self._queues[budget]:
+            if not waiter.future.done():
+                depth[waiter.priority.name] += 1
+        return depth
+    
+    def stats(self) -> Dict[str, Any]:
+        """Per-budget tokens, queue depth and wait-time statistics"""
+        result = {}
+        for name, bucket in self.budgets.items():
+            stats = self._stats[name]
+            bucket._refill(time.monotonic())
+            result[name] = {
+                'rate': bucket.rate,
+                'tokens': round(bucket.tokens, 3),
+                'queue_depth': self.queue_depth(name),
+                'granted': stats.granted,
+                'shed': stats.shed,
+                'avg_wait_ms': round(stats.total_wait / stats.granted * 1000, 3) if stats.granted else 0.0,
+                'max_wait_ms': round(stats.max_wait * 1000, 3)
+            }
+        return result
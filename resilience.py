@@ -0,0 +1,123 @@
+"""
+Request Resilience
+Jittered retry backoff, latency tracking for hedged reads and a
+per-endpoint circuit breaker.
+"""
+
+import random
+import time
+from collections import deque
+from typing import Optional, Dict, Any
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the endpoint's breaker is open"""
+    pass
+
+
+class RetryPolicy:
+    """Retry budget with exponential backoff and full jitter"""
+    
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.1, max_delay: float = 2.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies for one endpoint"""
+    
+    def __init__(self, window: int = 256, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+    
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at quantile `q` (0-1), or None until enough samples exist"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+    closed -> open after `failure_threshold` failures; open -> half-open after
+    `reset_timeout`, where a single probe call decides whether to close again.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        
+        # Counters
+        self.trips = 0
+        self.rejected = 0
+    
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpenError if the call must fail fast
+        Returns: whether this call is the half-open probe
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit open for {self.name}")
+            self.state = self.HALF_OPEN
+        
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit half-open for {self.name}; probe in flight")
+            self._probing = True
+            return True
+        return False
+    
+    def release_probe(self):
+        """
+        Give up a probe that ended without a verdict (cancelled, or refused
+        locally): back to open, with the reset timeout already elapsed so
+        the next call probes again
+        """
+        if self.state == self.HALF_OPEN and self._probing:
+            self._probing = False
+            self.state = self.OPEN
+    
+    def record_success(self):
+        self.failures = 0
+        self._probing = False
+        self.state = self.CLOSED
+    
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'trips': self.trips,
+            'rejected': self.rejected
+        }
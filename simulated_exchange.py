@@ -0,0 +1,974 @@
+"""
+Simulated Exchange
+Local stand-in for the Coinbase Advanced Trade API: a price-time priority
+matching engine with maker liquidity, served over HTTP and WebSocket with
+the endpoints CoinbaseClient and MarketDataFeed use, plus configurable
+latency and error injection. Point the client at it with `base_url`.
+"""
+
+import asyncio
+import bisect
+import itertools
+import random
+import time
+import uuid
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Any
+
+from aiohttp import web
+
+from coinbase_client import CoinbaseProduct, json_dumps
+from product_rules import OrderValidationError, ProductRules, from_units, to_units
+
+
+DEFAULT_PRODUCTS = [
+    {'id': 'BTC-USD', 'price': '50000.00', 'base_increment': '0.00000001', 'quote_increment': '0.01',
+     'base_min_size': '0.00000001', 'base_max_size': '3400', 'quote_min_size': '1', 'quote_max_size': '150000000'},
+    {'id': 'ETH-USD', 'price': '3000.00', 'base_increment': '0.00000001', 'quote_increment': '0.01',
+     'base_min_size': '0.00000001', 'base_max_size': '38000', 'quote_min_size': '1', 'quote_max_size': '100000000'},
+    {'id': 'SOL-USD', 'price': '100.000', 'base_increment': '0.001', 'quote_increment': '0.001',
+     'base_min_size': '0.001', 'base_max_size': '100000', 'quote_min_size': '1', 'quote_max_size': '25000000'}
+]
+
+
+def _timestamp(seconds: Optional[float] = None) -> str:
+    """RFC 3339 UTC timestamp with microseconds"""
+    seconds = time.time() if seconds is None else seconds
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)) + f".{int(seconds % 1 * 1e6):06d}Z"
+
+
+def _product(spec: dict) -> dict:
+    """Full product dict (as GET /products returns) from a partial spec"""
+    base, quote = spec['id'].split('-')
+    product = {
+        'id': spec['id'],
+        'base_currency': base,
+        'quote_currency': quote,
+        'base_display_symbol': base,
+        'quote_display_symbol': quote,
+        'base_increment': '0.00000001',
+        'quote_increment': '0.01',
+        'display_name': f"{base}/{quote}",
+        'status': 'online',
+        'price': '0',
+        'price_percentage_change_24h': '0',
+        'volume_24h': '0',
+        'volume_percentage_change_24h': '0',
+        'base_max_size': '0',
+        'base_min_size': '0',
+        'quote_max_size': '0',
+        'quote_min_size': '0'
+    }
+    product.update(spec)
+    product['product_id'] = product['id']
+    return product
+
+
+# ============================================================================
+# Matching engine
+# ============================================================================
+
+class _Order:
+    """Order state in integer units (sizes in base units, prices in quote units)"""
+    __slots__ = (
+        'order_id', 'client_order_id', 'product_id', 'side', 'order_type', 'configuration',
+        'price', 'stop', 'size', 'quote', 'remaining', 'quote_left', 'filled', 'value', 'fee',
+        'fills', 'status', 'created', 'completed', 'user', 'reject_reason'
+    )
+    
+    def __init__(self, order_id, product_id, side, order_type, configuration, user, client_order_id=''):
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.product_id = product_id
+        self.side = side
+        self.order_type = order_type
+        self.configuration = configuration
+        self.price = self.stop = self.size = self.quote = None
+        self.remaining = 0
+        self.quote_left = 0  # Quote budget of a quote-sized market order (price x size units)
+        self.filled = 0
+        self.value = 0  # Sum of price x size units
+        self.fee = 0  # Same units as value
+        self.fills = 0
+        self.status = 'OPEN'
+        self.created = time.time()
+        self.completed: Optional[float] = None
+        self.user = user
+        self.reject_reason: Optional[str] = None
+
+
+class _Side:
+    """One side of a book: FIFO queues per price level"""
+    __slots__ = ('buy', 'prices', 'levels', 'depth')
+    
+    def __init__(self, buy: bool):
+        self.buy = buy
+        self.prices: List[int] = []  # Ascending
+        self.levels: Dict[int, deque] = {}
+        self.depth: Dict[int, int] = {}  # Live size per level
+    
+    def best(self) -> Optional[int]:
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.buy else self.prices[0]
+    
+    def add(self, order: _Order):
+        level = self.levels.get(order.price)
+        if level is None:
+            bisect.insort(self.prices, order.price)
+            level = self.levels[order.price] = deque()
+            self.depth[order.price] = 0
+        level.append(order)
+        self.depth[order.price] += order.remaining
+    
+    def drop_level(self, price: int):
+        del self.prices[bisect.bisect_left(self.prices, price)]
+        del self.levels[price]
+        del self.depth[price]
+    
+    def top(self, count: int) -> List[tuple]:
+        prices = self.prices[::-1][:count] if self.buy else self.prices[:count]
+        return [(price, self.depth[price]) for price in prices]
+
+
+class _Book:
+    __slots__ = (
+        'product', 'rules', 'base_scale', 'quote_scale', 'bids', 'asks', 'stops',
+        'last_price', 'last_size', 'last_trade_id', 'volume', 'changed'
+    )
+    
+    def __init__(self, product: dict):
+        self.product = product
+        self.rules = ProductRules.from_product(
+            CoinbaseProduct(**{name: product[name] for name in CoinbaseProduct.__dataclass_fields__})
+        )
+        self.base_scale = self.rules.base_scale
+        self.quote_scale = self.rules.quote_scale
+        self.bids = _Side(True)
+        self.asks = _Side(False)
+        self.stops: List[_Order] = []
+        self.last_price = to_units(product['price'], self.quote_scale)[0]
+        self.last_size = 0
+        self.last_trade_id = 0
+        self.volume = 0
+        self.changed: set = set()  # (side, price) levels touched since the last drain
+
+
+class MatchingEngine:
+    """
+    Price-time priority matching over integer price/size units
+    Maker liquidity is seeded around each product's price and topped up
+    after it is taken, so takers always find a book. Only user orders
+    (not the synthetic makers) are kept for the order and fill endpoints.
+    """
+    
+    def __init__(
+        self,
+        products: Optional[Iterable[dict]] = None,
+        maker_fee_bps: int = 40,
+        taker_fee_bps: int = 60,
+        liquidity_levels: int = 20,
+        liquidity_size: str = '10',
+        liquidity_spacing: int = 1
+    ):
+        self.maker_fee_bps = maker_fee_bps
+        self.taker_fee_bps = taker_fee_bps
+        self.liquidity_levels = liquidity_levels
+        self.liquidity_size = liquidity_size
+        self.liquidity_spacing = liquidity_spacing
+        self.books: Dict[str, _Book] = {}
+        self.orders: Dict[str, _Order] = {}
+        self.order_list: List[_Order] = []  # User orders in creation order
+        self.fills: List[dict] = []  # User fills in execution order
+        self.balances: Dict[str, float] = {}
+        self.record_events = False  # Keep trades/order updates for the WebSocket feed
+        self.trades: List[dict] = []
+        self.updated_orders: Dict[str, _Order] = {}
+        self._ids = itertools.count(1)
+        
+        for spec in products or DEFAULT_PRODUCTS:
+            product = _product(spec)
+            book = self.books[product['id']] = _Book(product)
+            self.balances.setdefault(product['base_currency'], 1000.0)
+            self.balances.setdefault(product['quote_currency'], 10_000_000.0)
+            self._replenish(book)
+        
+        # Counters
+        self.submitted = 0
+        self.rejected = 0
+        self.matches = 0
+    
+    def _replenish(self, book: _Book):
+        """Top up maker levels on both sides of the last price"""
+        if not self.liquidity_levels:
+            return
+        tick = book.rules.quote_tick * self.liquidity_spacing
+        size = to_units(self.liquidity_size, book.base_scale)[0]
+        middle = book.last_price - book.last_price % book.rules.quote_tick
+        for side, direction in ((book.bids, -1), (book.asks, 1)):
+            depth = side.depth
+            for level in range(1, self.liquidity_levels + 1):
+                price = middle + direction * level * tick
+                if price > 0 and price not in depth:
+                    maker = _Order(f"maker-{next(self._ids)}", book.product['id'],
+                                   'BUY' if side.buy else 'SELL', 'LIMIT', None, False)
+                    maker.price = price
+                    maker.remaining = size
+                    side.add(maker)
+                    book.changed.add((side.buy, price))
+    
+    # Orders
+    
+    def submit(
+        self,
+        product_id: str,
+        side: str,
+        configuration: dict,
+        client_order_id: str = ''
+    ) -> _Order:
+        """Accept (and match) an order given its `order_configuration`; raises OrderValidationError"""
+        book = self.books.get(product_id)
+        if book is None:
+            raise OrderValidationError(f"Unknown product {product_id}")
+        if side not in ('BUY', 'SELL'):
+            raise OrderValidationError(f"Unknown side {side}")
+        if len(configuration) != 1:
+            raise OrderValidationError("Exactly one order configuration is required")
+        (kind, fields), = configuration.items()
+        order_type = {
+            'market_market_ioc': 'MARKET',
+            'limit_limit_gtc': 'LIMIT',
+            'stop_limit_stop_limit_gtc': 'STOP'
+        }.get(kind)
+        if order_type is None:
+            raise OrderValidationError(f"Unsupported order configuration {kind}")
+        
+        checked = book.rules.check(
+            side,
+            fields.get('base_size'),
+            fields.get('quote_size'),
+            fields.get('limit_price'),
+            fields.get('stop_price')
+        )
+        order = _Order(str(uuid.uuid4()), product_id, side, order_type, configuration, True, client_order_id)
+        if checked['base_size'] is not None:
+            order.size = order.remaining = to_units(checked['base_size'], book.base_scale)[0]
+        elif order_type == 'MARKET' and checked['quote_size'] is not None:
+            order.quote = to_units(checked['quote_size'], book.quote_scale)[0]
+            order.quote_left = order.quote * 10 ** book.base_scale
+        else:
+            raise OrderValidationError(f"{product_id}: order has no size")
+        if order_type != 'MARKET':
+            if checked['limit_price'] is None:
+                raise OrderValidationError(f"{product_id}: limit_price is required")
+            order.price = to_units(checked['limit_price'], book.quote_scale)[0]
+        if order_type == 'STOP':
+            if checked['stop_price'] is None:
+                raise OrderValidationError(f"{product_id}: stop_price is required")
+            order.stop = to_units(checked['stop_price'], book.quote_scale)[0]
+        
+        self.submitted += 1
+        self.orders[order.order_id] = order
+        self.order_list.append(order)
+        
+        if order_type == 'STOP' and not self._stop_triggered(book, order):
+            book.stops.append(order)
+            self._updated(order)
+            return order
+        
+        self._execute(book, order)
+        return order
+    
+    def _stop_triggered(self, book: _Book, order: _Order) -> bool:
+        return book.last_price >= order.stop if order.side == 'BUY' else book.last_price <= order.stop
+    
+    def _execute(self, book: _Book, order: _Order):
+        last_trade = book.last_trade_id
+        self._match(book, order)
+        if order.order_type == 'MARKET':
+            self._finish(order, 'FILLED' if order.filled else 'CANCELLED')
+        elif order.remaining:
+            (book.bids if order.side == 'BUY' else book.asks).add(order)
+            book.changed.add((order.side == 'BUY', order.price))
+        self._updated(order)
+        
+        if book.last_trade_id != last_trade:
+            self._trigger_stops(book)
+            self._replenish(book)
+    
+    def _match(self, book: _Book, order: _Order):
+        buy = order.side == 'BUY'
+        opposite = book.asks if buy else book.bids
+        limit = order.price
+        step = book.rules.base_tick
+        while opposite.prices:
+            price = opposite.best()
+            if limit is not None and (price > limit if buy else price < limit):
+                break
+            level = opposite.levels[price]
+            while level:
+                maker = level[0]
+                if not maker.remaining:
+                    level.popleft()  # Cancelled
+                    continue
+                if order.quote is not None:
+                    size = order.quote_left // price
+                    size -= size % step
+                else:
+                    size = order.remaining
+                if size <= 0:
+                    return
+                size = min(size, maker.remaining)
+                self._trade(book, maker, order, price, size)
+                opposite.depth[price] -= size
+                book.changed.add((not buy, price))
+                if not maker.remaining:
+                    level.popleft()
+            if not opposite.depth[price]:
+                opposite.drop_level(price)
+            if order.quote is None and not order.remaining:
+                return
+    
+    def _trade(self, book: _Book, maker: _Order, taker: _Order, price: int, size: int):
+        value = price * size
+        now = time.time()
+        book.last_trade_id += 1
+        book.last_price = price
+        book.last_size = size
+        book.volume += size
+        self.matches += 1
+        
+        for order, fee_bps, liquidity in ((maker, self.maker_fee_bps, 'MAKER'), (taker, self.taker_fee_bps, 'TAKER')):
+            fee = value * fee_bps // 10000
+            order.filled += size
+            order.value += value
+            order.fee += fee
+            order.fills += 1
+            if order.quote is not None:
+                order.quote_left -= value
+            else:
+                order.remaining -= size
+                if not order.remaining and order.order_type != 'MARKET':
+                    self._finish(order, 'FILLED')
+            if order.user:
+                self._record_fill(book, order, price, size, fee, liquidity, now)
+                if order is maker:
+                    self._updated(order)
+        
+        if self.record_events:
+            self.trades.append({
+                'trade_id': str(book.last_trade_id),
+                'product_id': book.product['id'],
+                'price': from_units(price, book.quote_scale),
+                'size': from_units(size, book.base_scale),
+                'side': taker.side,
+                'time': _timestamp(now)
+            })
+    
+    def _record_fill(self, book: _Book, order: _Order, price: int, size: int, fee: int, liquidity: str, now: float):
+        base, quote = book.product['base_currency'], book.product['quote_currency']
+        amount = size / 10 ** book.base_scale
+        notional = price * size / 10 ** (book.base_scale + book.quote_scale)
+        commission = fee / 10 ** (book.base_scale + book.quote_scale)
+        if order.side == 'BUY':
+            self.balances[base] = self.balances.get(base, 0.0) + amount
+            self.balances[quote] = self.balances.get(quote, 0.0) - notional - commission
+        else:
+            self.balances[base] = self.balances.get(base, 0.0) - amount
+            self.balances[quote] = self.balances.get(quote, 0.0) + notional - commission
+        stamp = _timestamp(now)
+        self.fills.append({
+            'entry_id': f"{book.product['id']}:{book.last_trade_id}:{order.order_id[:8]}",
+            'trade_id': str(book.last_trade_id),
+            'order_id': order.order_id,
+            'trade_time': stamp,
+            'trade_type': 'FILL',
+            'price': from_units(price, book.quote_scale),
+            'size': from_units(size, book.base_scale),
+            'commission': from_units(fee, book.base_scale + book.quote_scale),
+            'product_id': book.product['id'],
+            'sequence_timestamp': stamp,
+            'liquidity_indicator': liquidity,
+            'size_in_quote': False,
+            'user_id': 'simulated-user',
+            'side': order.side
+        })
+    
+    def _trigger_stops(self, book: _Book):
+        while book.stops:
+            triggered = [order for order in book.stops if self._stop_triggered(book, order)]
+            if not triggered:
+                return
+            book.stops = [order for order in book.stops if order not in triggered]
+            for order in triggered:
+                self._execute(book, order)
+    
+    def _finish(self, order: _Order, status: str):
+        order.status = status
+        order.completed = time.time()
+    
+    def _updated(self, order: _Order):
+        if self.record_events and order.user:
+            self.updated_orders[order.order_id] = order
+    
+    def cancel(self, order_id: str) -> Optional[str]:
+        """Cancel an open user order; returns a failure reason or None"""
+        order = self.orders.get(order_id)
+        if order is None:
+            return 'UNKNOWN_CANCEL_ORDER'
+        if order.status != 'OPEN':
+            return 'DUPLICATE_CANCEL_REQUEST' if order.status == 'CANCELLED' else 'UNKNOWN_CANCEL_FAILURE_REASON'
+        book = self.books[order.product_id]
+        if order in book.stops:
+            book.stops.remove(order)
+        elif order.remaining:
+            side = book.bids if order.side == 'BUY' else book.asks
+            side.depth[order.price] -= order.remaining
+            book.changed.add((side.buy, order.price))
+            if not side.depth[order.price]:
+                side.drop_level(order.price)
+        order.remaining = 0
+        self._finish(order, 'CANCELLED')
+        self._updated(order)
+        return None
+    
+    # Views
+    
+    def order_dict(self, order: _Order) -> dict:
+        book = self.books[order.product_id]
+        value_scale = book.base_scale + book.quote_scale
+        return {
+            'order_id': order.order_id,
+            'product_id': order.product_id,
+            'user_id': 'simulated-user',
+            'order_configuration': order.configuration,
+            'side': order.side,
+            'client_order_id': order.client_order_id,
+            'status': order.status,
+            'time_in_force': 'IMMEDIATE_OR_CANCEL' if order.order_type == 'MARKET' else 'GOOD_UNTIL_CANCELLED',
+            'created_time': _timestamp(order.created),
+            'creation_time': _timestamp(order.created),
+            'completion_time': _timestamp(order.completed) if order.completed else None,
+            'completion_percentage': '100' if order.status == 'FILLED' else '0',
+            'filled_size': from_units(order.filled, book.base_scale),
+            'average_filled_price': from_units(order.value // order.filled, book.quote_scale) if order.filled else '0',
+            'fee': from_units(order.fee, value_scale),
+            'number_of_fills': order.fills,
+            'filled_value': from_units(order.value, value_scale),
+            'pending_cancel': False,
+            'size_in_quote': order.quote is not None,
+            'total_fees': from_units(order.fee, value_scale),
+            'type': order.order_type,
+            'order_type': order.order_type,
+            'post_only': False,
+            'pending_cancel_reason': None,
+            'reject_reason': order.reject_reason,
+            'settled': order.status != 'OPEN',
+            'leaves_quantity': from_units(order.remaining, book.base_scale)
+        }
+    
+    def ticker(self, product_id: str) -> dict:
+        book = self.books[product_id]
+        bid, ask = book.bids.best(), book.asks.best()
+        return {
+            'trade_id': str(book.last_trade_id),
+            'price': from_units(book.last_price, book.quote_scale),
+            'size': from_units(book.last_size, book.base_scale),
+            'time': _timestamp(),
+            'bid': from_units(bid, book.quote_scale) if bid is not None else '0',
+            'ask': from_units(ask, book.quote_scale) if ask is not None else '0',
+            'volume': from_units(book.volume, book.base_scale)
+        }
+    
+    def product_dict(self, product_id: str) -> dict:
+        book = self.books[product_id]
+        return {
+            **book.product,
+            'price': from_units(book.last_price, book.quote_scale),
+            'volume_24h': from_units(book.volume, book.base_scale)
+        }
+    
+    def level_updates(self, product_id: str, levels: Iterable[tuple]) -> List[dict]:
+        book = self.books[product_id]
+        updates = []
+        for buy, price in levels:
+            side = book.bids if buy else book.asks
+            updates.append({
+                'side': 'bid' if buy else 'offer',
+                'event_time': _timestamp(),
+                'price_level': from_units(price, book.quote_scale),
+                'new_quantity': from_units(side.depth.get(price, 0), book.base_scale)
+            })
+        return updates
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'products': len(self.books),
+            'orders_submitted': self.submitted,
+            'orders_rejected': self.rejected,
+            'open_orders': sum(1 for order in self.order_list if order.status == 'OPEN'),
+            'matches': self.matches,
+            'fills': len(self.fills)
+        }
+
+
+# ============================================================================
+# HTTP / WebSocket server
+# ============================================================================
+
+class _Subscriber:
+    __slots__ = ('ws', 'channels', 'sequence')
+    
+    def __init__(self, ws: web.WebSocketResponse):
+        self.ws = ws
+        self.channels: Dict[str, set] = {}
+        self.sequence = 0
+
+
+class SimulatedExchange:
+    """
+    MatchingEngine behind the Coinbase REST paths and WebSocket channels
+    latency/jitter delay every REST response; error_rate fails that share of
+    REST calls with error_status. All can be changed at runtime via inject().
+    """
+    
+    # WebSocket subscription channel -> channel name on messages
+    CHANNELS = {
+        'ticker': 'ticker',
+        'level2': 'l2_data',
+        'market_trades': 'market_trades',
+        'user': 'user',
+        'heartbeats': 'heartbeats'
+    }
+    
+    def __init__(
+        self,
+        engine: Optional[MatchingEngine] = None,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None
+    ):
+        self.engine = engine or MatchingEngine()
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self._subscribers: List[_Subscriber] = []
+        self._outbox: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        
+        app = web.Application(middlewares=[self._inject])
+        prefix = '/api/v1'
+        app.router.add_get(f'{prefix}/accounts', self._accounts)
+        app.router.add_get(f'{prefix}/accounts/{{account_id}}', self._account)
+        app.router.add_get(f'{prefix}/products', self._products)
+        app.router.add_get(f'{prefix}/products/{{product_id}}', self._product)
+        app.router.add_get(f'{prefix}/products/{{product_id}}/ticker', self._ticker)
+        app.router.add_post(f'{prefix}/brokerage/orders', self._place)
+        app.router.add_get(f'{prefix}/brokerage/orders/batch', self._list_orders)
+        app.router.add_post(f'{prefix}/brokerage/orders/batch_cancel', self._batch_cancel)
+        app.router.add_get(f'{prefix}/brokerage/orders/historical/fills', self._fills)
+        app.router.add_get(f'{prefix}/brokerage/orders/{{order_id}}', self._get_order)
+        app.router.add_post(f'{prefix}/brokerage/orders/{{order_id}}/cancel', self._cancel)
+        app.router.add_get('/ws', self._ws)
+        self.app = app
+        
+        # Counters
+        self.requests = 0
+        self.injected_errors = 0
+    
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+    
+    @property
+    def ws_url(self) -> str:
+        return f'ws://{self.host}:{self.port}/ws'
+    
+    def inject(
+        self,
+        latency: Optional[float] = None,
+        jitter: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        error_status: Optional[int] = None
+    ):
+        """Change latency/error injection while running"""
+        if latency is not None:
+            self.latency = latency
+        if jitter is not None:
+            self.jitter = jitter
+        if error_rate is not None:
+            self.error_rate = error_rate
+        if error_status is not None:
+            self.error_status = error_status
+    
+    async def start(self):
+        """Start serving (port 0 picks a free port)"""
+        self._outbox = asyncio.Queue()
+        self._tasks = [
+            asyncio.ensure_future(self._publisher()),
+            asyncio.ensure_future(self._heartbeats())
+        ]
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        for subscriber in list(self._subscribers):
+            await subscriber.ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    async def __aenter__(self):
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+    
+    @web.middleware
+    async def _inject(self, request: web.Request, handler):
+        if request.path == '/ws':
+            return await handler(request)
+        self.requests += 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.injected_errors += 1
+            return _json({'error': 'INJECTED', 'message': 'Simulated upstream failure'}, self.error_status)
+        response = await handler(request)
+        if self.engine.record_events:
+            self._outbox.put_nowait(None)  # Publish what the call changed
+        return response
+    
+    # REST handlers
+    
+    async def _accounts(self, request: web.Request) -> web.Response:
+        return _json({'accounts': [self._account_dict(currency) for currency in self.engine.balances]})
+    
+    async def _account(self, request: web.Request) -> web.Response:
+        currency = request.match_info['account_id'].replace('account-', '')
+        if currency not in self.engine.balances:
+            return _json({'error': 'NOT_FOUND', 'message': 'account not found'}, 404)
+        return _json(self._account_dict(currency))
+    
+    def _account_dict(self, currency: str) -> dict:
+        return {
+            'uuid': f'account-{currency}',
+            'name': f'{currency} Wallet',
+            'currency': currency,
+            'available_balance': {'value': f"{self.engine.balances[currency]:.8f}", 'currency': currency},
+            'default': True,
+            'active': True,
+            'created_at': '2024-01-01T00:00:00Z',
+            'updated_at': _timestamp()
+        }
+    
+    async def _products(self, request: web.Request) -> web.Response:
+        products = [self.engine.product_dict(product_id) for product_id in self.engine.books]
+        return _json({'products': products, 'num_products': len(products)})
+    
+    async def _product(self, request: web.Request) -> web.Response:
+        product_id = request.match_info['product_id']
+        if product_id not in self.engine.books:
+            return _json({'error': 'NOT_FOUND', 'message': f'product {product_id} not found'}, 404)
+        return _json(self.engine.product_dict(product_id))
+    
+    async def _ticker(self, request: web.Request) -> web.Response:
+        product_id = request.match_info['product_id']
+        if product_id not in self.engine.books:
+            return _json({'error': 'NOT_FOUND', 'message': f'product {product_id} not found'}, 404)
+        return _json(self.engine.ticker(product_id))
+    
+    async def _place(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        try:
+            order = self.engine.submit(
+                body.get('product_id', ''),
+                body.get('side', ''),
+                body.get('order_configuration') or {},
+                body.get('client_order_id', '')
+            )
+        except OrderValidationError as e:
+            self.engine.rejected += 1
+            return _json({
+                'success': False,
+                'error_response': {'error': 'INVALID_ORDER', 'message': str(e)}
+            }, 400)
+        order_dict = self.engine.order_dict(order)
+        return _json({
+            'success': True,
+            'order_id': order.order_id,
+            'success_response': {
+                'order_id': order.order_id,
+                'product_id': order.product_id,
+                'side': order.side,
+                'client_order_id': order.client_order_id
+            },
+            'order': order_dict
+        })
+    
+    async def _get_order(self, request: web.Request) -> web.Response:
+        order = self.engine.orders.get(request.match_info['order_id'])
+        if order is None:
+            return _json({'error': 'NOT_FOUND', 'message': 'order not found'}, 404)
+        return _json({'order': self.engine.order_dict(order)})
+    
+    async def _cancel(self, request: web.Request) -> web.Response:
+        order_id = request.match_info['order_id']
+        reason = self.engine.cancel(order_id)
+        if reason is not None:
+            return _json({'error': reason, 'message': f'cannot cancel {order_id}'}, 400)
+        return _json({'results': [{'success': True, 'failure_reason': None, 'order_id': order_id}]})
+    
+    async def _batch_cancel(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        results = []
+        for order_id in body.get('order_ids', []):
+            reason = self.engine.cancel(order_id)
+            results.append({'success': reason is None, 'failure_reason': reason, 'order_id': order_id})
+        return _json({'results': results})
+    
+    async def _list_orders(self, request: web.Request) -> web.Response:
+        query = request.query
+        statuses = set(query.getall('order_status', []))
+        statuses = {status for value in statuses for status in value.split(',') if status}
+        product_id = query.get('product_id')
+        start = query.get('start_date')
+        limit = max(1, min(int(query.get('limit', '100')), 1000))
+        position = int(query.get('cursor') or len(self.engine.order_list))
+        
+        orders = []
+        order_list = self.engine.order_list
+        while position > 0 and len(orders) < limit:
+            position -= 1
+            order = order_list[position]
+            if start and _timestamp(order.created) < start:
+                position = 0
+                break
+            if (not statuses or order.status in statuses) and (not product_id or order.product_id == product_id):
+                orders.append(self.engine.order_dict(order))
+        return _json({'orders': orders, 'cursor': str(position) if position else '', 'has_next': position > 0})
+    
+    async def _fills(self, request: web.Request) -> web.Response:
+        query = request.query
+        product_id = query.get('product_id')
+        order_id = query.get('order_id')
+        start = query.get('start_sequence_timestamp')
+        end = query.get('end_sequence_timestamp')
+        limit = max(1, min(int(query.get('limit', '100')), 1000))
+        fills = self.engine.fills
+        position = int(query.get('cursor') or len(fills))
+        
+        page = []
+        while position > 0 and len(page) < limit:
+            position -= 1
+            fill = fills[position]
+            if start and fill['sequence_timestamp'] < start:
+                position = 0
+                break
+            if end and fill['sequence_timestamp'] > end:
+                continue
+            if (not product_id or fill['product_id'] == product_id) and (not order_id or fill['order_id'] == order_id):
+                page.append(fill)
+        return _json({'fills': page, 'cursor': str(position) if position else ''})
+    
+    # WebSocket feed
+    
+    async def _ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        subscriber = _Subscriber(ws)
+        self._subscribers.append(subscriber)
+        self.engine.record_events = True
+        try:
+            async for msg in ws:
+                if msg.type != web.WSMsgType.TEXT:
+                    continue
+                message = msg.json()
+                channel = message.get('channel')
+                if channel not in self.CHANNELS:
+                    continue
+                products = set(message.get('product_ids') or self.engine.books)
+                if message.get('type') == 'unsubscribe':
+                    subscriber.channels.get(channel, set()).difference_update(products)
+                    continue
+                subscriber.channels.setdefault(channel, set()).update(products)
+                await self._send_snapshot(subscriber, channel, products)
+        finally:
+            self._subscribers.remove(subscriber)
+            self.engine.record_events = bool(self._subscribers)
+        return ws
+    
+    async def _send(self, subscriber: _Subscriber, channel: str, events: List[dict]):
+        message = {
+            'channel': self.CHANNELS[channel],
+            'client_id': '',
+            'timestamp': _timestamp(),
+            'sequence_num': subscriber.sequence,
+            'events': events
+        }
+        subscriber.sequence += 1
+        await subscriber.ws.send_str(json_dumps(message))
+    
+    async def _send_snapshot(self, subscriber: _Subscriber, channel: str, products: set):
+        engine = self.engine
+        products = [product_id for product_id in products if product_id in engine.books]
+        if channel == 'ticker':
+            await self._send(subscriber, channel, [{'type': 'snapshot', 'tickers': [
+                self._ticker_event(product_id) for product_id in products
+            ]}])
+        elif channel == 'level2':
+            for product_id in products:
+                book = engine.books[product_id]
+                levels = [(True, price) for price, _ in book.bids.top(1000)]
+                levels += [(False, price) for price, _ in book.asks.top(1000)]
+                await self._send(subscriber, channel, [{
+                    'type': 'snapshot',
+                    'product_id': product_id,
+                    'updates': engine.level_updates(product_id, levels)
+                }])
+        elif channel == 'user':
+            await self._send(subscriber, channel, [{'type': 'snapshot', 'orders': [
+                self._order_event(order) for order in engine.order_list
+                if order.status == 'OPEN' and order.product_id in products
+            ]}])
+    
+    def _ticker_event(self, product_id: str) -> dict:
+        ticker = self.engine.ticker(product_id)
+        return {
+            'type': 'ticker',
+            'product_id': product_id,
+            'price': ticker['price'],
+            'volume_24_h': ticker['volume'],
+            'best_bid': ticker['bid'],
+            'best_ask': ticker['ask']
+        }
+    
+    def _order_event(self, order: _Order) -> dict:
+        order_dict = self.engine.order_dict(order)
+        return {
+            'order_id': order.order_id,
+            'client_order_id': order.client_order_id,
+            'product_id': order.product_id,
+            'order_side': order.side,
+            'order_type': order.order_type,
+            'status': order.status,
+            'creation_time': order_dict['creation_time'],
+            'cumulative_quantity': order_dict['filled_size'],
+            'leaves_quantity': order_dict['leaves_quantity'],
+            'avg_price': order_dict['average_filled_price'],
+            'total_fees': order_dict['total_fees']
+        }
+    
+    async def _publisher(self):
+        """Turn engine changes into feed messages for every subscriber"""
+        engine = self.engine
+        while True:
+            await self._outbox.get()
+            while not self._outbox.empty():
+                self._outbox.get_nowait()
+            
+            trades, engine.trades = engine.trades, []
+            orders, engine.updated_orders = list(engine.updated_orders.values()), {}
+            levels = {}
+            for product_id, book in engine.books.items():
+                if book.changed:
+                    levels[product_id], book.changed = book.changed, set()
+            
+            traded = {trade['product_id'] for trade in trades}
+            for subscriber in list(self._subscribers):
+                channels = subscriber.channels
+                try:
+                    if trades and 'market_trades' in channels:
+                        wanted = [trade for trade in trades if trade['product_id'] in channels['market_trades']]
+                        if wanted:
+                            await self._send(subscriber, 'market_trades', [{'type': 'update', 'trades': wanted}])
+                    if traded and 'ticker' in channels:
+                        tickers = [self._ticker_event(product_id) for product_id in traded & channels['ticker']]
+                        if tickers:
+                            await self._send(subscriber, 'ticker', [{'type': 'update', 'tickers': tickers}])
+                    if levels and 'level2' in channels:
+                        for product_id, changed in levels.items():
+                            if product_id in channels['level2']:
+                                await self._send(subscriber, 'level2', [{
+                                    'type': 'update',
+                                    'product_id': product_id,
+                                    'updates': engine.level_updates(product_id, changed)
+                                }])
+                    if orders and 'user' in channels:
+                        events = [self._order_event(order) for order in orders if order.product_id in channels['user']]
+                        if events:
+                            await self._send(subscriber, 'user', [{'type': 'update', 'orders': events}])
+                except ConnectionError:
+                    continue  # The reader loop drops the subscriber
+    
+    async def _heartbeats(self):
+        for counter in itertools.count(1):
+            await asyncio.sleep(1.0)
+            for subscriber in list(self._subscribers):
+                if 'heartbeats' in subscriber.channels:
+                    try:
+                        await self._send(subscriber, 'heartbeats', [{
+                            'current_time': _timestamp(), 'heartbeat_counter': counter
+                        }])
+                    except ConnectionError:
+                        continue
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'requests': self.requests,
+            'injected_errors': self.injected_errors,
+            'subscribers': len(self._subscribers),
+            **self.engine.stats()
+        }
+
+
+def _json(data: Any, status: int = 200) -> web.Response:
+    return web.Response(body=json_dumps(data), status=status, content_type='application/json')
+
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Run the simulated exchange')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every REST call')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random delay, up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of REST calls that fail')
+    args = parser.parse_args()
+    
+    async def serve():
+        exchange = SimulatedExchange(
+            host=args.host, port=args.port, latency=args.latency,
+            jitter=args.jitter, error_rate=args.error_rate
+        )
+        await exchange.start()
+        print(f"Simulated exchange on {exchange.url} (WebSocket {exchange.ws_url})")
+        print(f"Set COINBASE_BASE_URL={exchange.url} and COINBASE_WS_URL={exchange.ws_url}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await exchange.stop()
+    
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,50 @@
+"""
+Single-flight Request Coalescing
+Concurrent callers of an identical in-flight call share one upstream request.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Any
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key"""
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.issued = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `fn()` once per key at a time.
+        Callers arriving while a call for `key` is in flight await its result.
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            self.issued += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        
+        # Shield so one caller's cancellation does not cancel the shared call
+        return await asyncio.shield(future)
+    
+    def _finish(self, key: Hashable, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            # Mark the exception retrieved in case every caller went away
+            future.exception()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Issued vs coalesced call counters"""
+        total = self.issued + self.coalesced
+        return {
+            'in_flight': len(self._inflight),
+            'issued': self.issued,
+            'coalesced': self.coalesced,
+            'fan_in': round(total / self.issued, 3) if self.issued else 0.0
+        }
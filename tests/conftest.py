@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Modules live at the repository root; shared test helpers next to this file
+TESTS = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(TESTS), TESTS]
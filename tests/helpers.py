@@ -0,0 +1,35 @@
+"""
+Shared test fixtures: a client wired to the simulated exchange with an
+unlimited rate budget, and helpers that set up exchange state.
+"""
+
+from coinbase_client import CoinbaseClient, OrderRequest, OrderSide, OrderType
+from rate_limiter import PriorityRequestScheduler, TokenBucket
+from simulated_exchange import SimulatedExchange
+
+
+def make_client(exchange: SimulatedExchange, **kwargs) -> CoinbaseClient:
+    """Client for `exchange`; unless overridden, never throttled and without local order validation"""
+    kwargs.setdefault('validate_orders', False)
+    kwargs.setdefault('scheduler', PriorityRequestScheduler({
+        'public': TokenBucket(1e9),
+        'private': TokenBucket(1e9)
+    }))
+    return CoinbaseClient('key', 'secret', 'passphrase', base_url=exchange.url, **kwargs)
+
+
+async def rest_orders(client: CoinbaseClient, count: int, product_id: str = 'BTC-USD', price: int = 20000) -> list:
+    """Place `count` bids far below the market so they all rest"""
+    requests = [
+        OrderRequest(
+            product_id=product_id,
+            side=OrderSide.BUY,
+            order_type=OrderType.LIMIT,
+            base_size='0.001',
+            limit_price=f'{price + i:.2f}'
+        )
+        for i in range(count)
+    ]
+    results = await client.place_orders(requests, concurrency=20)
+    assert all(result['success'] for result in results)
+    return [result['order'].order_id for result in results]
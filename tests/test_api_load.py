@@ -0,0 +1,79 @@
+"""
+Load benchmark: request mixes, percentile summaries and baseline gating,
+the closed-loop driver against a local server, and a short end-to-end run
+of the app against the simulated exchange.
+"""
+
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from benchmarks.api_load import ENDPOINTS, compare, drive, parse_mix, run, summarize
+
+
+def test_parse_mix():
+    assert parse_mix(None) == {name: weight for name, (_, _, weight) in ENDPOINTS.items()}
+    assert parse_mix('ticker=50, book, health=0') == {'ticker': 50, 'book': ENDPOINTS['book'][2]}
+    with pytest.raises(ValueError, match='Unknown endpoint'):
+        parse_mix('ticker=1,teapot=2')
+
+
+def test_summarize_and_compare():
+    summary = summarize([i / 1000 for i in range(1, 101)], errors=2, seconds=2.0)
+    assert (summary['requests'], summary['errors'], summary['requests_per_second']) == (100, 2, 50.0)
+    assert summary['p50_ms'] == pytest.approx(50.5)
+    assert summary['max_ms'] == 100.0
+    assert summarize([], errors=3, seconds=1.0) == {'requests': 0, 'errors': 3}
+    
+    baseline = {'endpoints': {'ticker': summary, 'book': summary}}
+    slower = {**summary, 'p95_ms': summary['p95_ms'] * 1.5, 'requests_per_second': 30.0}
+    current = {'endpoints': {'ticker': slower, 'book': summary, 'health': summary}}
+    regressions = compare(current, baseline, threshold=0.2)
+    assert [regression.split(':')[0] for regression in regressions] == [
+        'ticker p95_ms', 'ticker requests_per_second'
+    ]
+    assert compare(current, baseline, threshold=1.0) == []
+
+
+def test_drive_records_only_after_warmup():
+    calls = {'health': 0, 'ticker': 0}
+    
+    async def health(request):
+        calls['health'] += 1
+        return web.json_response({'status': 'ok'})
+    
+    async def ticker(request):
+        calls['ticker'] += 1
+        return web.json_response({'detail': 'down'}, status=503)
+    
+    async def scenario():
+        app = web.Application()
+        app.router.add_get('/health', health)
+        app.router.add_get('/trading/ticker/BTC-USD', ticker)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        try:
+            return await drive(url, {'health': 1, 'ticker': 1}, concurrency=2, duration=0.3, warmup=0.1, seed=1)
+        finally:
+            await runner.cleanup()
+    
+    result = asyncio.run(scenario())
+    endpoints = result['endpoints']
+    assert endpoints['health']['errors'] == 0
+    assert endpoints['ticker']['errors'] == endpoints['ticker']['requests'] > 0
+    assert result['first_failures']['ticker'].startswith('503')
+    assert result['total']['requests'] == endpoints['health']['requests'] + endpoints['ticker']['requests']
+    assert result['total']['requests'] < calls['health'] + calls['ticker']  # Warmup went unrecorded
+
+
+def test_short_run_end_to_end():
+    mix = parse_mix('ticker=5,book=2,accounts=1,place_limit=2,graph_user=1')
+    result = run(mix, concurrency=2, duration=0.3, warmup=0.1, upstream_latency=0.0, seed=3)
+    assert set(result['endpoints']) == set(mix)
+    assert result['total']['requests'] > 0 and result['total']['errors'] == 0, result['first_failures']
+    assert result['exchange']['orders_submitted'] > 0
+    assert result['config']['mix'] == mix
@@ -0,0 +1,68 @@
+"""
+Azure AD and Graph calls share one pooled transport: the token exchange,
+refresh and every Graph request reuse its connections.
+"""
+
+import asyncio
+
+from azure_auth import AzureADClient, AzureADLoginManager
+from benchmarks.stand_ins import GraphStandIn
+from http_transport import HTTPTransport
+
+
+def _client(server: GraphStandIn, transport: HTTPTransport) -> AzureADClient:
+    return AzureADClient(
+        tenant_id='tenant',
+        client_id='client',
+        client_secret='secret',
+        redirect_uri='http://localhost/auth/callback',
+        transport=transport,
+        authority_host=server.url,
+        graph_api_url=server.graph_api_url
+    )
+
+
+def test_login_and_graph_calls_share_one_connection():
+    async def scenario():
+        async with GraphStandIn() as server:
+            transport = HTTPTransport()
+            client = _client(server, transport)
+            manager = AzureADLoginManager(client)
+            await client.open()
+            try:
+                session = manager.create_login_session()
+                completed = await manager.complete_login(session['state'], 'code')
+                tokens = completed['tokens']
+                assert completed['user_info'] == GraphStandIn.USER
+                
+                refreshed = await client.refresh_token(tokens.refresh_token)
+                assert refreshed.access_token == tokens.access_token
+                assert len(await client.get_user_calendar(tokens.access_token)) == 5
+                assert len(await client.get_user_mail(tokens.access_token, top=3)) == 3
+                
+                stats = transport.stats()
+                assert stats['created'] == 1
+                assert stats['reused'] == 4
+            finally:
+                await client.close()
+            assert not transport.is_open
+    
+    asyncio.run(scenario())
+
+
+def test_concurrent_graph_calls_stay_within_the_pool():
+    async def scenario():
+        async with GraphStandIn() as server:
+            transport = HTTPTransport(pool_size_per_host=4)
+            client = _client(server, transport)
+            await client.open()
+            try:
+                users = await asyncio.gather(*(client.get_user_info('token') for _ in range(32)))
+                assert all(user == GraphStandIn.USER for user in users)
+                stats = transport.stats()
+                assert stats['created'] <= 4
+                assert stats['created'] + stats['reused'] == 32
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
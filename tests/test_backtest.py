@@ -0,0 +1,124 @@
+"""
+Backtesting: trades roll up into the same bars as the candle aggregator, the
+vectorized path agrees with the event-driven broker for 0/1 signals, and
+the broker fills market, limit and stop orders against bar ranges.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from backtest import (
+    MovingAverageCross, SignalAdapter, SignalStrategy, SimulatedBroker, bars_from_trades, run_events,
+    run_vectorized, sweep
+)
+from candles import CLOSE, OPEN
+from coinbase_client import OrderRequest, OrderSide, OrderType
+
+
+def _walk(length: int, seed: int, start: float = 100.0) -> np.ndarray:
+    """Random-walk OHLCV bars one minute apart"""
+    rng = random.Random(seed)
+    bars, price = [], start
+    for index in range(length):
+        open_ = price
+        close = open_ * (1 + rng.gauss(0, 0.01))
+        high = max(open_, close) * (1 + rng.random() * 0.005)
+        low = min(open_, close) * (1 - rng.random() * 0.005)
+        bars.append([1_700_000_000 + index * 60, open_, high, low, close, rng.uniform(1, 10)])
+        price = close * (1 + rng.gauss(0, 0.002))  # Gap to the next open
+    return np.array(bars)
+
+
+def _bar(open_: float, high: float, low: float, close: float, start: float = 0.0) -> np.ndarray:
+    return np.array([start, open_, high, low, close, 1.0])
+
+
+class AlwaysLong(SignalStrategy):
+    def signals(self, bars):
+        return np.ones(bars.shape[:2])
+
+
+def test_bars_from_trades():
+    bars = bars_from_trades([0, 10, 59, 60, 200], [10, 12, 11, 9, 8], [1, 2, 3, 4, 5], period=60)
+    assert bars.tolist() == [
+        [0, 10, 12, 10, 11, 6],
+        [60, 9, 9, 9, 9, 4],
+        [180, 8, 8, 8, 8, 5]
+    ]
+    assert bars_from_trades([], [], [], period=60).shape == (0, 6)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_vectorized_matches_the_broker(seed):
+    bars = np.stack([_walk(300, seed), _walk(300, seed + 10, start=20.0)])
+    ids = ['BTC-USD', 'ETH-USD']
+    strategy = MovingAverageCross(fast=5, slow=20)
+    
+    fast = run_vectorized(strategy, bars, ids)
+    slow = run_events(SignalAdapter(strategy), bars, ids)
+    assert fast.trades == slow.trades > 0
+    assert fast.equity == pytest.approx(slow.equity, rel=1e-9)
+    assert fast.fees == pytest.approx(slow.fees, rel=1e-9)
+    assert fast.exposure == pytest.approx(slow.exposure)
+    for product_id in ids:
+        assert fast.product_returns[product_id] == pytest.approx(slow.product_returns[product_id], abs=1e-9)
+
+
+def test_signals_trade_at_the_next_open():
+    bars = _walk(50, seed=7)
+    result = run_vectorized(AlwaysLong(), bars, cash=1000, fee_rate=0.0, slippage_bps=0.0)
+    assert result.equity[0] == 1000
+    assert result.total_return == pytest.approx(bars[-1, CLOSE] / bars[1, OPEN] - 1)
+    assert result.trades == 1
+
+
+def test_broker_fills_orders_against_bar_ranges():
+    broker = SimulatedBroker(cash=10000, fee_rate=0.01, maker_fee_rate=0.005, slippage_bps=0)
+    market = broker.place_order(OrderRequest('BTC-USD', OrderSide.BUY, OrderType.MARKET, base_size='10'))
+    limit = broker.place_order(OrderRequest('BTC-USD', OrderSide.SELL, OrderType.LIMIT, base_size='4', limit_price='110'))
+    stop = broker.place_order(OrderRequest(
+        'BTC-USD', OrderSide.SELL, OrderType.STOP, base_size='4', limit_price='80', stop_price='90'
+    ))
+    
+    # The limit fills only once the range reaches it (and the sell needs the buy first)
+    broker.process_bar('BTC-USD', _bar(100, 105, 95, 100))
+    assert market.status == 'FILLED' and float(market.fee) == pytest.approx(10)
+    assert broker.position('BTC-USD') == 10
+    assert limit.status == stop.status == 'OPEN'
+    
+    broker.process_bar('BTC-USD', _bar(100, 112, 99, 108))
+    assert limit.status == 'FILLED' and float(limit.average_filled_price) == 110
+    assert broker.fills[-1]['liquidity_indicator'] == 'MAKER'
+    assert float(limit.fee) == pytest.approx(110 * 4 * 0.005)
+    
+    # Gapping through the stop fills at the open
+    broker.process_bar('BTC-USD', _bar(85, 86, 84, 85))
+    assert stop.status == 'FILLED' and float(stop.average_filled_price) == 85
+    assert broker.position('BTC-USD') == pytest.approx(2)
+    assert broker.cash == pytest.approx(10000 - 1010 + 440 - 2.2 + 340 - 3.4)
+    assert broker.equity() == pytest.approx(broker.cash + 2 * 85)
+
+
+def test_broker_rejects_what_it_cannot_pay_for():
+    broker = SimulatedBroker(cash=100, slippage_bps=0)
+    order = broker.place_order(OrderRequest('BTC-USD', OrderSide.BUY, OrderType.MARKET, base_size='1'))
+    broker.process_bar('BTC-USD', _bar(100, 100, 100, 100))
+    assert order.status == 'FAILED' and order.reject_reason == 'INSUFFICIENT_FUND'
+    assert broker.cash == 100 and not broker.fills
+    
+    resting = broker.place_order(OrderRequest('BTC-USD', OrderSide.BUY, OrderType.LIMIT, base_size='0.5', limit_price='50'))
+    assert broker.cancel_order(resting.order_id)
+    assert resting.status == 'CANCELLED'
+    assert not broker.cancel_order(resting.order_id)
+
+
+def test_sweep_ranks_every_combination():
+    bars = _walk(200, seed=2)
+    results = sweep(MovingAverageCross, {'fast': [3, 5], 'slow': [10, 20, 30]}, bars, processes=1)
+    assert len(results) == 6
+    returns = [result['total_return'] for result in results]
+    assert returns == sorted(returns, reverse=True)
+    best = results[0]['params']
+    assert run_vectorized(MovingAverageCross(**best), bars).total_return == pytest.approx(returns[0])
@@ -0,0 +1,89 @@
+"""
+Streaming candles: bars match a direct OHLCV computation, the ring keeps
+only the newest `capacity` bars, late trades never rewrite closed bars,
+and listeners see each bar once as it closes.
+"""
+
+import random
+
+import numpy as np
+
+from candles import CandleAggregator, CandleSeries
+
+
+def _reference(trades: list, period: int) -> list:
+    bars = {}
+    for second, price, size in trades:
+        start = second - second % period
+        if start not in bars:
+            bars[start] = [start, price, price, price, price, size]
+        else:
+            bar = bars[start]
+            bar[2], bar[3] = max(bar[2], price), min(bar[3], price)
+            bar[4] = price
+            bar[5] += size
+    return [bars[start] for start in sorted(bars)]
+
+
+def _trades(count: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    second, trades = 1_700_000_000, []
+    for _ in range(count):
+        second += rng.choice([0, 0, 1, 2, 7])
+        trades.append((second, round(rng.uniform(90, 110), 2), round(rng.uniform(0, 2), 3)))
+    return trades
+
+
+def test_bars_match_a_direct_computation():
+    trades = _trades(5000)
+    for period in (1, 60, 300):
+        series = CandleSeries(period, capacity=10_000)
+        for trade in trades:
+            series.update(*trade)
+        expected = np.array(_reference(trades, period))
+        assert np.allclose(series.latest(10_000), expected)
+        assert np.allclose(series.latest(3), expected[-3:])
+
+
+def test_ring_keeps_the_newest_bars():
+    series = CandleSeries(60, capacity=4)
+    for minute in range(10):
+        series.update(minute * 60, 100 + minute, 1)
+    bars = series.latest(100)
+    assert bars[:, 0].tolist() == [360, 420, 480, 540]
+    assert bars[:, 1].tolist() == [106, 107, 108, 109]
+    assert series.latest(2)[:, 0].tolist() == [480, 540]
+
+
+def test_late_trades_are_counted_not_applied():
+    series = CandleSeries(60, capacity=10)
+    series.update(0, 100, 1)
+    series.update(60, 101, 1)
+    series.update(30, 50, 5)
+    assert series.late == 1
+    assert series.latest(10)[0].tolist() == [0, 100, 100, 100, 100, 1]
+
+
+def test_listeners_get_each_closed_bar():
+    aggregator = CandleAggregator(['1m'], capacity=10)
+    closed = []
+    aggregator.add_bar_listener(lambda product_id, granularity, bar: closed.append((product_id, granularity, bar)))
+    aggregator.on_trades({'events': [{'trades': [
+        {'product_id': 'BTC-USD', 'time': '2024-01-01T00:00:05.1Z', 'price': '100', 'size': '1'},
+        {'product_id': 'BTC-USD', 'time': '2024-01-01T00:00:50.9Z', 'price': '102', 'size': '2'},
+        {'product_id': 'BTC-USD', 'time': '2024-01-01T00:01:00Z', 'price': '99', 'size': '1'}
+    ]}]})
+    start = 1704067200
+    assert closed == [('BTC-USD', '1m', (start, 100.0, 102.0, 100.0, 102.0, 3.0))]
+    assert aggregator.candles('BTC-USD', '1m')[-1].tolist() == [start + 60, 99, 99, 99, 99, 1]
+    assert aggregator.candles('BTC-USD', '5m') is None
+    assert aggregator.candles('ETH-USD', '1m') is None
+
+
+def test_ticker_prices_make_zero_volume_bars():
+    aggregator = CandleAggregator(['1s'], capacity=10)
+    aggregator.on_ticker({'timestamp': '2024-01-01T00:00:00Z', 'events': [{'tickers': [
+        {'product_id': 'ETH-USD', 'price': '3000'}, {'product_id': 'ETH-USD', 'price': '3001'}
+    ]}]})
+    assert aggregator.candles('ETH-USD', '1s').tolist() == [[1704067200, 3000, 3001, 3000, 3001, 0]]
+    assert aggregator.stats()['ticks'] == 2
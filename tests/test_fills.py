@@ -0,0 +1,117 @@
+"""
+Fills pagination: iter_fills follows every cursor (prefetching the next
+page) with filters applied server-side, and the NDJSON endpoint streams
+one fill per line, reporting mid-stream failures in-band.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+
+import main
+from coinbase_client import OrderSide, json_loads
+from helpers import make_client
+from simulated_exchange import SimulatedExchange
+
+
+async def _take(client, product_id: str, count: int):
+    """`count` taker buys priced through the book, one fill each"""
+    price = '100000' if product_id == 'BTC-USD' else '5000'
+    for _ in range(count):
+        await client.place_limit_order(product_id, OrderSide.BUY, '0.01', price)
+
+
+def test_iter_fills_follows_every_page():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange)
+            await client.open()
+            try:
+                await _take(client, 'BTC-USD', 23)
+                await _take(client, 'ETH-USD', 4)
+                
+                fills = [fill async for fill in client.iter_fills(page_size=5)]
+                assert len(fills) == 27
+                assert len({fill['entry_id'] for fill in fills}) == 27
+                times = [fill['sequence_timestamp'] for fill in fills]
+                assert times == sorted(times, reverse=True)  # Newest first
+                
+                eth = [fill async for fill in client.iter_fills(product_id='ETH-USD', page_size=3)]
+                assert [fill['product_id'] for fill in eth] == ['ETH-USD'] * 4
+                
+                since = [fill async for fill in client.iter_fills(page_size=5, start=times[9])]
+                assert len(since) == 10
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
+
+
+def test_stopping_early_cancels_the_prefetched_page():
+    async def scenario():
+        async with SimulatedExchange(latency=0.02) as exchange:
+            client = make_client(exchange)
+            await client.open()
+            try:
+                await _take(client, 'BTC-USD', 12)
+                requests = exchange.requests
+                async for fill in client.iter_fills(page_size=4):
+                    break
+                await asyncio.sleep(0.05)
+                assert exchange.requests - requests <= 2  # The first page and at most the prefetch
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
+
+
+def _stream(monkeypatch, client) -> httpx.AsyncClient:
+    monkeypatch.setattr(main, 'config', SimpleNamespace(coinbase=SimpleNamespace(is_configured=lambda: True)))
+    monkeypatch.setattr(main, 'coinbase_client', client)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url='http://test')
+
+
+def test_ndjson_stream(monkeypatch):
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange)
+            await client.open()
+            try:
+                await _take(client, 'BTC-USD', 7)
+                async with _stream(monkeypatch, client) as http:
+                    response = await http.get('/trading/fills/stream', params={'page_size': 3})
+                assert response.headers['content-type'].startswith('application/x-ndjson')
+                lines = response.text.splitlines()
+                assert len(lines) == 7
+                assert all(json_loads(line)['product_id'] == 'BTC-USD' for line in lines)
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
+
+
+def test_ndjson_stream_reports_failures_in_band(monkeypatch):
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange)
+            await client.open()
+            try:
+                await _take(client, 'BTC-USD', 3)
+                iter_fills = client.iter_fills
+                
+                async def failing_iter_fills(**kwargs):
+                    async for fill in iter_fills(**kwargs):
+                        yield fill
+                    raise RuntimeError('page fetch failed')
+                
+                client.iter_fills = failing_iter_fills
+                async with _stream(monkeypatch, client) as http:
+                    response = await http.get('/trading/fills/stream')
+                lines = [json_loads(line) for line in response.text.splitlines()]
+                assert len(lines) == 4
+                assert lines[-1] == {'error': 'page fetch failed'}
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
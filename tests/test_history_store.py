@@ -0,0 +1,74 @@
+"""
+Order refresh during history sync: still-open orders come from one
+listing, and failed single-order reads stay visible in last_error.
+Timestamps without an offset are UTC whatever the host's time zone.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from helpers import make_client, rest_orders
+from history_store import HistoryStore, to_epoch
+from simulated_exchange import SimulatedExchange
+
+
+def test_sync_refreshes_stored_orders_without_a_read_each(tmp_path):
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange)
+            await client.open()
+            history = HistoryStore(client, url=f"sqlite:///{tmp_path / 'history.db'}", page_size=50)
+            await history.open()
+            try:
+                placed = await rest_orders(client, 120)
+                await history.sync()
+                assert len(history.orders(status='OPEN')) == 120
+                
+                lookups = []
+                get_order = client.get_order
+                
+                async def counting_get_order(order_id):
+                    lookups.append(order_id)
+                    return await get_order(order_id)
+                
+                client.get_order = counting_get_order
+                await client.cancel_orders(placed[:3])
+                
+                # Nothing new since the watermark, so every stored open order is re-checked
+                await asyncio.to_thread(history._set_state, 'orders_watermark', '2999-01-01T00:00:00Z')
+                await history.sync()
+                assert sorted(lookups) == sorted(placed[:3])
+                assert len(history.orders(status='CANCELLED')) == 3
+                assert history.last_error is None
+                
+                async def failing_get_order(order_id):
+                    raise RuntimeError('shed')
+                
+                client.get_order = failing_get_order
+                await client.cancel_orders(placed[3:5])
+                await history.sync()
+                assert history.order_refresh_errors == 2
+                assert 'shed' in history.last_error
+            finally:
+                await history.close()
+                await client.close()
+    
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_naive_timestamps_are_utc(new_york):
+    assert to_epoch('2024-01-01T00:00:00') == 1704067200.0
+    assert to_epoch('2024-01-01T00:00:00Z') == 1704067200.0
+    assert to_epoch('2024-01-01T01:00:00+01:00') == 1704067200.0
+    assert to_epoch('') is None
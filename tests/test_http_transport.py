@@ -0,0 +1,93 @@
+"""
+Pooled transport: connections are kept alive and reused across requests,
+the pool bounds concurrency per host, and the session's lifecycle is
+explicit.
+"""
+
+import asyncio
+
+import pytest
+
+from helpers import make_client
+from http_transport import HTTPTransport
+from simulated_exchange import SimulatedExchange
+
+
+def test_sequential_requests_reuse_one_connection():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            transport = HTTPTransport()
+            await transport.open()
+            try:
+                for _ in range(5):
+                    async with transport.request('GET', f'{exchange.url}/api/v1/products') as response:
+                        assert response.status == 200
+                        await response.read()
+                stats = transport.stats()
+                assert stats['created'] == 1
+                assert stats['reused'] == 4
+                assert stats['idle'] == 1
+            finally:
+                await transport.close()
+    
+    asyncio.run(scenario())
+
+
+def test_pool_limits_connections_per_host():
+    async def scenario():
+        async with SimulatedExchange(latency=0.05) as exchange:
+            transport = HTTPTransport(pool_size_per_host=2)
+            await transport.open()
+            
+            async def get():
+                async with transport.request('GET', f'{exchange.url}/api/v1/products') as response:
+                    await response.read()
+            
+            try:
+                await asyncio.gather(*(get() for _ in range(6)))
+                stats = transport.stats()
+                assert stats['created'] == 2
+                assert stats['pool_waits'] == 4
+                assert stats['pool_wait_time_ms'] > 0
+            finally:
+                await transport.close()
+    
+    asyncio.run(scenario())
+
+
+def test_lifecycle():
+    async def scenario():
+        transport = HTTPTransport()
+        with pytest.raises(RuntimeError):
+            transport.request('GET', 'http://127.0.0.1/')
+        
+        session = await transport.open()
+        assert await transport.open() is session  # Idempotent
+        assert await transport.get_session() is session
+        await transport.close()
+        await transport.close()
+        assert not transport.is_open
+        
+        # Lazily reopened on first use
+        assert (await transport.get_session()) is not session
+        await transport.close()
+    
+    asyncio.run(scenario())
+
+
+def test_client_calls_share_the_pooled_session():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange)
+            await client.open()
+            try:
+                await client.get_accounts()
+                await client.get_product('BTC-USD')
+                await client.get_accounts()
+                stats = client.transport.stats()
+                assert stats['created'] == 1
+                assert stats['reused'] >= 2
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
@@ -0,0 +1,67 @@
+"""
+Feed dispatch: a failing consumer is isolated from the others and from
+the connection; a sequence gap still forces a resync.
+"""
+
+import pytest
+
+from market_data import MarketDataFeed, SequenceGapError
+
+
+def _ticker(sequence: int, price: str = '50000') -> dict:
+    return {
+        'channel': 'ticker',
+        'sequence_num': sequence,
+        'timestamp': '2026-01-01T00:00:00Z',
+        'events': [{'type': 'update', 'tickers': [{'product_id': 'BTC-USD', 'price': price}]}]
+    }
+
+
+class Failing:
+    def on_message(self, message: dict):
+        raise ValueError('bad message')
+
+
+def test_failing_handler_is_isolated():
+    feed = MarketDataFeed(['BTC-USD'])
+    seen = []
+    feed.add_handler('ticker', Failing().on_message)
+    feed.add_handler('ticker', seen.append)
+    feed.tickers.live = True
+    
+    feed._dispatch(_ticker(1))
+    feed._dispatch(_ticker(2, '50001'))
+    
+    assert len(seen) == 2
+    assert feed.tickers.get('BTC-USD').price == '50001'
+    assert feed.handler_errors == {'Failing.on_message': 2}
+    assert 'bad message' in feed.last_error
+    assert feed.messages == 2
+
+
+def test_failing_disconnect_handler_is_isolated():
+    feed = MarketDataFeed(['BTC-USD'])
+    calls = []
+    
+    def failing():
+        raise RuntimeError('boom')
+    
+    feed.add_disconnect_handler(failing)
+    feed.add_disconnect_handler(lambda: calls.append(True))
+    feed._mark_down()
+    
+    assert calls == [True]
+    assert sum(feed.handler_errors.values()) == 1
+
+
+def test_sequence_gap_raises_and_is_counted():
+    feed = MarketDataFeed(['BTC-USD'])
+    seen = []
+    feed.add_handler('ticker', seen.append)
+    
+    feed._dispatch(_ticker(1))
+    with pytest.raises(SequenceGapError):
+        feed._dispatch(_ticker(3))
+    
+    assert feed.sequence_gaps == 1
+    assert len(seen) == 1  # The out-of-sequence message is not delivered
@@ -0,0 +1,134 @@
+"""
+Market recorder: feed messages survive the round trip through segment
+files, segments rotate (a message never splits unless it outgrows one),
+time windows seek correctly and the replayer drives live-style handlers.
+"""
+
+import asyncio
+
+import pytest
+
+from market_recorder import MarketRecorder, MarketRecording, MarketReplayer, RecorderError
+
+
+def _ticker(number: int) -> dict:
+    return {
+        'channel': 'ticker',
+        'timestamp': f"2024-01-01T00:00:{number % 60:02d}.25Z",
+        'events': [{'type': 'update', 'tickers': [
+            {'type': 'ticker', 'product_id': 'BTC-USD', 'price': str(50000 + number), 'volume_24_h': '12.5',
+             'best_bid': str(49999 + number), 'best_ask': str(50001 + number)},
+            {'type': 'ticker', 'product_id': 'ETH-USD', 'price': '3000.5', 'volume_24_h': '100',
+             'best_bid': '3000', 'best_ask': '3001'}
+        ]}]
+    }
+
+
+def _trades(number: int) -> dict:
+    return {
+        'channel': 'market_trades',
+        'timestamp': '2024-01-01T00:00:01Z',
+        'events': [{'type': 'update', 'trades': [
+            {'product_id': 'SOL-USD', 'side': 'BUY' if number % 2 else 'SELL', 'price': '100.25', 'size': '3',
+             'time': '2024-01-01T00:00:00.123456789Z'}
+        ]}]
+    }
+
+
+def _book(levels: int, kind: str = 'update') -> dict:
+    return {
+        'channel': 'l2_data',
+        'timestamp': '2024-01-01T00:00:02Z',
+        'events': [{'type': kind, 'product_id': 'BTC-USD', 'updates': [
+            {'side': 'bid' if level % 2 else 'offer', 'event_time': '2024-01-01T00:00:02.5Z',
+             'price_level': str(50000 + level), 'new_quantity': str(level % 3)}
+            for level in range(levels)
+        ]}]
+    }
+
+
+def _normalized(message: dict) -> dict:
+    """Numbers as floats and timestamps dropped, for comparing against a replay"""
+    def walk(value):
+        if isinstance(value, dict):
+            return {key: walk(item) for key, item in value.items() if 'time' not in key}
+        if isinstance(value, list):
+            return [walk(item) for item in value]
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return value
+    return walk(message)
+
+
+def _record(directory, messages: list, **kwargs) -> MarketRecorder:
+    recorder = MarketRecorder(str(directory), **kwargs)
+    for message in messages:
+        recorder.on_message(message)
+    recorder.close()
+    return recorder
+
+
+def test_messages_round_trip(tmp_path):
+    messages = [_ticker(1), _trades(1), _book(5, 'snapshot'), _ticker(2), _trades(2), _book(3)]
+    recorder = _record(tmp_path, messages)
+    assert (recorder.messages, recorder.records, recorder.errors) == (6, 14, 0)
+    
+    replayed = [message for _, message in MarketRecording(str(tmp_path)).messages()]
+    assert [_normalized(message) for message in replayed] == [_normalized(message) for message in messages]
+    trade = replayed[1]['events'][0]['trades'][0]
+    assert trade['time'] == '2024-01-01T00:00:00.123456789Z'
+
+
+def test_segments_rotate_without_splitting_messages(tmp_path):
+    messages = [_ticker(number) for number in range(10)] + [_book(12)]
+    recorder = _record(tmp_path, messages, segment_records=5)
+    assert recorder.rotations >= 4
+    
+    recording = MarketRecording(str(tmp_path))
+    assert sum(entry['count'] for entry in recording.segments) == recorder.records == 32
+    for position in range(len(recording.segments)):
+        numbers = recording.segment(position).records['message'].tolist()
+        assert len(numbers) <= 5
+    
+    # The twelve-level book outgrew a segment, so it was split; the rest were kept whole
+    replayed = [message for _, message in recording.messages()]
+    tickers = [message for message in replayed if message['channel'] == 'ticker']
+    assert [_normalized(message) for message in tickers] == [_normalized(message) for message in messages[:10]]
+    levels = [update for message in replayed[10:] for event in message['events'] for update in event['updates']]
+    assert len(levels) == 12
+    assert len({entry['name'] for entry in recording.segments}) == len(recording.segments)
+    
+    # Seeking to the book finds its first part, not the last segment sharing its time
+    split = [message for _, message in recording.messages(start=recording.segments[-1]['first_time'])]
+    assert sum(len(event['updates']) for message in split for event in message['events']) == 12
+
+
+def test_time_windows_and_replay(tmp_path):
+    recorder = _record(tmp_path, [_ticker(number) for number in range(20)], segment_records=8)
+    recording = MarketRecording(str(tmp_path))
+    times = [received for received, _ in recording.messages()]
+    assert times == sorted(times) and len(times) == 20
+    
+    middle = times[10]
+    window = [received for received, _ in recording.messages(start=middle, end=times[15])]
+    assert window == [received for received in times if middle <= received < times[15]]
+    
+    replayer = MarketReplayer(recording)
+    seen = []
+    replayer.add_handler('ticker', seen.append)
+    replayer.add_handler('l2_data', pytest.fail)
+    assert asyncio.run(replayer.replay(start=middle)) == len([t for t in times if t >= middle])
+    assert seen[0]['events'][0]['tickers'][0]['price'] == repr(50000.0 + times.index(middle))
+    assert recorder.stats()['segments'] == len(recording.segments)
+
+
+def test_bad_input(tmp_path):
+    with pytest.raises(RecorderError):
+        MarketRecording(str(tmp_path))
+    
+    recorder = MarketRecorder(str(tmp_path))
+    recorder.on_message({'channel': 'heartbeats', 'events': []})
+    recorder.on_message({'channel': 'market_trades', 'events': [{'trades': [{'product_id': 'BTC-USD'}]}]})
+    assert recorder.messages == 0
+    assert recorder.errors == 1 and 'KeyError' in recorder.last_error
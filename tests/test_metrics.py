@@ -0,0 +1,134 @@
+"""
+Metrics: histogram buckets follow Prometheus' le semantics, the exposition
+is cumulative and escapes labels, upstream calls are timed by outcome, and
+the middleware labels requests by route template.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from helpers import make_client
+from metrics import Histogram, Metrics, MetricsMiddleware
+from resilience import RetryPolicy
+from simulated_exchange import SimulatedExchange
+
+
+def _samples(text: str) -> dict:
+    """Exposition lines -> {'name{labels}': value}"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, _, value = line.rpartition(' ')
+            samples[name] = float(value)
+    return samples
+
+
+def test_histogram_buckets_are_upper_inclusive():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 1.0, 7.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 2, 1]
+    assert histogram.count == 5
+    assert histogram.sum == pytest.approx(8.65)
+
+
+def test_render_is_cumulative_and_escaped():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.observe_request('GET', '/a', 200, 0.05)
+    metrics.observe_request('GET', '/a', 503, 0.5)
+    metrics.observe_upstream('coinbase', 'GET', '/say "hi"\\', 200, 2.0)
+    samples = _samples(metrics.render())
+    
+    assert samples['http_requests_total{method="GET",route="/a",status="200"}'] == 1
+    assert samples['http_request_errors_total{method="GET",route="/a"}'] == 1
+    bucket = 'http_request_duration_seconds_bucket{method="GET",route="/a",le="%s"}'
+    assert [samples[bucket % bound] for bound in ('0.1', '1.0', '+Inf')] == [1, 2, 2]
+    assert samples['http_request_duration_seconds_count{method="GET",route="/a"}'] == 2
+    assert samples['http_request_duration_seconds_sum{method="GET",route="/a"}'] == pytest.approx(0.55)
+    labels = 'service="coinbase",method="GET",endpoint="/say \\"hi\\"\\\\"'
+    assert samples[f'upstream_requests_total{{{labels},status="200"}}'] == 1
+    assert samples[f'upstream_request_duration_seconds_bucket{{{labels},le="1.0"}}'] == 0
+    assert metrics.stats()['request_errors'] == 1
+
+
+def test_upstream_calls_are_timed_by_outcome():
+    metrics = Metrics()
+    
+    async def call(status=None, raises=None):
+        async with metrics.upstream('graph', 'GET', '/me') as upstream:
+            assert metrics.upstream_in_flight['graph'] == 1
+            if status is not None:
+                upstream.status = status
+            if raises is not None:
+                raise raises
+    
+    async def scenario():
+        await call(status=200)
+        with pytest.raises(RuntimeError):
+            await call(raises=RuntimeError())
+        hedge = asyncio.ensure_future(_slow_call(metrics))
+        await asyncio.sleep(0.01)
+        hedge.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await hedge
+    
+    asyncio.run(scenario())
+    assert {key[-1]: count for key, count in metrics.upstream_calls.items()} == {200: 1, 'error': 1, 'cancelled': 1}
+    assert metrics.upstream_in_flight == {'graph': 0}
+
+
+async def _slow_call(metrics: Metrics):
+    async with metrics.upstream('graph', 'GET', '/me'):
+        await asyncio.sleep(10)
+
+
+def test_middleware_labels_by_route_template():
+    metrics = Metrics()
+    app = FastAPI()
+    
+    @app.get('/items/{item_id}')
+    async def item(item_id: str):
+        return {'id': item_id}
+    
+    @app.get('/broken')
+    async def broken():
+        raise RuntimeError('boom')
+    
+    client = TestClient(MetricsMiddleware(app, metrics), raise_server_exceptions=False)
+    for item_id in ('a', 'b', 'c'):
+        assert client.get(f'/items/{item_id}').status_code == 200
+    assert client.get('/nowhere').status_code == 404
+    assert client.get('/broken').status_code == 500
+    
+    assert metrics.requests == {
+        ('GET', '/items/{item_id}', 200): 3,
+        ('GET', 'unmatched', 404): 1,
+        ('GET', '/broken', 500): 1
+    }
+    assert metrics.requests_in_flight == 0
+
+
+def test_client_reports_upstream_calls():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            metrics = Metrics()
+            client = make_client(exchange, metrics=metrics, retry_policy=RetryPolicy(max_attempts=1))
+            await client.open()
+            try:
+                await client._request('GET', '/api/v1/products/BTC-USD/ticker')
+                exchange.inject(error_rate=1.0)
+                with pytest.raises(Exception):
+                    await client._request('GET', '/api/v1/products/ETH-USD/ticker')
+            finally:
+                await client.close()
+            return metrics
+    
+    metrics = asyncio.run(scenario())
+    assert metrics.upstream_calls == {
+        ('coinbase', 'GET', '/api/v1/products/{id}/ticker', 200): 1,
+        ('coinbase', 'GET', '/api/v1/products/{id}/ticker', 503): 1
+    }
+    assert metrics.upstream_in_flight == {'coinbase': 0}
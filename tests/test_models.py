@@ -0,0 +1,73 @@
+"""
+Lazy models read the same values as the eager dataclasses they stand in
+for, stay slotted, and fill in defaults for optional order fields; JSON
+helpers agree whichever decoder is installed.
+"""
+
+import asyncio
+import dataclasses
+
+import pytest
+
+import coinbase_client
+from coinbase_client import CoinbaseOrder, LazyOrder, LazyProduct, json_dumps, json_loads
+from helpers import make_client, rest_orders
+from simulated_exchange import SimulatedExchange
+
+
+def test_lazy_and_eager_parsing_agree():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            eager = make_client(exchange)
+            lazy = make_client(exchange, lazy_models=True)
+            await eager.open()
+            await lazy.open()
+            try:
+                order_id, = await rest_orders(eager, 1)
+                accounts = await eager._request('GET', '/api/v1/accounts')
+                products = await eager._request('GET', '/api/v1/products')
+                order = await eager._request('GET', f'/api/v1/brokerage/orders/{order_id}')
+                for parse, raw in (
+                    [('_parse_account_data', data) for data in accounts['accounts']]
+                    + [('_parse_product_data', data) for data in products['products']]
+                    + [('_parse_order_response', order)]
+                ):
+                    model, view = getattr(eager, parse)(raw), getattr(lazy, parse)(raw)
+                    assert dataclasses.is_dataclass(model)
+                    assert not dataclasses.is_dataclass(view)
+                    assert view.materialize() == model
+            finally:
+                await eager.close()
+                await lazy.close()
+    
+    asyncio.run(scenario())
+
+
+def test_lazy_models_are_slotted_views():
+    data = {'order_id': 'o-1', 'product_id': 'BTC-USD', 'status': 'OPEN'}
+    order = LazyOrder(data)
+    assert not hasattr(order, '__dict__')
+    with pytest.raises(AttributeError):
+        order.extra = 1
+    
+    # Reads go to the dict; optional order fields have defaults
+    assert order.status == 'OPEN'
+    data['status'] = 'FILLED'
+    assert order.status == 'FILLED'
+    assert order.filled_size == '0' and order.completion_time is None
+    assert isinstance(order.materialize(), CoinbaseOrder)
+    
+    # Product fields are all required
+    with pytest.raises(KeyError):
+        LazyProduct({'id': 'BTC-USD'}).base_increment
+
+
+@pytest.mark.parametrize('orjson', [True, False])
+def test_json_helpers(monkeypatch, orjson):
+    if orjson and not coinbase_client.ORJSON_AVAILABLE:
+        pytest.skip('orjson not installed')
+    monkeypatch.setattr(coinbase_client, 'ORJSON_AVAILABLE', orjson)
+    value = {'orders': [{'order_id': 'o-1', 'price': '50000.01', 'filled': 0.5, 'settled': False}]}
+    assert json_loads(json_dumps(value)) == value
+    assert json_loads(json_dumps(value).encode()) == value
+    assert isinstance(json_dumps(value), str)
@@ -0,0 +1,82 @@
+"""
+Level-2 books: snapshots replace, updates set or remove levels, and depth,
+spread and fill estimates read the sorted sides best first.
+"""
+
+import random
+
+import pytest
+
+from order_book import BookSide, L2OrderBook, OrderBookManager
+
+
+def _message(kind: str, product_id: str, updates: list) -> dict:
+    return {'channel': 'l2_data', 'events': [{
+        'type': kind,
+        'product_id': product_id,
+        'updates': [
+            {'side': side, 'price_level': str(price), 'new_quantity': str(size)}
+            for side, price, size in updates
+        ]
+    }]}
+
+
+def test_book_side_matches_a_reference_dict():
+    rng = random.Random(7)
+    for descending in (True, False):
+        side, reference = BookSide(descending), {}
+        for _ in range(2000):
+            price = rng.randrange(90, 110) + 0.5
+            size = rng.choice([0, 0, 1.0, 2.5])
+            side.update(price, size)
+            if size:
+                reference[price] = size
+            else:
+                reference.pop(price, None)
+        expected = sorted(reference.items(), reverse=descending)
+        assert list(side.levels()) == expected
+        assert side.top(5) == expected[:5]
+        assert side.top(0) == []
+        assert side.best() == expected[0][0]
+
+
+def test_snapshot_then_updates():
+    manager = OrderBookManager()
+    manager.on_message(_message('update', 'BTC-USD', [('bid', 99, 1)]))
+    assert manager.book('BTC-USD') is None  # No snapshot yet: updates are ignored
+    
+    manager.on_message(_message('snapshot', 'BTC-USD', [
+        ('bid', 99, 1), ('bid', 98, 2), ('offer', 101, 1), ('offer', 102, 3)
+    ]))
+    book = manager.book('BTC-USD')
+    assert (book.best_bid(), book.best_ask(), book.spread(), book.mid()) == (99, 101, 2, 100)
+    
+    manager.on_message(_message('update', 'BTC-USD', [('bid', 99, 0), ('bid', 100, 4), ('offer', 102, 1)]))
+    depth = book.depth(5)
+    assert depth['bids'] == [(100, 4), (98, 2)]
+    assert depth['asks'] == [(101, 1), (102, 1)]
+    assert manager.stats()['BTC-USD']['updates'] == 3
+    
+    manager.reset()
+    assert manager.book('BTC-USD') is None
+
+
+def test_estimate_fill_walks_the_opposite_side():
+    book = L2OrderBook('BTC-USD')
+    book.apply_snapshot([('bid', 99, 1), ('bid', 98, 1), ('ask', 100, 1), ('ask', 102, 2)])
+    
+    buy = book.estimate_fill('BUY', 2)
+    assert buy['filled'] == 2 and buy['unfilled'] == 0
+    assert buy['average_price'] == pytest.approx(101)
+    assert buy['slippage'] == pytest.approx(0.01)
+    
+    sell = book.estimate_fill('sell', 3)
+    assert sell['filled'] == 2 and sell['unfilled'] == 1
+    assert sell['average_price'] == pytest.approx(98.5)
+
+
+def test_empty_book():
+    book = L2OrderBook('BTC-USD')
+    book.apply_snapshot([])
+    assert book.spread() is None and book.mid() is None
+    assert book.estimate_fill('BUY', 1) == {'filled': 0, 'unfilled': 1, 'average_price': None, 'slippage': None}
@@ -0,0 +1,110 @@
+"""
+Open-order listings span several pages; bulk operations must follow the
+cursor rather than act on the first page only. Reconciliation must not
+undo user-channel events that arrive while its reads are in flight.
+"""
+
+import asyncio
+
+from helpers import make_client, rest_orders
+from order_manager import OrderManager
+from simulated_exchange import SimulatedExchange
+
+
+def test_cancel_all_orders_covers_every_page():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange)
+            await client.open()
+            try:
+                placed = await rest_orders(client, 300)
+                other = await rest_orders(client, 5, 'ETH-USD', price=100)
+                
+                # More than one page of open orders
+                first_page = await client.get_orders(product_id='BTC-USD', order_status='OPEN')
+                assert len(first_page) < 300
+                
+                results = await client.cancel_all_orders('BTC-USD')
+                assert sorted(result['order_id'] for result in results) == sorted(placed)
+                assert all(result['success'] for result in results)
+                
+                assert await client.get_all_orders(product_id='BTC-USD', order_status='OPEN') == []
+                still_open = await client.get_all_orders(product_id='ETH-USD', order_status='OPEN')
+                assert sorted(order.order_id for order in still_open) == sorted(other)
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
+
+
+def test_reconcile_sees_every_open_order():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange)
+            await client.open()
+            try:
+                placed = await rest_orders(client, 250)
+                manager = OrderManager(client)
+                await manager.reconcile()
+                assert sorted(order.order_id for order in manager.open_orders()) == sorted(placed)
+                
+                # Nothing drifted: no corrections, no per-order re-reads
+                lookups = []
+                get_order = client.get_order
+                
+                async def counting_get_order(order_id):
+                    lookups.append(order_id)
+                    return await get_order(order_id)
+                
+                client.get_order = counting_get_order
+                corrections = manager.reconcile_corrections
+                await manager.reconcile()
+                assert manager.reconcile_corrections == corrections
+                assert lookups == []
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
+
+
+def _fill_event(order_id: str) -> dict:
+    return {
+        'channel': 'user',
+        'events': [{'type': 'update', 'orders': [
+            {'order_id': order_id, 'status': 'FILLED', 'cumulative_quantity': '0.001'}
+        ]}]
+    }
+
+
+def test_reconcile_does_not_reopen_orders_updated_meanwhile():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange)
+            await client.open()
+            try:
+                placed = await rest_orders(client, 3)
+                manager = OrderManager(client)
+                await manager.reconcile()
+                
+                # The fill event lands while the listing (still showing the order open) is in flight
+                get_all_orders = client.get_all_orders
+                
+                async def listing_with_event(**kwargs):
+                    orders = await get_all_orders(**kwargs)
+                    manager.on_message(_fill_event(placed[0]))
+                    return orders
+                
+                client.get_all_orders = listing_with_event
+                await manager.reconcile()
+                assert manager.get(placed[0]).status == 'FILLED'
+                assert placed[0] not in {order.order_id for order in manager.open_orders()}
+                
+                # A later listing that still shows it open cannot move it back either
+                client.get_all_orders = get_all_orders
+                await manager.reconcile()
+                assert manager.get(placed[0]).status == 'FILLED'
+                assert len(manager.open_orders()) == 2
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
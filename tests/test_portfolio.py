@@ -0,0 +1,167 @@
+"""
+Portfolio: FIFO and average cost replay (the array path agrees with the
+per-fill loop), snapshots at mark prices, and incremental updates from the
+history store, including syncs that fail partway through.
+"""
+
+import asyncio
+import random
+
+import numpy as np
+import pytest
+
+from coinbase_client import OrderSide
+from helpers import make_client
+from history_store import HistoryStore
+from portfolio import FILL_COLUMNS, Portfolio, ProductBook, _replay_loop, replay
+from simulated_exchange import SimulatedExchange
+
+
+def test_sync_failing_partway_still_reaches_the_portfolio(tmp_path):
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange)
+            await client.open()
+            history = HistoryStore(client, url=f"sqlite:///{tmp_path / 'history.db'}", page_size=1)
+            await history.open()
+            portfolio = Portfolio(history)
+            try:
+                await client.place_limit_order('BTC-USD', OrderSide.BUY, '1', '60000')
+                await history.sync()
+                await portfolio.refresh()
+                assert portfolio.books['BTC-USD'].position == pytest.approx(1.0)
+                
+                for _ in range(3):
+                    await client.place_limit_order('BTC-USD', OrderSide.BUY, '1', '60000')
+                
+                # The listing fails after two fills (newest first) are stored
+                iter_fills = client.iter_fills
+                
+                async def failing_iter_fills(**kwargs):
+                    served = 0
+                    async for fill in iter_fills(**kwargs):
+                        if served == 2:
+                            raise RuntimeError('page fetch failed')
+                        served += 1
+                        yield fill
+                
+                client.iter_fills = failing_iter_fills
+                with pytest.raises(RuntimeError):
+                    await history.sync()
+                assert len(history.fills()) == 3
+                assert portfolio.books['BTC-USD'].position == pytest.approx(3.0)
+                
+                # The retry stores the older fill; out of order, so the next refresh rebuilds
+                client.iter_fills = iter_fills
+                await history.sync()
+                assert portfolio.stale
+                await portfolio.refresh()
+                assert portfolio.books['BTC-USD'].position == pytest.approx(4.0)
+                assert portfolio.books['BTC-USD'].fills == 4
+            finally:
+                await history.close()
+                await client.close()
+    
+    asyncio.run(scenario())
+
+
+class SimpleStore:
+    """Stands in for the history store where only listener registration matters"""
+    
+    def add_fill_listener(self, listener):
+        pass
+
+
+def test_fifo_and_average_cost_by_hand():
+    book = ProductBook('BTC-USD')
+    book.apply('BUY', 100, 1, commission=1)
+    book.apply('BUY', 200, 1, commission=1)
+    book.apply('SELL', 300, 1, commission=1)
+    assert book.position == 1
+    assert (book.realized('fifo'), book.cost_basis('fifo')) == (200, 200)
+    assert (book.realized('average'), book.cost_basis('average')) == (150, 150)
+    assert book.fees == 3
+    
+    book.apply('SELL', 100, 2)  # One more than is held
+    assert book.position == 0 and book.unmatched == 1
+    assert book.cost_basis('fifo') == book.cost_basis('average') == 0
+    assert book.realized('fifo') == pytest.approx(100)
+
+
+def _random_fills(count: int, seed: int) -> tuple:
+    rng = random.Random(seed)
+    buy, price, size = [], [], []
+    position = 0.0
+    for _ in range(count):
+        is_buy = position < 1e-6 or rng.random() < 0.55
+        amount = round(rng.uniform(0.1, 2), 3) if is_buy else rng.choice([position, round(position * rng.random(), 3)])
+        buy.append(is_buy)
+        price.append(round(rng.uniform(50, 150), 2))
+        size.append(amount)
+        position += amount if is_buy else -amount
+    commission = [p * s * 0.001 for p, s in zip(price, size)]
+    trade_ts = list(range(count))
+    return tuple(np.array(column, dtype=dtype) for column, dtype in (
+        (buy, bool), (price, float), (size, float), (commission, float), (trade_ts, float)
+    ))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_array_replay_matches_the_fill_loop(seed):
+    columns = _random_fills(400, seed)
+    fast = replay('BTC-USD', *columns)
+    slow = _replay_loop(ProductBook('BTC-USD'), *columns)
+    for name in ('position', 'fifo_cost', 'average_cost', 'realized_fifo', 'realized_average', 'fees'):
+        assert getattr(fast, name) == pytest.approx(getattr(slow, name), abs=1e-6), name
+    assert [lot[0] for lot in fast.lots] == pytest.approx([lot[0] for lot in slow.lots])
+    assert [lot[1] for lot in fast.lots] == pytest.approx([lot[1] for lot in slow.lots])
+    assert (fast.fills, fast.last_ts) == (slow.fills, slow.last_ts)
+
+
+def _rows(fills: list) -> list:
+    return [dict(zip(FILL_COLUMNS, fill)) for fill in fills]
+
+
+FILLS = [
+    ('BTC-USD', 'BUY', 100.0, 2.0, 'false', 0.5, 1.0),
+    ('ETH-USD', 'BUY', 10.0, 100.0, 'true', 0.0, 2.0),  # Sized in quote: 10 ETH
+    ('BTC-USD', 'SELL', 150.0, 1.0, 'false', 0.5, 3.0),
+    ('SOL-USD', 'BUY', 5.0, 4.0, 'false', 0.0, 4.0)
+]
+
+
+def test_incremental_fills_match_a_rebuild():
+    rebuilt = Portfolio(SimpleStore())
+    rebuilt.rebuild(FILLS)
+    
+    incremental = Portfolio(SimpleStore())
+    incremental.rebuild(FILLS[:1])
+    incremental.apply_fills(_rows(FILLS[1:]))
+    assert not incremental.stale
+    for method in ('fifo', 'average'):
+        assert incremental.snapshot(method) == rebuilt.snapshot(method)
+    assert rebuilt.books['ETH-USD'].position == pytest.approx(10)
+    
+    # A fill older than what a book has seen cannot be patched in
+    incremental.apply_fills(_rows([('BTC-USD', 'BUY', 90.0, 1.0, 'false', 0.0, 0.5)]))
+    assert incremental.stale and incremental.out_of_order == 1
+
+
+def test_snapshot_values_positions_at_their_marks():
+    portfolio = Portfolio(SimpleStore())
+    portfolio.rebuild(FILLS)
+    portfolio.mark('BTC-USD', 120)
+    portfolio.on_ticker({'events': [{'tickers': [{'product_id': 'ETH-USD', 'price': '12'}]}]})
+    
+    snapshot = portfolio.snapshot('fifo')
+    positions = {position['product_id']: position for position in snapshot['positions']}
+    assert positions['BTC-USD']['unrealized_pnl'] == pytest.approx(20)
+    assert positions['BTC-USD']['realized_pnl'] == pytest.approx(50)
+    assert positions['ETH-USD']['unrealized_pnl'] == pytest.approx(20)
+    assert positions['SOL-USD']['unrealized_pnl'] is None
+    totals = snapshot['totals']
+    assert totals['unmarked'] == ['SOL-USD']
+    assert totals['net_pnl'] == pytest.approx(20 + 20 + 50 - 1)
+    with pytest.raises(ValueError):
+        portfolio.snapshot('lifo')
+
@@ -0,0 +1,125 @@
+"""
+Product catalog cache: the first load blocks (once, however many callers),
+later reads are served from memory, and stale data is returned at once
+while a single background refresh replaces it.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from product_catalog import ProductCatalog
+
+
+class _Upstream:
+    """Product fetchers whose catalog version and availability can change"""
+    
+    def __init__(self):
+        self.version = 1
+        self.list_calls = 0
+        self.product_calls = 0
+        self.fail = False
+        self.gate = asyncio.Event()
+        self.gate.set()
+    
+    async def fetch_products(self):
+        self.list_calls += 1
+        await self.gate.wait()
+        if self.fail:
+            raise RuntimeError('upstream down')
+        return [SimpleNamespace(id=pid, version=self.version) for pid in ('BTC-USD', 'ETH-USD')]
+    
+    async def fetch_product(self, product_id):
+        self.product_calls += 1
+        return SimpleNamespace(id=product_id, version=self.version)
+
+
+def _catalog(upstream: _Upstream, ttl: float = 60.0) -> ProductCatalog:
+    return ProductCatalog(upstream.fetch_products, upstream.fetch_product, ttl=ttl)
+
+
+def test_first_load_is_shared_and_later_reads_hit():
+    async def scenario():
+        upstream = _Upstream()
+        catalog = _catalog(upstream)
+        results = await asyncio.gather(*(catalog.get_products() for _ in range(5)))
+        assert upstream.list_calls == 1
+        assert all(len(products) == 2 for products in results)
+        
+        await catalog.get_products()
+        assert (await catalog.get_product('ETH-USD')).version == 1
+        assert upstream.list_calls == 1 and upstream.product_calls == 0
+        assert catalog.stats()['hits'] == 2
+    
+    asyncio.run(scenario())
+
+
+def test_stale_reads_do_not_wait_for_the_refresh():
+    async def scenario():
+        upstream = _Upstream()
+        catalog = _catalog(upstream)
+        seen = []
+        catalog.add_listener(lambda products: seen.append(products[0].version))
+        await catalog.get_products()
+        
+        upstream.version = 2
+        upstream.gate.clear()
+        catalog.invalidate()
+        products = await asyncio.wait_for(catalog.get_products(), 0.1)
+        assert products[0].version == 1
+        await catalog.get_products()
+        assert upstream.list_calls == 2  # One background refresh for both stale reads
+        assert catalog.stats()['stale_hits'] == 2
+        
+        upstream.gate.set()
+        await asyncio.sleep(0.01)
+        assert (await catalog.get_products())[0].version == 2
+        assert seen == [1, 2]
+    
+    asyncio.run(scenario())
+
+
+def test_failed_refresh_keeps_serving_stale_data():
+    async def scenario():
+        upstream = _Upstream()
+        catalog = _catalog(upstream)
+        await catalog.get_products()
+        
+        upstream.fail = True
+        catalog.invalidate()
+        assert len(await catalog.get_products()) == 2
+        await asyncio.sleep(0.01)
+        assert len(await catalog.get_products()) == 2
+        stats = catalog.stats()
+        assert stats['refresh_errors'] >= 1
+        assert 'upstream down' in stats['last_error']
+    
+    asyncio.run(scenario())
+
+
+def test_unknown_product_is_fetched_and_indexed():
+    async def scenario():
+        upstream = _Upstream()
+        catalog = _catalog(upstream)
+        await catalog.get_products()
+        
+        assert (await catalog.get_product('SOL-USD')).id == 'SOL-USD'
+        assert (await catalog.get_product('SOL-USD')).id == 'SOL-USD'
+        assert upstream.product_calls == 1
+        assert catalog.lookup('SOL-USD') is not None
+    
+    asyncio.run(scenario())
+
+
+def test_dropped_catalog_blocks_until_reloaded():
+    async def scenario():
+        upstream = _Upstream()
+        catalog = _catalog(upstream)
+        await catalog.get_products()
+        
+        upstream.version = 2
+        catalog.invalidate(drop=True)
+        assert not catalog.is_loaded
+        assert (await catalog.get_products())[0].version == 2
+        assert catalog.stats()['misses'] == 2
+    
+    asyncio.run(scenario())
@@ -0,0 +1,146 @@
+"""
+Product rules: exact integer-tick parsing and rounding, size limits, and
+the vectorized batch validator agreeing with the per-order checks.
+"""
+
+from decimal import ROUND_CEILING
+
+import pytest
+
+from coinbase_client import LazyProduct, OrderRequest, OrderSide, OrderType
+from product_rules import OrderValidationError, ProductRules, ProductRulesIndex, from_units, to_units
+
+
+def _product(product_id: str = 'BTC-USD', **overrides) -> dict:
+    product = {
+        'id': product_id, 'base_currency': product_id.split('-')[0], 'quote_currency': 'USD',
+        'base_display_symbol': product_id.split('-')[0], 'quote_display_symbol': 'USD',
+        'display_name': product_id.replace('-', '/'), 'status': 'online', 'price': '50000',
+        'price_percentage_change_24h': '0', 'volume_24h': '0', 'volume_percentage_change_24h': '0',
+        'base_increment': '0.0001', 'quote_increment': '0.01',
+        'base_min_size': '0.001', 'base_max_size': '10',
+        'quote_min_size': '1', 'quote_max_size': '100000'
+    }
+    product.update(overrides)
+    return product
+
+
+def _rules(**overrides) -> ProductRules:
+    return ProductRules.from_product(LazyProduct(_product(**overrides)))
+
+
+@pytest.mark.parametrize('value, scale, expected', [
+    ('123', 2, (12300, True)),
+    ('0.015', 2, (1, False)),
+    ('.5', 1, (5, True)),
+    ('1.2300', 2, (123, True)),
+    ('1e-2', 2, (1, True)),
+    ('-0.5', 1, (-5, True))
+])
+def test_to_units(value, scale, expected):
+    assert to_units(value, scale) == expected
+
+
+def test_to_units_rounds_up_on_request():
+    assert to_units('0.011', 2, ROUND_CEILING) == (2, False)
+    assert to_units('0.010', 2, ROUND_CEILING) == (1, True)
+
+
+@pytest.mark.parametrize('value', ['²', '1.²', '²²', 'abc', '', 'nan', 'inf', None])
+def test_to_units_rejects_non_numbers(value):
+    with pytest.raises(OrderValidationError):
+        to_units(value, 2)
+
+
+def test_from_units():
+    assert from_units(12345, 2) == '123.45'
+    assert from_units(5, 3) == '0.005'
+    assert from_units(7, 0) == '7'
+
+
+def test_increments_become_integer_ticks():
+    rules = _rules(base_increment='0.00050000', quote_increment='0.25')
+    assert (rules.base_scale, rules.base_tick) == (4, 5)
+    assert (rules.quote_scale, rules.quote_tick) == (2, 25)
+    assert rules.base_min == 10 and rules.base_max == 100000
+
+
+def test_check_normalizes_valid_fields():
+    checked = _rules().check('BUY', base_size='0.50', limit_price='49999.9')
+    assert checked == {'base_size': '0.5000', 'quote_size': None, 'limit_price': '49999.90', 'stop_price': None}
+
+
+@pytest.mark.parametrize('fields, message', [
+    ({'base_size': '0.00015'}, 'not a multiple'),
+    ({'base_size': '0.0005'}, 'below the minimum'),
+    ({'base_size': '11'}, 'above the maximum'),
+    ({'base_size': '0'}, 'must be positive'),
+    ({'quote_size': '0.5'}, 'below the minimum'),
+    ({'base_size': '1', 'limit_price': '100.001'}, 'not a multiple'),
+    ({'base_size': '²'}, 'not a number')
+])
+def test_check_rejects(fields, message):
+    with pytest.raises(OrderValidationError, match=message):
+        _rules().check('BUY', **fields)
+
+
+def test_check_rejects_offline_products():
+    with pytest.raises(OrderValidationError, match='delisted'):
+        _rules(status='delisted').check('BUY', base_size='1')
+
+
+def test_snap_rounds_sizes_down_and_prices_away_from_the_market():
+    rules = _rules()
+    assert rules.check('BUY', base_size='0.12345', snap=True)['base_size'] == '0.1234'
+    assert rules.check('BUY', base_size='1', limit_price='100.019', snap=True)['limit_price'] == '100.01'
+    assert rules.check('SELL', base_size='1', limit_price='100.011', snap=True)['limit_price'] == '100.02'
+    assert rules.check('SELL', base_size='1', stop_price='100.01', snap=True)['stop_price'] == '100.01'
+
+
+def _request(product_id='BTC-USD', side=OrderSide.BUY, **fields) -> OrderRequest:
+    order_type = OrderType.LIMIT if 'limit_price' in fields else OrderType.MARKET
+    return OrderRequest(product_id=product_id, side=side, order_type=order_type, **fields)
+
+
+def test_batch_validation_matches_per_order_checks():
+    index = ProductRulesIndex()
+    index.rebuild([
+        LazyProduct(_product()),
+        LazyProduct(_product('ETH-USD', base_increment='0.001', quote_increment='0.1')),
+        LazyProduct(_product('OLD-USD', status='delisted'))
+    ])
+    requests = [
+        _request(base_size='0.5', limit_price='50000.01'),
+        _request(base_size='0.00015', limit_price='50000'),
+        _request(base_size='0.0005', limit_price='50000'),
+        _request(base_size='11', limit_price='50000'),
+        _request(quote_size='0.5'),
+        _request(quote_size='250.25'),
+        _request(base_size='1', limit_price='100.001'),
+        _request(base_size='²', limit_price='100'),
+        _request('ETH-USD', base_size='2.5', limit_price='3000.1'),
+        _request('ETH-USD', base_size='2.5', limit_price='3000.15'),
+        _request('OLD-USD', base_size='1', limit_price='10'),
+        _request('NEW-USD', base_size='1', limit_price='10')
+    ]
+    batch = index.validate_batch(requests)
+    single = [index._validate_one(request) for request in requests]
+    assert [error is None for error in batch] == [error is None for error in single]
+    assert [error is None for error in batch] == [
+        True, False, False, False, False, True, False, False, True, False, False, True
+    ]
+
+
+def test_rebuild_skips_products_with_missing_or_malformed_fields():
+    missing = _product('ETH-USD')
+    del missing['base_min_size']
+    index = ProductRulesIndex()
+    index.rebuild([
+        LazyProduct(_product()),
+        LazyProduct(missing),
+        LazyProduct(_product('SOL-USD', quote_increment={'value': '0.01'})),
+        LazyProduct(_product('XRP-USD', base_max_size='lots'))
+    ])
+    assert len(index) == 1
+    assert index.get('BTC-USD') is not None
+    assert index.stats()['skipped'] == 3
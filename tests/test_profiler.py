@@ -0,0 +1,81 @@
+"""
+Profiling is only reachable with a configured token: the admin endpoints
+and the per-request trigger header both check it, and the sample length is
+bounded.
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import ProfilingConfig, get_config
+from profiler import ProfilingMiddleware, SamplingProfiler
+
+
+def test_profiling_needs_a_token():
+    assert not ProfilingConfig(enabled=True).is_configured()
+    assert ProfilingConfig(enabled=True, token='secret').is_configured()
+    with pytest.raises(ValueError):
+        ProfilingMiddleware(None, SamplingProfiler(), token='')
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(main, 'profiler', SamplingProfiler(interval=0.001, max_seconds=1.0))
+    monkeypatch.setattr(get_config().profiling, 'token', 'secret')
+    return TestClient(main.app)
+
+
+def test_disabled_profiling_endpoints(monkeypatch):
+    monkeypatch.setattr(main, 'profiler', None)
+    response = TestClient(main.app).get('/admin/profile', headers={'X-Profile-Token': 'secret'})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('headers', [{}, {'X-Profile-Token': 'wrong'}, {'X-Profile-Token': 'secre'}])
+def test_profile_endpoints_reject_missing_or_wrong_tokens(admin, headers):
+    assert admin.get('/admin/profile', params={'seconds': 0.01}, headers=headers).status_code == 403
+    assert admin.get('/admin/profile/requests', headers=headers).status_code == 403
+
+
+@pytest.mark.parametrize('seconds', ['nan', 'inf', '-1', '0', '5'])
+def test_profile_seconds_must_be_finite_and_bounded(admin, seconds):
+    response = admin.get('/admin/profile', params={'seconds': seconds}, headers={'X-Profile-Token': 'secret'})
+    assert response.status_code == 400
+
+
+def test_profile_with_token(admin):
+    response = admin.get(
+        '/admin/profile',
+        params={'seconds': 0.05, 'format': 'json'},
+        headers={'X-Profile-Token': 'secret'}
+    )
+    assert response.status_code == 200
+    assert response.json()['done'] is True
+
+
+def test_sampler_rejects_non_finite_durations():
+    with pytest.raises(ValueError):
+        asyncio.run(SamplingProfiler().profile(float('nan')))
+
+
+def test_request_profiling_requires_the_token():
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+    
+    async def request(header: bytes) -> list:
+        middleware = ProfilingMiddleware(app, SamplingProfiler(), token='secret')
+        sent = []
+        
+        async def send(message):
+            sent.append(message)
+        
+        scope = {'type': 'http', 'method': 'GET', 'path': '/', 'headers': [(b'x-profile', header)]}
+        await middleware(scope, None, send)
+        return [name for name, _ in sent[0]['headers']]
+    
+    assert b'x-profile-id' not in asyncio.run(request(b'1'))
+    assert b'x-profile-id' in asyncio.run(request(b'secret'))
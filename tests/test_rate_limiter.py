@@ -0,0 +1,97 @@
+"""
+Token buckets refill continuously up to their burst; the scheduler grants
+queued requests cancels first, then placements, then reads, and sheds reads
+that wait past their deadline.
+"""
+
+import asyncio
+
+import pytest
+
+from coinbase_client import CoinbaseClient
+from rate_limiter import Priority, PriorityRequestScheduler, RequestShedError, TokenBucket
+
+
+def test_bucket_refills_up_to_its_burst():
+    bucket = TokenBucket(rate=10, burst=2)
+    start = bucket.updated_at
+    assert bucket.try_take(start) and bucket.try_take(start)
+    assert not bucket.try_take(start)
+    assert bucket.time_until_token(start) == pytest.approx(0.1)
+    
+    assert bucket.try_take(start + 0.1)
+    assert not bucket.try_take(start + 0.1)
+    
+    bucket.try_take(start + 10)  # Long idle: capped at the burst
+    assert bucket.tokens == pytest.approx(1)
+
+
+def test_drain_empties_the_bucket():
+    bucket = TokenBucket(rate=1000, burst=5)
+    bucket.drain()
+    assert bucket.tokens <= 0.01
+    assert bucket.time_until_token() > 0
+
+
+def test_queued_requests_are_granted_by_priority():
+    async def scenario():
+        scheduler = PriorityRequestScheduler({'private': TokenBucket(rate=50, burst=1)})
+        await scheduler.acquire('private')  # Takes the only token; the rest queue
+        
+        granted = []
+        
+        async def request(priority: Priority):
+            await scheduler.acquire('private', priority)
+            granted.append(priority)
+        
+        tasks = [asyncio.ensure_future(request(priority)) for priority in (
+            Priority.READ, Priority.PLACE, Priority.READ, Priority.CANCEL, Priority.PLACE
+        )]
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth('private') == {'CANCEL': 1, 'PLACE': 2, 'READ': 2}
+        await asyncio.gather(*tasks)
+        assert granted == [Priority.CANCEL, Priority.PLACE, Priority.PLACE, Priority.READ, Priority.READ]
+        
+        stats = scheduler.stats()['private']
+        assert stats['granted'] == 6
+        assert stats['max_wait_ms'] > 0
+    
+    asyncio.run(scenario())
+
+
+def test_reads_past_their_deadline_are_shed():
+    async def scenario():
+        scheduler = PriorityRequestScheduler({'private': TokenBucket(rate=1, burst=1)})
+        await scheduler.acquire('private')
+        with pytest.raises(RequestShedError):
+            await scheduler.acquire('private', Priority.READ, deadline=0.02)
+        assert scheduler.stats()['private']['shed'] == 1
+        assert scheduler.queue_depth('private')['READ'] == 0
+    
+    asyncio.run(scenario())
+
+
+def test_budgets_are_independent():
+    async def scenario():
+        scheduler = PriorityRequestScheduler({
+            'public': TokenBucket(rate=1, burst=1),
+            'private': TokenBucket(rate=1, burst=1)
+        })
+        await scheduler.acquire('public')
+        await asyncio.wait_for(scheduler.acquire('private'), 0.1)  # Not blocked by 'public'
+        
+        scheduler.penalize('private')
+        assert not scheduler.try_acquire('private')
+    
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize('method, endpoint, expected', [
+    ('GET', '/api/v1/products/BTC-USD/ticker', ('public', Priority.READ)),
+    ('GET', '/api/v1/accounts', ('private', Priority.READ)),
+    ('POST', '/api/v1/brokerage/orders', ('private', Priority.PLACE)),
+    ('POST', '/api/v1/brokerage/orders/batch_cancel', ('private', Priority.CANCEL)),
+    ('POST', '/api/v1/brokerage/orders/abc-123/cancel', ('private', Priority.CANCEL))
+])
+def test_requests_are_classified_by_budget_and_priority(method, endpoint, expected):
+    assert CoinbaseClient._classify(method, endpoint) == expected
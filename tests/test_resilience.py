@@ -0,0 +1,159 @@
+"""
+Circuit breaker probes that end without a verdict (cancelled, or refused
+before reaching the exchange) must not wedge the breaker half-open. Hedged
+reads time the upstream exchange only and never spend a token others need.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from coinbase_client import OrderSide
+from helpers import make_client
+from rate_limiter import PriorityRequestScheduler, RequestShedError, TokenBucket
+from resilience import CircuitBreaker, CircuitOpenError
+from simulated_exchange import SimulatedExchange
+
+
+ORDER_KEY = 'POST /api/v1/brokerage/orders'
+
+
+def _half_open_due(breaker: CircuitBreaker):
+    """Open, with the reset timeout already elapsed (the next call probes)"""
+    breaker.state = CircuitBreaker.OPEN
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout - 1
+
+
+def test_release_probe_lets_the_next_call_probe():
+    breaker = CircuitBreaker('test', reset_timeout=10.0)
+    _half_open_due(breaker)
+    
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    
+    breaker.release_probe()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.before_call() is True
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_release_probe_ignores_calls_that_were_not_the_probe():
+    breaker = CircuitBreaker('test')
+    assert breaker.before_call() is False
+    breaker.release_probe()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_probe_does_not_wedge_the_breaker():
+    async def scenario():
+        async with SimulatedExchange(latency=0.5) as exchange:
+            client = make_client(exchange, hedge_percentile=None)
+            await client.open()
+            try:
+                breaker = client._breaker(ORDER_KEY)
+                _half_open_due(breaker)
+                
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        client.place_limit_order('BTC-USD', OrderSide.BUY, '0.01', '40000'),
+                        timeout=0.05
+                    )
+                assert breaker.state == CircuitBreaker.OPEN
+                
+                exchange.inject(latency=0.0)
+                order = await client.place_limit_order('BTC-USD', OrderSide.BUY, '0.01', '40000')
+                assert order.order_id
+                assert breaker.state == CircuitBreaker.CLOSED
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
+
+
+def test_locally_refused_probe_is_neutral():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange, hedge_percentile=None)
+            
+            async def shed(*args, **kwargs):
+                raise RequestShedError('shed')
+            
+            breaker = client._breaker(ORDER_KEY)
+            _half_open_due(breaker)
+            client._timed_send = shed
+            with pytest.raises(RequestShedError):
+                await client.place_limit_order('BTC-USD', OrderSide.BUY, '0.01', '40000')
+            
+            # Not closed by a call that never reached the exchange, but free to probe again
+            assert breaker.state == CircuitBreaker.OPEN
+            assert breaker.before_call() is True
+            await client.close()
+    
+    asyncio.run(scenario())
+
+
+READ_KEY = 'GET /api/v1/accounts'
+
+
+def _scheduler(rate: float, burst: float) -> PriorityRequestScheduler:
+    return PriorityRequestScheduler({'public': TokenBucket(1e9), 'private': TokenBucket(rate, burst)})
+
+
+def test_latency_samples_exclude_rate_limit_waits():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange, scheduler=_scheduler(rate=20, burst=1))
+            await client.open()
+            try:
+                for _ in range(6):
+                    await client.get_accounts()  # Each waits ~50ms for a token
+                assert client.scheduler.stats()['private']['max_wait_ms'] > 30
+                assert max(client._latency(READ_KEY).samples) < 0.03
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
+
+
+def _slow_read_client(exchange: SimulatedExchange, scheduler: PriorityRequestScheduler):
+    """Client whose read p95 is far below the exchange's current latency"""
+    client = make_client(exchange, scheduler=scheduler)
+    tracker = client._latency(READ_KEY)
+    for _ in range(tracker.min_samples):
+        tracker.record(0.001)
+    exchange.inject(latency=0.05)
+    return client
+
+
+def test_slow_read_is_hedged_with_a_spare_token():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = _slow_read_client(exchange, _scheduler(rate=1e9, burst=1e9))
+            await client.open()
+            try:
+                await client.get_accounts()
+                assert client.hedges == 1
+                assert client.hedges_skipped == 0
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
+
+
+def test_no_hedge_when_the_budget_has_no_spare_token():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = _slow_read_client(exchange, _scheduler(rate=1, burst=1))
+            await client.open()
+            try:
+                await client.get_accounts()
+                assert client.hedges == 0
+                assert client.hedges_skipped == 1
+                assert exchange.requests == 1
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
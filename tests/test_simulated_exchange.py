@@ -0,0 +1,156 @@
+"""
+Simulated exchange: price-time priority matching with fees and balances,
+quote-sized and stop orders, seeded maker liquidity, order validation and
+cancels, plus the REST cursors and latency/error injection.
+"""
+
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from product_rules import OrderValidationError
+from simulated_exchange import MatchingEngine, SimulatedExchange
+
+
+def _limit(size: str, price: str) -> dict:
+    return {'limit_limit_gtc': {'base_size': size, 'limit_price': price}}
+
+
+def _market(**size) -> dict:
+    return {'market_market_ioc': size}
+
+
+def test_price_time_priority_fees_and_balances():
+    engine = MatchingEngine(liquidity_levels=0)
+    first = engine.submit('BTC-USD', 'SELL', _limit('1', '50000'))
+    second = engine.submit('BTC-USD', 'SELL', _limit('1', '50000'))
+    worse = engine.submit('BTC-USD', 'SELL', _limit('1', '50000.01'))
+    buy = engine.submit('BTC-USD', 'BUY', _limit('1.5', '50000.01'))
+    
+    assert (first.status, second.status, worse.status, buy.status) == ('FILLED', 'OPEN', 'OPEN', 'FILLED')
+    assert engine.order_dict(second)['leaves_quantity'] == '0.50000000'
+    assert engine.order_dict(buy)['average_filled_price'] == '50000.00'
+    assert [(fill['order_id'], fill['size'], fill['liquidity_indicator']) for fill in engine.fills] == [
+        (first.order_id, '1.00000000', 'MAKER'),
+        (buy.order_id, '1.00000000', 'TAKER'),
+        (second.order_id, '0.50000000', 'MAKER'),
+        (buy.order_id, '0.50000000', 'TAKER')
+    ]
+    assert float(engine.order_dict(first)['fee']) == pytest.approx(50000 * 0.004)
+    assert float(engine.order_dict(buy)['fee']) == pytest.approx(75000 * 0.006)
+    
+    # Both sides were the same user: the base nets out and the quote pays both fees
+    assert engine.balances['BTC'] == pytest.approx(1000)
+    assert engine.balances['USD'] == pytest.approx(10_000_000 - 75000 * 0.01)
+
+
+def test_market_orders_walk_the_seeded_book():
+    engine = MatchingEngine()
+    order = engine.submit('BTC-USD', 'BUY', _market(base_size='25'))
+    assert order.status == 'FILLED'
+    average = float(engine.order_dict(order)['average_filled_price'])
+    assert average == pytest.approx((10 * 50000.01 + 10 * 50000.02 + 5 * 50000.03) / 25)
+    # The partly taken level is still best, with new makers seeded behind it
+    ticker = engine.ticker('BTC-USD')
+    assert (ticker['price'], ticker['ask']) == ('50000.03', '50000.03')
+    assert engine.books['BTC-USD'].asks.depth[5000004] == 10 * 10 ** 8
+    
+    # A quote-sized order spends at most its budget, in whole base increments
+    spend = engine.submit('SOL-USD', 'BUY', _market(quote_size='1000'))
+    value = float(engine.order_dict(spend)['filled_value'])
+    assert spend.status == 'FILLED'
+    assert 1000 - 100.02 * 0.001 < value <= 1000
+
+
+def test_stop_orders_wait_for_the_trigger():
+    engine = MatchingEngine()
+    stop = engine.submit('BTC-USD', 'SELL', {'stop_limit_stop_limit_gtc': {
+        'base_size': '1', 'limit_price': '49999.00', 'stop_price': '49999.95'
+    }})
+    assert stop.status == 'OPEN' and stop in engine.books['BTC-USD'].stops
+    
+    engine.submit('BTC-USD', 'SELL', _market(base_size='30'))  # Down to 49999.97
+    assert stop.status == 'OPEN'
+    engine.submit('BTC-USD', 'SELL', _market(base_size='30'))  # Through 49999.94
+    assert stop.status == 'FILLED' and not engine.books['BTC-USD'].stops
+    assert float(engine.order_dict(stop)['average_filled_price']) >= 49999.0
+
+
+@pytest.mark.parametrize('product_id, side, configuration', [
+    ('DOGE-USD', 'BUY', _market(base_size='1')),
+    ('BTC-USD', 'HOLD', _market(base_size='1')),
+    ('BTC-USD', 'BUY', {**_market(base_size='1'), **_limit('1', '50000')}),
+    ('BTC-USD', 'BUY', {'twap_gtd': {'base_size': '1'}}),
+    ('BTC-USD', 'BUY', {'limit_limit_gtc': {'base_size': '1'}}),
+    ('BTC-USD', 'BUY', _limit('1', '50000.001')),
+    ('SOL-USD', 'BUY', _market(base_size='0.0001')),
+    ('BTC-USD', 'BUY', _market())
+])
+def test_invalid_orders_are_rejected(product_id, side, configuration):
+    engine = MatchingEngine()
+    with pytest.raises(OrderValidationError):
+        engine.submit(product_id, side, configuration)
+    assert engine.submitted == 0 and not engine.order_list
+
+
+def test_cancel_reasons():
+    engine = MatchingEngine()
+    resting = engine.submit('BTC-USD', 'BUY', _limit('2', '40000'))
+    filled = engine.submit('BTC-USD', 'BUY', _market(base_size='1'))
+    bids = engine.books['BTC-USD'].bids
+    assert bids.depth[4000000] == 2 * 10 ** 8
+    
+    assert engine.cancel(resting.order_id) is None
+    assert resting.status == 'CANCELLED' and 4000000 not in bids.depth
+    assert engine.cancel(resting.order_id) == 'DUPLICATE_CANCEL_REQUEST'
+    assert engine.cancel(filled.order_id) == 'UNKNOWN_CANCEL_FAILURE_REASON'
+    assert engine.cancel('missing') == 'UNKNOWN_CANCEL_ORDER'
+    assert engine.stats()['open_orders'] == 0
+
+
+def test_rest_cursors_and_injection():
+    async def pages(session, url: str, key: str) -> list:
+        items, cursor = [], ''
+        while True:
+            async with session.get(url, params={'limit': '2', 'cursor': cursor}) as response:
+                body = await response.json()
+            items += body[key]
+            cursor = body['cursor']
+            if not cursor:
+                return items
+    
+    async def scenario():
+        async with SimulatedExchange(seed=1) as exchange:
+            engine = exchange.engine
+            for price in ('60000', '60001', '60002'):
+                engine.submit('BTC-USD', 'BUY', _limit('0.5', price))
+            engine.submit('ETH-USD', 'BUY', _limit('1', '2000'))
+            engine.submit('ETH-USD', 'BUY', _limit('1', '2001'))
+            
+            api = f"{exchange.url}/api/v1"
+            async with aiohttp.ClientSession() as session:
+                orders = await pages(session, f"{api}/brokerage/orders/batch", 'orders')
+                assert [order['order_id'] for order in orders] == [order.order_id for order in engine.order_list[::-1]]
+                fills = await pages(session, f"{api}/brokerage/orders/historical/fills", 'fills')
+                assert fills == engine.fills[::-1] and len(fills) == 3
+                
+                async with session.post(f"{api}/brokerage/orders", json={
+                    'product_id': 'BTC-USD', 'side': 'BUY', 'order_configuration': _market(base_size='-1')
+                }) as response:
+                    assert response.status == 400
+                assert engine.rejected == 1
+                
+                exchange.inject(error_rate=1.0, error_status=429)
+                async with session.get(f"{api}/products") as response:
+                    assert response.status == 429
+                assert exchange.injected_errors == 1
+                
+                exchange.inject(error_rate=0.0, latency=0.05)
+                started = time.perf_counter()
+                async with session.get(f"{api}/products/BTC-USD/ticker") as response:
+                    assert response.status == 200
+                assert time.perf_counter() - started >= 0.05
+    
+    asyncio.run(scenario())
@@ -0,0 +1,93 @@
+"""
+Identical concurrent calls share one in-flight request (result, error and
+all); a caller going away does not cancel it for the others.
+"""
+
+import asyncio
+
+import pytest
+
+from helpers import make_client
+from simulated_exchange import SimulatedExchange
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_request():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+        
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return {'key': key}
+        
+        results = await asyncio.gather(
+            *(flight.do('a', lambda: fetch('a')) for _ in range(5)),
+            flight.do('b', lambda: fetch('b'))
+        )
+        assert calls == ['a', 'b']
+        assert results[:5] == [{'key': 'a'}] * 5 and results[5] == {'key': 'b'}
+        assert flight.stats() == {'in_flight': 0, 'issued': 2, 'coalesced': 4, 'fan_in': 3.0}
+        
+        # Finished calls are not cached
+        await flight.do('a', lambda: fetch('a'))
+        assert calls == ['a', 'b', 'a']
+    
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_caller():
+    async def scenario():
+        flight = SingleFlight()
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError('upstream down')
+        
+        results = await asyncio.gather(*(flight.do('k', fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert flight.issued == 1
+    
+    asyncio.run(scenario())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    async def scenario():
+        flight = SingleFlight()
+        
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return 'done'
+        
+        first = asyncio.ensure_future(flight.do('k', fetch))
+        second = asyncio.ensure_future(flight.do('k', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == 'done'
+        with pytest.raises(asyncio.CancelledError):
+            await first
+    
+    asyncio.run(scenario())
+
+
+def test_client_coalesces_identical_gets_only():
+    async def scenario():
+        async with SimulatedExchange(latency=0.02) as exchange:
+            client = make_client(exchange)
+            await client.open()
+            try:
+                await asyncio.gather(*(client.get_accounts() for _ in range(10)))
+                assert exchange.requests == 1
+                
+                # Different query strings are different keys
+                await asyncio.gather(
+                    client.get_orders(product_id='BTC-USD'),
+                    client.get_orders(product_id='ETH-USD')
+                )
+                assert exchange.requests == 3
+                assert client.single_flight.coalesced == 9
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
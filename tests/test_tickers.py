@@ -0,0 +1,52 @@
+"""
+Batched tickers: ids are fetched once each, concurrently but no more than
+the configured fan-out, and one bad id does not fail the batch.
+"""
+
+import asyncio
+
+from helpers import make_client
+from simulated_exchange import SimulatedExchange
+
+
+def test_batch_reports_bad_ids_separately():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange)
+            await client.open()
+            try:
+                tickers, errors = await client.get_tickers(['BTC-USD', 'ETH-USD', 'NOPE-USD', 'BTC-USD'])
+                assert sorted(tickers) == ['BTC-USD', 'ETH-USD']
+                assert tickers['BTC-USD'].product_id == 'BTC-USD'
+                assert float(tickers['ETH-USD'].price) > 0
+                assert list(errors) == ['NOPE-USD']
+            finally:
+                await client.close()
+    
+    asyncio.run(scenario())
+
+
+def test_fan_out_is_bounded():
+    async def scenario():
+        async with SimulatedExchange() as exchange:
+            client = make_client(exchange, ticker_batch_concurrency=3)
+            active = peak = 0
+            
+            async def get_ticker(product_id):
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+                return product_id
+            
+            client.get_ticker = get_ticker
+            ids = [f'P{i}-USD' for i in range(12)]
+            tickers, errors = await client.get_tickers(ids)
+            assert list(tickers) == ids and errors == {}
+            assert peak == 3
+            
+            await client.get_tickers(ids, concurrency=6)
+            assert peak == 6
+    
+    asyncio.run(scenario())
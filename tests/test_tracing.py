@@ -0,0 +1,57 @@
+"""
+Span export: every finished span reaches the exporter while the worker
+drains concurrently, and traces nest under the request span.
+"""
+
+import sys
+
+from tracing import MemoryExporter, Tracer
+
+
+def test_no_span_is_lost_while_the_worker_drains():
+    exporter = MemoryExporter(limit=10 ** 6)
+    tracer = Tracer(exporter, batch_size=7, flush_interval=0.0001, max_pending=10 ** 6)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Interleave the loop and worker threads as often as possible
+    try:
+        for _ in range(20000):
+            with tracer.trace('root'):
+                with tracer.span('child'):
+                    pass
+    finally:
+        sys.setswitchinterval(interval)
+    tracer.flush()
+    
+    assert tracer.spans_finished == 40000
+    assert tracer.spans_dropped == 0
+    assert tracer.spans_exported == 40000
+    assert len(exporter.spans) == 40000
+    tracer.shutdown()
+
+
+def test_children_share_the_trace_and_point_at_their_parent():
+    exporter = MemoryExporter()
+    tracer = Tracer(exporter)
+    with tracer.trace('GET /orders') as root:
+        with tracer.span('coinbase.request') as request:
+            with tracer.span('coinbase.sign'):
+                pass
+    tracer.shutdown()
+    
+    spans = {span['name']: span for span in exporter.spans}
+    assert {span['trace_id'] for span in spans.values()} == {root.trace_id}
+    assert spans['GET /orders']['parent_id'] is None
+    assert spans['coinbase.request']['parent_id'] == root.span_id
+    assert spans['coinbase.sign']['parent_id'] == request.span_id
+
+
+def test_unsampled_traces_record_nothing():
+    exporter = MemoryExporter()
+    tracer = Tracer(exporter, sample_rate=0.0)
+    with tracer.trace('GET /orders'):
+        with tracer.span('coinbase.request'):
+            pass
+    tracer.shutdown()
+    
+    assert tracer.spans_finished == 0
+    assert len(exporter.spans) == 0
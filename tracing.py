@@ -0,0 +1,424 @@
+"""
+Tracing
+Request-scoped spans from the API route handler down through upstream
+calls (rate limiting, signing, connection acquisition, the HTTP exchange,
+response parsing), sampled per trace and handed in batches to a pluggable
+exporter on a background thread.
+"""
+
+import asyncio
+import contextvars
+import importlib
+import json
+import random
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+
+def current_span():
+    """The span open in this task (a no-op span outside a trace)"""
+    return _current.get() or NULL_SPAN
+
+
+def parse_traceparent(value: str) -> Optional[tuple]:
+    """
+    Parse a W3C traceparent header
+    Returns: (trace_id, parent span id, sampled) or None if malformed
+    """
+    parts = value.strip().split('-')
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16)
+        int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == '0' * 32 or parts[2] == '0' * 16:
+        return None
+    return parts[1].lower(), parts[2].lower(), bool(flags & 1)
+
+
+class Span:
+    """
+    One timed operation in a trace
+    Starts when created; as a (sync or async) context manager it is the
+    current span of the task while open, and records an escaping exception.
+    """
+    __slots__ = (
+        'tracer', 'name', 'trace_id', 'span_id', 'parent_id',
+        'start', 'end', 'status', 'attributes', '_token'
+    )
+    
+    def __init__(self, tracer: 'Tracer', name: str, trace_id: str, parent_id: Optional[str], attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f'{random.getrandbits(64):016x}'
+        self.parent_id = parent_id
+        self.start = time.time_ns()
+        self.end: Optional[int] = None
+        self.status = 'ok'
+        self.attributes = attributes
+        self._token = None
+    
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    def finish(self, error: Optional[BaseException] = None):
+        """End the span (idempotent) and queue it for export"""
+        if self.end is not None:
+            return
+        self.end = time.time_ns()
+        if isinstance(error, asyncio.CancelledError):
+            self.status = 'cancelled'
+        elif error is not None:
+            self.status = 'error'
+            self.attributes['error'] = f'{type(error).__name__}: {error}'
+        self.tracer._finished(self)
+    
+    def __enter__(self) -> 'Span':
+        self._token = _current.set(self)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self.finish(exc)
+    
+    async def __aenter__(self) -> 'Span':
+        return self.__enter__()
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.__exit__(exc_type, exc, tb)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_time_unix_nano': self.start,
+            'end_time_unix_nano': self.end,
+            'duration_ms': round((self.end - self.start) / 1e6, 3),
+            'status': self.status,
+            'attributes': self.attributes
+        }
+
+
+class _NullSpan:
+    """Stands in for Span outside a sampled trace (or without a tracer)"""
+    __slots__ = ()
+    trace_id = None
+    
+    def set(self, key: str, value: Any):
+        pass
+    
+    def finish(self, error: Optional[BaseException] = None):
+        pass
+    
+    def __enter__(self) -> '_NullSpan':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        pass
+    
+    async def __aenter__(self) -> '_NullSpan':
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _UnsampledSpan(_NullSpan):
+    """Root of a trace that was not sampled: keeps its children from recording"""
+    __slots__ = ('_token',)
+    
+    def __enter__(self) -> '_UnsampledSpan':
+        self._token = _current.set(self)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+
+
+# ============================================================================
+# Exporters
+# ============================================================================
+
+class SpanExporter:
+    """Sink for finished spans; export() runs on the tracer's worker thread"""
+    
+    def export(self, spans: List[Dict[str, Any]]):
+        raise NotImplementedError
+    
+    def shutdown(self):
+        pass
+
+
+class ConsoleExporter(SpanExporter):
+    """One JSON line per span on a stream (stdout by default)"""
+    
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+    
+    def export(self, spans: List[Dict[str, Any]]):
+        self.stream.write(''.join(json.dumps(span, default=str) + '\n' for span in spans))
+        self.stream.flush()
+
+
+class FileExporter(SpanExporter):
+    """Appends one JSON line per span to a file"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+    
+    def export(self, spans: List[Dict[str, Any]]):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(''.join(json.dumps(span, default=str) + '\n' for span in spans))
+        self._file.flush()
+    
+    def shutdown(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class MemoryExporter(SpanExporter):
+    """Keeps the most recent spans in memory (tests and local inspection)"""
+    
+    def __init__(self, limit: int = 10000):
+        self.spans: deque = deque(maxlen=limit)
+    
+    def export(self, spans: List[Dict[str, Any]]):
+        self.spans.extend(spans)
+    
+    def traces(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Spans grouped by trace id, each trace in start order"""
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for span in sorted(self.spans, key=lambda span: span['start_time_unix_nano']):
+            grouped.setdefault(span['trace_id'], []).append(span)
+        return grouped
+
+
+def create_exporter(name: str, path: Optional[str] = None) -> SpanExporter:
+    """
+    Exporter by name: 'console', 'file' (JSON lines at `path`), 'memory',
+    or 'package.module:factory' for a custom sink
+    """
+    if name == 'console':
+        return ConsoleExporter()
+    if name == 'file':
+        return FileExporter(path or 'traces.jsonl')
+    if name == 'memory':
+        return MemoryExporter()
+    module_name, _, attribute = name.partition(':')
+    if not attribute:
+        raise ValueError(f"Unknown trace exporter: {name}")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+# ============================================================================
+# Tracer
+# ============================================================================
+
+class Tracer:
+    """
+    Creates spans and exports the finished ones
+    Sampling is decided once per trace at its root (or taken from an
+    incoming traceparent). Finished spans are appended to a deque on the
+    loop and popped by a worker thread that drains it every flush_interval
+    (woken early once batch_size are waiting), so a slow sink never blocks
+    the event loop and the worker is not woken per request; beyond
+    max_pending waiting spans, new ones are dropped rather than buffered
+    without bound.
+    """
+    
+    def __init__(
+        self,
+        exporter: Optional[SpanExporter] = None,
+        sample_rate: float = 1.0,
+        service: str = 'trading-platform-api',
+        batch_size: int = 512,
+        flush_interval: float = 0.5,
+        max_pending: int = 10000
+    ):
+        self.exporter = exporter or ConsoleExporter()
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.service = service
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: deque = deque()  # append() on the loop, popleft() on the worker
+        self._wake = threading.Event()
+        self._flushes: deque = deque()  # Events set once everything before them is exported
+        self._stopping = False
+        self._worker = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self._worker.start()
+        
+        # Counters
+        self.traces_started = 0
+        self.traces_sampled = 0
+        self.spans_finished = 0
+        self.spans_exported = 0
+        self.spans_dropped = 0
+        self.export_errors = 0
+        self.last_error: Optional[str] = None
+    
+    def trace(self, name: str, traceparent: Optional[str] = None, **attributes):
+        """Root span of a trace (continues the caller's trace given a valid traceparent)"""
+        self.traces_started += 1
+        parent = parse_traceparent(traceparent) if traceparent else None
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = None, None
+            sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        if not sampled:
+            return _UnsampledSpan()
+        
+        self.traces_sampled += 1
+        return Span(self, name, trace_id or f'{random.getrandbits(128):032x}', parent_id, attributes)
+    
+    def span(self, name: str, **attributes):
+        """Child of the current span (a no-op outside a sampled trace)"""
+        parent = _current.get()
+        if parent is None or parent.trace_id is None:
+            return NULL_SPAN
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+    
+    def _finished(self, span: Span):
+        self.spans_finished += 1
+        pending = len(self._pending)
+        if pending >= self.max_pending:
+            self.spans_dropped += 1
+            return
+        self._pending.append(span)
+        if pending + 1 == self.batch_size:
+            self._wake.set()
+    
+    def _export(self, batch: List[Span]):
+        try:
+            self.exporter.export([{'service': self.service, **span.to_dict()} for span in batch])
+            self.spans_exported += len(batch)
+        except Exception as e:
+            self.export_errors += 1
+            self.last_error = f'{type(e).__name__}: {e}'
+    
+    def _drain(self):
+        # Pops are atomic, so a span appended concurrently is either taken
+        # now or left for the next drain
+        pending = self._pending
+        while pending:
+            batch = []
+            while pending and len(batch) < self.batch_size:
+                batch.append(pending.popleft())
+            self._export(batch)
+    
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            stopping = self._stopping
+            # Spans finished before a flush() call precede its event
+            flushes = [self._flushes.popleft() for _ in range(len(self._flushes))]
+            self._drain()
+            for done in flushes:
+                done.set()
+            if stopping:
+                self.exporter.shutdown()
+                return
+    
+    def flush(self, timeout: Optional[float] = None):
+        """Block until every span finished so far has been exported"""
+        if not self._worker.is_alive():
+            return
+        done = threading.Event()
+        self._flushes.append(done)
+        self._wake.set()
+        done.wait(timeout)
+    
+    def shutdown(self):
+        """Export what is buffered, stop the worker and close the exporter"""
+        if self._worker.is_alive():
+            self._stopping = True
+            self._wake.set()
+            self._worker.join()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'service': self.service,
+            'exporter': type(self.exporter).__name__,
+            'sample_rate': self.sample_rate,
+            'traces_started': self.traces_started,
+            'traces_sampled': self.traces_sampled,
+            'spans_finished': self.spans_finished,
+            'spans_exported': self.spans_exported,
+            'spans_dropped': self.spans_dropped,
+            'spans_buffered': len(self._pending),
+            'export_errors': self.export_errors,
+            'last_error': self.last_error
+        }
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the root span of every HTTP request
+    The span is named by route template once routing has run. An incoming
+    traceparent header continues the caller's trace, and sampled responses
+    carry an X-Trace-Id header.
+    """
+    
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        
+        traceparent = None
+        for name, value in scope['headers']:
+            if name == b'traceparent':
+                traceparent = value.decode('latin-1')
+                break
+        
+        method = scope['method']
+        span = self.tracer.trace(f"{method} {scope['path']}", traceparent, method=method, path=scope['path'])
+        if span.trace_id is None:
+            with span:
+                await self.app(scope, receive, send)
+            return
+        
+        status = 500  # If the app raises before responding
+        trace_header = (b'x-trace-id', span.trace_id.encode())
+        
+        async def send_with_trace(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                message = {**message, 'headers': list(message.get('headers', [])) + [trace_header]}
+            await send(message)
+        
+        with span:
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                route = scope.get('route')
+                if route is not None:
+                    span.name = f'{method} {route.path}'
+                    span.set('route', route.path)
+                span.set('status', status)
+                if status >= 500:
+                    span.status = 'error'